@@ -0,0 +1,325 @@
+"""
+Benchmark del RPA Scraper
+=========================
+Genera ofertas sintéticas con distribuciones de strings realistas (de 10k a
+10M) y mide cada etapa del pipeline y cada formato de exportación con
+PipelineMetrics (wall time, filas/s, RSS pico, bytes escritos):
+
+- in_memory: lista de dicts → clean_and_transform_data → un export por formato
+  (json, ndjson, parquet, arrow, excel_openpyxl, excel_xlsxwriter)
+- streaming: generador → transform en chunks con external sort, escribiendo
+  NDJSON y Excel (xlsxwriter) chunk a chunk, más Parquet desde los chunks
+
+Cada combinación (tamaño, modo) corre en un proceso aparte para que el RSS
+de una no contamine a la siguiente. Los resultados se guardan como JSON y
+pueden compararse contra una corrida anterior (baseline).
+
+Uso:
+    python benchmark.py --sizes 10000 100000 --output bench.json
+    python benchmark.py --sizes 10000000 --modes streaming --formats ndjson parquet
+    python benchmark.py --sizes 10000 100000 --baseline bench.json --max-regression 1.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+import pandas as pd
+
+from excel_writer import EXCEL_MAX_ROWS
+from metrics import PipelineMetrics
+from scraper import (
+    clean_and_transform_data,
+    generate_arrow_output,
+    generate_excel_report,
+    generate_json_output,
+    generate_ndjson_output,
+    generate_parquet_output,
+    transform_and_stream_outputs,
+)
+from transform import JobAggregates
+
+ROLES = ["Software Engineer", "Backend Developer", "Data Engineer", "Data Scientist",
+         "DevOps Engineer", "Frontend Developer", "Full Stack Developer", "ML Engineer",
+         "QA Automation Engineer", "Site Reliability Engineer", "RPA Developer", "Python Developer"]
+SENIORITY = [("", 30, 90000), ("Junior ", 15, 55000), ("Senior ", 30, 130000),
+             ("Lead ", 10, 150000), ("Staff ", 10, 170000), ("Principal ", 5, 200000)]
+TECH = ["Python", "Django", "FastAPI", "AWS", "Kubernetes", "React", "Go", "Java", "SQL",
+        "Spark", "Airflow", "UiPath", "Selenium", "Terraform", "PostgreSQL"]
+LOCATIONS = [("Remote", 35), ("New York, NY", 8), ("San Francisco, CA", 8), ("Austin, TX", 5),
+             ("London, UK", 6), ("Berlin, DE", 5), ("Buenos Aires, AR", 4), ("Madrid, ES", 4),
+             ("Toronto, CA", 4), ("Remote (US)", 10), ("Hybrid - Chicago, IL", 5), ("Bangalore, IN", 6)]
+JOB_TYPES = [("Full-time", 70), ("Contract", 18), ("Part-time", 7), ("Internship", 5)]
+COMPANY_SUFFIXES = ["Labs", "Inc.", "Technologies", "Group", "Software", "Systems", "AI", "Cloud", "Data"]
+SENTENCES = [
+    "We are looking for a {seniority}{role} to join our {team} team.",
+    "You will build and maintain services using {tech} and {tech2}.",
+    "Experience with {tech} is a strong plus.",
+    "Our stack includes {tech}, {tech2} and a lot of automation.",
+    "You will collaborate with product, design and data teams across time zones.",
+    "We offer flexible hours, learning budget and stock options.",
+    "At least {years} years of professional experience required.",
+    "Fluent English is required; Spanish is a plus.",
+]
+TEAMS = ["platform", "payments", "growth", "data", "infrastructure", "automation", "core"]
+
+FORMATS = ["json", "ndjson", "parquet", "arrow", "excel_openpyxl", "excel_xlsxwriter"]
+STREAMING_OUTPUTS = {"ndjson", "excel_xlsxwriter"}
+
+
+def _zipf_cum_weights(n, exponent=1.1):
+    total, cumulative = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1.0 / (rank ** exponent)
+        cumulative.append(total)
+    return cumulative
+
+
+def build_companies(n, seed=11):
+    """
+    Nombres de empresas sintéticos y únicos ("Nexora Labs", "Tavik Cloud"...).
+    """
+    rng = random.Random(seed)
+    syllables = ["ne", "xo", "ra", "ta", "vik", "lu", "mi", "on", "qu", "an", "ze", "tri", "ka", "po", "sol"]
+    names = set()
+    while len(names) < n:
+        stem = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).title()
+        names.add(f"{stem} {rng.choice(COMPANY_SUFFIXES)}")
+    return sorted(names)
+
+
+def generate_listings(n, seed=42, n_companies=None, days=60):
+    """
+    Genera `n` ofertas con el esquema de fetch_job_listings: pocas empresas
+    con muchas ofertas (Zipf), títulos por seniority/rol, descripciones de
+    largo variable, rangos salariales con y sin separador de miles, y
+    espacios sobrantes ocasionales (para ejercitar el strip).
+    """
+    rng = random.Random(seed)
+    companies = build_companies(n_companies or min(50000, max(100, n // 20)))
+    company_weights = _zipf_cum_weights(len(companies))
+    seniority_weights = [weight for _, weight, _ in SENIORITY]
+    location_names, location_weights = zip(*LOCATIONS)
+    type_names, type_weights = zip(*JOB_TYPES)
+    today = datetime.now().date()
+
+    for i in range(n):
+        seniority, _, base_salary = rng.choices(SENIORITY, weights=seniority_weights)[0]
+        role = rng.choice(ROLES)
+        tech, tech2 = rng.sample(TECH, 2)
+        title = f"{seniority}{role}" + (f" ({tech})" if rng.random() < 0.4 else "")
+        company = rng.choices(companies, cum_weights=company_weights)[0]
+        if rng.random() < 0.05:
+            title, company = f"  {title} ", f"{company}  "
+
+        low = int(base_salary * rng.uniform(0.8, 1.2)) // 1000 * 1000
+        high = int(low * rng.uniform(1.1, 1.5)) // 5000 * 5000
+        fmt = "{:,}" if rng.random() < 0.5 else "{}"
+        salary_range = (f"${fmt.format(low)}" if rng.random() < 0.05
+                        else f"${fmt.format(low)} - ${fmt.format(high)}")
+
+        description = " ".join(
+            sentence.format(seniority=seniority.lower(), role=role, team=rng.choice(TEAMS),
+                            tech=tech, tech2=tech2, years=rng.randint(1, 10))
+            for sentence in rng.sample(SENTENCES, rng.randint(1, 6))
+        )
+        slug = company.strip().lower().replace(" ", "-").replace(".", "")
+        yield {
+            "id": f"job-{seed}-{i}",
+            "title": title,
+            "company": company,
+            "location": rng.choices(location_names, weights=location_weights)[0],
+            "type": rng.choices(type_names, weights=type_weights)[0],
+            "description": description,
+            "salary_range": salary_range,
+            "posted_date": (today - timedelta(days=rng.randint(0, days))).strftime("%Y-%m-%d"),
+            "url": f"https://jobs.example.com/{slug}/{i}"
+        }
+
+
+def _export(output_format, df, aggregates, workdir):
+    path = os.path.join(workdir, "out")
+    if output_format == "json":
+        return generate_json_output(df, path + ".json")
+    if output_format == "ndjson":
+        return generate_ndjson_output(df, path + ".ndjson")
+    if output_format == "parquet":
+        return generate_parquet_output(df, path + "_parquet")
+    if output_format == "arrow":
+        return generate_arrow_output(df, path + ".arrow")
+    engine = output_format.split("_", 1)[1]
+    return generate_excel_report(df, f"{path}_{engine}.xlsx", aggregates=aggregates, engine=engine)
+
+
+def run_in_memory(size, formats, workdir, seed=42):
+    """
+    Camino original: todas las ofertas en memoria y un DataFrame completo.
+    """
+    metrics = PipelineMetrics()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with metrics.stage("generate") as stage:
+            jobs = list(generate_listings(size, seed=seed))
+            stage.rows = len(jobs)
+        with metrics.stage("transform") as stage:
+            df = clean_and_transform_data(jobs)
+            aggregates = JobAggregates.from_frame(df)
+            stage.rows = len(df)
+        del jobs
+
+        for output_format in formats:
+            if output_format == "excel_openpyxl" and size >= EXCEL_MAX_ROWS:
+                continue  # no entra en una hoja: openpyxl no lo soporta
+            with metrics.stage(f"export_{output_format}") as stage:
+                stage.add_output(_export(output_format, df, aggregates, workdir))
+                stage.rows = len(df)
+    return metrics.to_dict()
+
+
+def run_streaming(size, formats, workdir, chunk_size=50000, seed=42):
+    """
+    Transform en chunks: NDJSON y Excel (xlsxwriter) se escriben chunk a
+    chunk; Parquet/Arrow se escriben desde los chunks concatenados.
+    """
+    metrics = PipelineMetrics()
+    streamed = [f for f in formats if f in STREAMING_OUTPUTS]
+    columnar = [f for f in formats if f in ("parquet", "arrow")]
+    options = {
+        "ndjson": {"filename": os.path.join(workdir, "stream.ndjson")},
+        "excel": {"filename": os.path.join(workdir, "stream_xlsxwriter.xlsx"), "engine": "xlsxwriter",
+                  "include_all_jobs": True},
+    }
+    # Con formatos columnares pedidos, transform_and_stream_outputs conserva los chunks
+    stream_formats = [{"excel_xlsxwriter": "excel"}.get(f, f) for f in streamed] + columnar
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        jobs = metrics.timed_iter(generate_listings(size, seed=seed), "generate")
+        with metrics.stage("transform_stream", exclude=("generate",)) as stage:
+            df, files, aggregates = transform_and_stream_outputs(jobs, chunk_size, stream_formats, options)
+            stage.rows = aggregates.total
+            for filename in files:
+                stage.add_output(filename)
+
+        for output_format in columnar:
+            with metrics.stage(f"export_{output_format}") as stage:
+                stage.add_output(_export(output_format, df, aggregates, workdir))
+                stage.rows = len(df)
+    return metrics.to_dict()
+
+
+MODES = {"in_memory": run_in_memory, "streaming": run_streaming}
+
+
+def run_isolated(mode, size, formats, workdir, chunk_size):
+    """
+    Corre un caso en un proceso nuevo (spawn) para medir RSS sin arrastre.
+    """
+    kwargs = {"chunk_size": chunk_size} if mode == "streaming" else {}
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(MODES[mode], size, formats, workdir, **kwargs).result()
+
+
+def compare_with_baseline(results, baseline, max_regression):
+    """
+    Imprime la relación tiempo_actual / tiempo_baseline por etapa y retorna
+    las etapas que empeoraron más que `max_regression`.
+    """
+    reference = {
+        (run["size"], run["mode"], stage["stage"]): stage["seconds"]
+        for run in baseline.get("runs", []) for stage in run["stages"]
+    }
+    regressions = []
+    print(f"\n📏 Comparación contra baseline ({baseline.get('timestamp', '?')})")
+    for run in results["runs"]:
+        for stage in run["stages"]:
+            key = (run["size"], run["mode"], stage["stage"])
+            if key not in reference or not reference[key]:
+                continue
+            ratio = stage["seconds"] / reference[key]
+            flag = "🔴" if ratio > max_regression else ("🟢" if ratio < 1 / max_regression else "  ")
+            print(f"  {flag} {run['size']:>10,} {run['mode']:<10} {stage['stage']:<24} "
+                  f"{reference[key]:9.3f}s → {stage['seconds']:9.3f}s  x{ratio:5.2f}")
+            if ratio > max_regression:
+                regressions.append({"size": key[0], "mode": key[1], "stage": key[2], "ratio": ratio})
+    return regressions
+
+
+def print_run(run):
+    print(f"\n📦 {run['size']:,} ofertas - {run['mode']}  (RSS máx {run['max_rss_mb']:.0f} MB)")
+    for stage in run["stages"]:
+        rate = f"{stage['rows_per_second']:12,.0f} filas/s" if stage["rows_per_second"] else " " * 19
+        written = f"  {stage['bytes_written'] / 1024 / 1024:9.2f} MB" if stage["bytes_written"] else ""
+        peak = f"  RSS pico {stage['peak_rss_mb']:8.1f} MB" if stage["peak_rss_mb"] else ""
+        print(f"  {stage['stage']:<24} {stage['seconds']:9.3f}s  {rate}{peak}{written}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del RPA Scraper")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                        help="Cantidad de ofertas, p.ej. 10000 100000 1000000 10000000")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--max-in-memory", type=int, default=2000000,
+                        help="Tamaño máximo para el modo in_memory (la lista de dicts no entra en RAM)")
+    parser.add_argument("--workdir", default=None, help="Directorio para los archivos exportados")
+    parser.add_argument("--output", default="scraper_benchmark.json")
+    parser.add_argument("--baseline", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="Relación máxima tiempo/baseline antes de marcar regresión")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📊 RPA Scraper Benchmark")
+    print("=" * 60)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "config": {"chunk_size": args.chunk_size, "formats": args.formats},
+        "runs": []
+    }
+
+    for size in args.sizes:
+        for mode in args.modes:
+            if mode == "in_memory" and size > args.max_in_memory:
+                print(f"\n⏭️ {size:,} ofertas - in_memory omitido (> --max-in-memory)")
+                continue
+            workdir = tempfile.mkdtemp(prefix="scraper_bench_", dir=args.workdir)
+            try:
+                run = run_isolated(mode, size, args.formats, workdir, args.chunk_size)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            run.update({"size": size, "mode": mode})
+            results["runs"].append(run)
+            print_run(run)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.max_regression)
+        results["regressions"] = regressions
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Resultados guardados en {args.output}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} etapas más lentas que x{args.max_regression} respecto del baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
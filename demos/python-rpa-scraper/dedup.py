@@ -0,0 +1,344 @@
+"""
+Deduplicación de ofertas y resolución de entidades
+==================================================
+Con varias fuentes y queries que se solapan, la misma oferta llega muchas
+veces. JobDeduplicator la detecta en streaming, sin comparar todos contra
+todos (O(n²)):
+
+1. Match exacto por `id` y por URL normalizada (dicts en memoria)
+2. Near-duplicates por título/empresa/descripción con MinHash LSH:
+   - Blocking key: empresa normalizada (sin "Inc.", "LLC"...); solo se
+     comparan ofertas del mismo bloque
+   - Firma MinHash de shingles de palabras (vectorizada con numpy por lote)
+   - Bandas LSH: dos ofertas son candidatas si coinciden en al menos una
+     banda; las de mayor similitud estimada por la firma se confirman con
+     Jaccard exacto sobre los shingles (>= threshold)
+
+La primera oferta vista de cada grupo es el registro canónico y es la única
+que sigue en el pipeline. Los duplicados quedan en un mapeo
+duplicado → canónico: en memoria (`duplicates`, exportable con
+write_mapping) o, con `mapping_file`, escrito al CSV a medida que se
+detectan (en `<mapping_file>.tmp`, renombrado en close(); abort() lo borra).
+
+Memoria: cada canónica ocupa ~1 KB (firma, shingles, buckets LSH y
+entradas de id/URL), o sea ~10 GB con 10M ofertas. Con `max_canonical` se
+conservan solo las últimas N canónicas (ventana FIFO): al desalojar una se
+borran su firma, sus buckets y sus ids/URLs, y una oferta repetida que
+llega después de salir de la ventana pasa como nueva. El mapeo en memoria
+crece con cada duplicado: para corridas largas usar `mapping_file`.
+"""
+
+import csv
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+MAX_HASH = (1 << 32) - 1
+# Primo de Mersenne de 31 bits: con a, x < p el producto a * x cabe en uint64
+MERSENNE_PRIME = (1 << 31) - 1
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "corp", "corporation", "co", "company",
+                    "gmbh", "sa", "srl", "sl", "plc", "limited"}
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+VERIFY_MARGIN = 0.05  # se verifican candidatos con similitud estimada >= threshold - margen
+MAX_VERIFY = 8        # candidatos verificados con Jaccard exacto por oferta
+MAX_WORDS = 128  # las descripciones largas solo aportan sus primeras palabras
+MAPPING_COLUMNS = ["duplicate_id", "canonical_id", "match", "similarity", "duplicate_url"]
+
+
+def normalize_url(url):
+    """
+    URL comparable: en minúsculas, sin fragmento ni "/" final.
+    """
+    if not url:
+        return None
+    return str(url).strip().split("#", 1)[0].rstrip("/").lower()
+
+
+def company_key(company):
+    """
+    Blocking key: empresa en minúsculas sin puntuación ni sufijos legales.
+    """
+    tokens = TOKEN_PATTERN.findall(str(company or "").lower())
+    while len(tokens) > 1 and tokens[-1] in COMPANY_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def shingles(job):
+    """
+    Shingles de la oferta: palabras del título y bigramas de título + descripción.
+    """
+    title = TOKEN_PATTERN.findall(str(job.get("title") or "").lower())
+    words = title + TOKEN_PATTERN.findall(str(job.get("description") or "").lower())[:MAX_WORDS]
+    result = set(map("t:".__add__, title))
+    result.update(map(" ".join, zip(words, words[1:])))
+    return result or {""}
+
+
+class JobDeduplicator:
+    """
+    Deduplicador en streaming: exacto por id/URL y aproximado con MinHash LSH.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=8, batch_size=5000, seed=1, max_canonical=None,
+                 mapping_file=None):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        if max_canonical is not None and max_canonical <= 0:
+            raise ValueError("max_canonical debe ser mayor que 0")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.batch_size = batch_size
+        self.max_canonical = max_canonical
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._band_weights = rng.randint(1, MAX_HASH, size=self.rows, dtype=np.uint64)
+
+        self._ids = {}        # id → slot de la canónica
+        self._urls = {}       # URL normalizada → slot de la canónica
+        self._buckets = {}    # hash(bloque, banda, valor) → slot canónico (o lista)
+        self._canonical_ids = []
+        self._shingle_hashes = []  # hashes ordenados de cada canónica (Jaccard exacto)
+        self._signatures = np.empty((min(1024, max_canonical or 1024), num_perm), dtype=np.uint32)
+        # Solo con max_canonical: lo necesario para desalojar cada slot
+        self._slot_keys = []     # claves LSH del slot
+        self._slot_aliases = []  # (dict, clave) de _ids/_urls que apuntan al slot
+        self._next_slot = 0
+
+        # Con mapping_file los duplicados van directo al CSV y no se guardan en memoria
+        self.mapping_file = mapping_file
+        self.duplicates = [] if mapping_file is None else None
+        self._mapping = None
+        self._mapping_writer = None
+        self.stats = Counter({"seen": 0, "unique": 0, "id": 0, "url": 0, "fuzzy": 0, "evicted": 0})
+        self.seconds = 0.0
+
+    def __len__(self):
+        return len(self._canonical_ids)
+
+    def hash_shingles(self, jobs):
+        """
+        Hashes ordenados de los shingles de cada oferta. hash() de str es
+        estable dentro del proceso, que es todo lo que se necesita (no se persisten).
+        """
+        return [np.sort(np.fromiter(map(hash, shingles(job)), dtype=np.int64)) for job in jobs]
+
+    def signatures(self, hashed):
+        """
+        Firmas MinHash (uint32, una fila por oferta) de un lote, vectorizadas:
+        h_i(x) = (a_i * x + b_i) mod p sobre los shingles únicos del lote y
+        mínimo por oferta con reduceat. x se reduce mod p antes de
+        multiplicar, así a_i * x < 2^62 y no hay overflow en uint64.
+        """
+        lengths = np.fromiter(map(len, hashed), dtype=np.int64, count=len(hashed))
+        unique, inverse = np.unique(np.concatenate(hashed).astype(np.uint64) & MAX_HASH, return_inverse=True)
+        unique %= MERSENNE_PRIME
+        values = ((self._a[:, None] * unique + self._b[:, None]) % MERSENNE_PRIME).astype(np.uint32)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        # reduceat 1-D por permutación: bastante más rápido que sobre el eje 0 de una matriz
+        signatures = np.empty((len(hashed), self.num_perm), dtype=np.uint32)
+        for row, permuted in enumerate(values):
+            signatures[:, row] = np.minimum.reduceat(permuted[inverse], offsets)
+        return signatures
+
+    def _band_hashes(self, signatures):
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (bands * self._band_weights).sum(axis=2)
+
+    def _candidates(self, keys):
+        candidates = set()
+        for key in keys:
+            entry = self._buckets.get(key)
+            if entry is None:
+                continue
+            if isinstance(entry, list):
+                candidates.update(entry)
+            else:
+                candidates.add(entry)
+        return list(candidates)
+
+    def _best_match(self, candidates, signature, hashed):
+        estimates = (self._signatures[candidates] == signature).mean(axis=1)
+        for position in np.argsort(-estimates)[:MAX_VERIFY]:
+            if estimates[position] < self.threshold - VERIFY_MARGIN:
+                break
+            other = self._shingle_hashes[candidates[position]]
+            common = len(np.intersect1d(hashed, other, assume_unique=True))
+            similarity = common / (len(hashed) + len(other) - common)
+            if similarity >= self.threshold:
+                return candidates[position], similarity
+        return None, 0.0
+
+    def _alias(self, mapping, key, index):
+        # Como setdefault, pero recordando la entrada para desalojarla con su slot
+        if key is None or key in mapping:
+            return
+        mapping[key] = index
+        if self.max_canonical is not None:
+            self._slot_aliases[index].append((mapping, key))
+
+    def _evict(self, index):
+        for key in self._slot_keys[index]:
+            entry = self._buckets.get(key)
+            if isinstance(entry, list):
+                entry.remove(index)
+                if len(entry) == 1:
+                    self._buckets[key] = entry[0]
+            elif entry == index:
+                del self._buckets[key]
+        for mapping, key in self._slot_aliases[index]:
+            if mapping.get(key) == index:
+                del mapping[key]
+        self.stats["evicted"] += 1
+
+    def _add_canonical(self, job_id, signature, hashed, keys):
+        if self.max_canonical is not None and len(self._canonical_ids) >= self.max_canonical:
+            # Ventana llena: se reutiliza el slot de la canónica más antigua
+            index = self._next_slot
+            self._next_slot = (index + 1) % self.max_canonical
+            self._evict(index)
+            self._shingle_hashes[index] = hashed
+            self._canonical_ids[index] = job_id
+            self._slot_keys[index] = keys
+            self._slot_aliases[index] = []
+        else:
+            index = len(self._canonical_ids)
+            if index == len(self._signatures):
+                self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+            self._shingle_hashes.append(hashed)
+            self._canonical_ids.append(job_id)
+            if self.max_canonical is not None:
+                self._slot_keys.append(keys)
+                self._slot_aliases.append([])
+        self._signatures[index] = signature
+        for key in keys:
+            entry = self._buckets.get(key)
+            if entry is None:
+                self._buckets[key] = index
+            elif isinstance(entry, list):
+                entry.append(index)
+            else:
+                self._buckets[key] = [entry, index]
+        return index
+
+    def _record_duplicate(self, job, canonical_id, match, similarity=1.0):
+        self.stats[match] += 1
+        row = (job.get("id"), canonical_id, match, round(similarity, 4), job.get("url"))
+        if self.duplicates is not None:
+            self.duplicates.append(row)
+            return
+        if self._mapping_writer is None:
+            # Se abre con el primer duplicado: sin duplicados no se crea el archivo
+            self._mapping = open(self.mapping_file + ".tmp", "w", newline="", encoding="utf-8")
+            self._mapping_writer = csv.writer(self._mapping)
+            self._mapping_writer.writerow(MAPPING_COLUMNS)
+        self._mapping_writer.writerow(row)
+
+    def _process_batch(self, batch):
+        hashed_batch = self.hash_shingles(batch)
+        signatures = self.signatures(hashed_batch)
+        band_hashes = self._band_hashes(signatures).tolist()
+
+        for job, hashed, signature, bands in zip(batch, hashed_batch, signatures, band_hashes):
+            self.stats["seen"] += 1
+            job_id, url = job.get("id"), normalize_url(job.get("url"))
+
+            if job_id is not None and job_id in self._ids:
+                self._record_duplicate(job, self._canonical_ids[self._ids[job_id]], "id")
+                continue
+            if url is not None and url in self._urls:
+                index = self._urls[url]
+                self._alias(self._ids, job_id, index)
+                self._record_duplicate(job, self._canonical_ids[index], "url")
+                continue
+
+            block = company_key(job.get("company"))
+            keys = [hash((block, band, value)) for band, value in enumerate(bands)]
+            candidates = self._candidates(keys)
+            best, similarity = self._best_match(candidates, signature, hashed) if candidates else (None, 0.0)
+
+            if best is not None:
+                self._alias(self._ids, job_id, best)
+                self._alias(self._urls, url, best)
+                self._record_duplicate(job, self._canonical_ids[best], "fuzzy", similarity)
+                continue
+
+            index = self._add_canonical(job_id, signature, hashed, keys)
+            self._alias(self._ids, job_id, index)
+            self._alias(self._urls, url, index)
+            self.stats["unique"] += 1
+            yield job
+
+    def iter_unique(self, jobs):
+        """
+        Genera solo las ofertas canónicas, procesando en lotes de batch_size.
+        """
+        batch = []
+        for job in jobs:
+            batch.append(job)
+            if len(batch) >= self.batch_size:
+                yield from self._timed(self._process_batch(batch))
+                batch = []
+        if batch:
+            yield from self._timed(self._process_batch(batch))
+
+    def _timed(self, iterator):
+        # Solo cuenta el tiempo de dedup, no el de quien consume o produce las ofertas
+        while True:
+            start = time.perf_counter()
+            try:
+                job = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            yield job
+
+    def mapping_frame(self):
+        """
+        Mapeo de duplicados como DataFrame (duplicate_id, canonical_id, match, ...).
+        Con mapping_file se lee del CSV (hay que llamar antes a close()).
+        """
+        if self.duplicates is not None:
+            return pd.DataFrame(self.duplicates, columns=MAPPING_COLUMNS)
+        if self._mapping is not None:
+            raise RuntimeError("El mapeo sigue abierto: llamar a close() antes de leerlo")
+        if not os.path.exists(self.mapping_file):
+            return pd.DataFrame(columns=MAPPING_COLUMNS)
+        return pd.read_csv(self.mapping_file, dtype={"duplicate_id": str, "canonical_id": str})
+
+    def write_mapping(self, filename='job_duplicates.csv'):
+        self.mapping_frame().to_csv(filename, index=False)
+        return filename
+
+    def close(self):
+        """
+        Cierra el CSV de duplicados (si se escribió) y lo deja en mapping_file.
+        """
+        if self._mapping is None:
+            return
+        self._mapping.close()
+        self._mapping = self._mapping_writer = None
+        os.replace(self.mapping_file + ".tmp", self.mapping_file)
+
+    def abort(self):
+        """
+        Descarta un CSV de duplicados incompleto.
+        """
+        if self._mapping is None:
+            return
+        self._mapping.close()
+        self._mapping = self._mapping_writer = None
+        os.remove(self.mapping_file + ".tmp")
+
+    def summary(self):
+        return {**self.stats, "canonical": len(self), "seconds": round(self.seconds, 6)}
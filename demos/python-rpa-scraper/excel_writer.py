@@ -0,0 +1,142 @@
+"""
+Reporte Excel write-only en memoria constante
+=============================================
+Alternativa a pd.ExcelWriter(engine='openpyxl') para DataFrames grandes:
+usa xlsxwriter con `constant_memory`, que vuelca cada fila a disco apenas
+se escribe en lugar de armar el workbook entero en memoria.
+
+- Las filas se escriben en orden, chunk a chunk (sirve para el modo streaming)
+- La hoja "All Jobs" respeta el límite de Excel (1.048.576 filas): al
+  llenarse se continúa en "All Jobs (2)", "All Jobs (3)"... o se trunca
+- Las hojas Summary y Top Companies salen de JobAggregates (calculadas en
+  una pasada durante el transform), sin re-escanear el DataFrame final
+- El workbook se arma en `<filename>.tmp` y se renombra recién en close():
+  si la exportación falla (abort(), o una excepción en el bloque `with`)
+  no se escriben las hojas de resumen ni queda un .xlsx a medias
+"""
+
+import os
+
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1048576  # incluye la fila de encabezado
+ALL_JOBS_SHEET = 'All Jobs'
+
+
+def _import_xlsxwriter():
+    try:
+        import xlsxwriter
+    except ImportError as e:
+        raise ImportError("Para el modo Excel de memoria constante instala xlsxwriter: "
+                          "pip install xlsxwriter") from e
+    return xlsxwriter
+
+
+class ExcelReportWriter:
+    """
+    Writer del reporte de ofertas (All Jobs + Summary + Top Companies).
+    """
+
+    def __init__(self, filename='job_listings_report.xlsx', include_all_jobs=True,
+                 overflow='split', max_rows=EXCEL_MAX_ROWS, aggregates=None):
+        if overflow not in ('split', 'truncate'):
+            raise ValueError("overflow debe ser 'split' o 'truncate'")
+        xlsxwriter = _import_xlsxwriter()
+
+        self.filename = filename
+        self.include_all_jobs = include_all_jobs
+        self.overflow = overflow
+        self.max_rows = max_rows
+        self.aggregates = aggregates
+        self._tmp_path = filename + ".tmp"
+
+        self.workbook = xlsxwriter.Workbook(self._tmp_path, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd',
+            'nan_inf_to_errors': True,
+            # Texto tal cual: sin hipervínculos (límite de 65.530 por hoja) ni fórmulas
+            'strings_to_urls': False,
+            'strings_to_formulas': False,
+        })
+        self.header_format = self.workbook.add_format({'bold': True, 'border': 1})
+        self.rows = 0            # filas de datos escritas en All Jobs
+        self.truncated_rows = 0  # filas descartadas con overflow='truncate'
+        self.sheets = []
+        self._sheet = None
+        self._sheet_row = 0
+        self._columns = None
+
+    def _new_jobs_sheet(self):
+        name = ALL_JOBS_SHEET if not self.sheets else f"{ALL_JOBS_SHEET} ({len(self.sheets) + 1})"
+        self._sheet = self.workbook.add_worksheet(name)
+        self._sheet.write_row(0, 0, self._columns, self.header_format)
+        self._sheet_row = 1
+        self.sheets.append(name)
+
+    def write_frame(self, df):
+        """
+        Agrega las filas de `df` a la hoja All Jobs (en orden).
+        """
+        if not self.include_all_jobs or df.empty:
+            return
+        if self._columns is None:
+            self._columns = [str(column) for column in df.columns]
+            self._new_jobs_sheet()
+
+        # Tipos de Excel: NA → celda vacía, categóricas/strings → str
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if self._sheet_row >= self.max_rows:
+                if self.overflow == 'truncate':
+                    self.truncated_rows += 1
+                    continue
+                self._new_jobs_sheet()
+            self._sheet.write_row(self._sheet_row, 0, row)
+            self._sheet_row += 1
+            self.rows += 1
+
+    def _write_table(self, name, frame):
+        sheet = self.workbook.add_worksheet(name)
+        header = [frame.index.name or ''] + [str(column) for column in frame.columns]
+        sheet.write_row(0, 0, header, self.header_format)
+        for row_index, (label, *values) in enumerate(frame.itertuples(name=None), start=1):
+            sheet.write_row(row_index, 0, [label] + [None if pd.isna(v) else v for v in values])
+
+    def close(self):
+        """
+        Escribe las hojas de resumen, cierra el workbook y lo deja en `filename`.
+        """
+        if self.workbook is None:
+            return
+        if self.include_all_jobs and self._sheet is None:
+            self.workbook.add_worksheet(ALL_JOBS_SHEET)
+
+        if self.aggregates is not None:
+            self._write_table('Summary', self.aggregates.summary())
+            self._write_table('Top Companies', self.aggregates.top_companies(10).to_frame())
+        self.workbook.close()
+        self.workbook = None
+        os.replace(self._tmp_path, self.filename)
+
+    def abort(self):
+        """
+        Descarta un reporte incompleto: sin hojas de resumen y sin archivo.
+        """
+        if self.workbook is None:
+            return
+        # xlsxwriter solo borra sus archivos temporales de filas al cerrar
+        try:
+            self.workbook.close()
+        finally:
+            self.workbook = None
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,238 @@
+"""
+Motor de extracción concurrente para el RPA Scraper
+====================================================
+Descarga muchas páginas y queries en paralelo contra una API de ofertas
+paginada, cuidando a la fuente:
+
+- Sesión HTTP compartida con pool de conexiones keep-alive (requests + HTTPAdapter)
+- Límite de concurrencia configurable (ThreadPoolExecutor)
+- Rate limit por host (token bucket)
+- Reintentos con backoff exponencial + jitter (respeta Retry-After en 429/503)
+- Requests condicionales (If-None-Match / If-Modified-Since) por página
+
+Contrato de la API paginada (ver stub_server.py para una implementación local):
+
+    GET {base_url}/jobs?q=python&location=remote&page=1&per_page=50
+    → {"jobs": [...], "page": 1, "per_page": 50, "total_pages": 12, "total": 580}
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Token bucket por host: `rate` peticiones por segundo con ráfagas de `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        """
+        Bloquea hasta que haya un token disponible para `host`.
+        """
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.capacity, now))
+                tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchError(Exception):
+    """
+    Error definitivo tras agotar los reintentos.
+    """
+
+
+class FetchEngine:
+    """
+    Cliente HTTP concurrente con pool keep-alive, rate limit y reintentos.
+    """
+
+    def __init__(self, max_concurrency=8, rate_limit_per_host=10.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=10.0, timeout=10.0, validators=None):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_limit_per_host)
+
+        # Una sola sesión: las conexiones keep-alive se reutilizan entre threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency,
+                              max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Validadores HTTP por URL de página (ver JobStore.load_validators)
+        self.validators = validators if validators is not None else {}
+
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "not_modified": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, url, params=None, headers=None):
+        """
+        GET con rate limit y reintentos. Retorna el Response (2xx o 304).
+        """
+        host = urlsplit(url).netloc
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(host)
+            self._count("requests")
+            response = None
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+                last_error = FetchError(f"HTTP {response.status_code} en {response.url}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+
+            if attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._backoff(attempt, response))
+
+        self._count("failures")
+        raise FetchError(f"Falló tras {self.max_retries + 1} intentos: {url} ({last_error})")
+
+    def get_json(self, url, params=None):
+        """
+        GET con rate limit y reintentos. Retorna el JSON decodificado.
+        """
+        return self.request(url, params=params).json()
+
+    def fetch_page(self, base_url, query, location, page, per_page):
+        """
+        Pide una página con request condicional si hay validadores guardados
+        (ETag / Last-Modified). Una página 304 se devuelve sin ofertas.
+        Los validadores nuevos vienen en data["validator"] y no se guardan
+        hasta llamar a record_validator(data), una vez consumidas todas las
+        ofertas de la página: si no, una corrida cortada (limit) marcaría
+        como vistas páginas cuyas ofertas nunca se procesaron.
+        """
+        url = f"{base_url.rstrip('/')}/jobs"
+        params = {"q": query, "location": location, "page": page, "per_page": per_page}
+        key = requests.Request("GET", url, params=params).prepare().url
+
+        cached = self.validators.get(key)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.request(url, params=params, headers=headers)
+        if response.status_code == 304:
+            self._count("not_modified")
+            return {"jobs": [], "page": page, "total_pages": cached.get("total_pages") or 1,
+                    "not_modified": True}
+
+        data = response.json()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            data["validator"] = (key, {"etag": etag, "last_modified": last_modified,
+                                       "total_pages": data.get("total_pages")})
+        return data
+
+    def record_validator(self, data):
+        """
+        Guarda los validadores de una página ya consumida por completo.
+        """
+        validator = data.get("validator")
+        if validator:
+            key, value = validator
+            self.validators[key] = value
+
+    def iter_listings(self, base_url, queries, location="remote", per_page=50, max_pages=None,
+                      max_pending=None):
+        """
+        Genera las ofertas de todas las queries y páginas a medida que llegan.
+        Primero pide la página 1 de cada query (para conocer total_pages) y
+        luego reparte el resto de páginas entre los workers. Los validadores
+        de cada página se guardan recién después de entregar su última oferta.
+
+        A lo sumo `max_pending` páginas (por defecto 2 × max_concurrency) están
+        en vuelo o descargadas sin entregar: la siguiente se pide recién cuando
+        el consumidor toma una, así un consumidor lento (transform en
+        streaming) no acumula el corpus entero en memoria.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        max_pending = max_pending or 2 * self.max_concurrency
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        tasks = deque((query, 1) for query in queries)
+        in_flight = {}
+
+        def submit_next():
+            while tasks and len(in_flight) < max_pending:
+                query, page = tasks.popleft()
+                future = executor.submit(self.fetch_page, base_url, query, location, page, per_page)
+                in_flight[future] = (query, page)
+
+        try:
+            submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query, page = in_flight.pop(future)
+                    data = future.result()
+                    if page == 1:
+                        total_pages = data.get("total_pages", 1)
+                        if max_pages:
+                            total_pages = min(total_pages, max_pages)
+                        tasks.extend((query, next_page) for next_page in range(2, total_pages + 1))
+                    # Se repone la ventana antes de entregar: los workers siguen
+                    # descargando mientras el consumidor procesa esta página
+                    submit_next()
+                    yield from data.get("jobs", [])
+                    self.record_validator(data)
+        finally:
+            # Si el consumidor corta antes (limit), no esperar las páginas pendientes
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
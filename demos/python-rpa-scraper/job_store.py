@@ -0,0 +1,167 @@
+"""
+Store persistente de ofertas vistas para scraping incremental
+=============================================================
+Base SQLite local, keyed por `id` de oferta, que guarda un hash del
+contenido de cada oferta. En cada corrida:
+
+- Las ofertas nuevas o con hash distinto pasan al pipeline (el "delta")
+  con una columna `change_type` = "new" | "changed".
+- Las ofertas sin cambios se descartan antes del transform y los reportes.
+- Los validadores HTTP (ETag / Last-Modified) de cada página se persisten
+  para que FetchEngine haga requests condicionales: una página que responde
+  304 Not Modified no se descarga ni se procesa.
+
+Todo lo que escribe una corrida queda en una transacción: si el pipeline
+falla antes de commit(), la próxima corrida vuelve a ver esas ofertas.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+from transform import iter_chunks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_changed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS http_validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    total_pages INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    new INTEGER DEFAULT 0,
+    changed INTEGER DEFAULT 0,
+    unchanged INTEGER DEFAULT 0,
+    not_modified_pages INTEGER DEFAULT 0
+);
+"""
+
+# Límite conservador de parámetros por query en SQLite
+MAX_SQL_PARAMS = 500
+
+
+def content_hash(job):
+    """
+    Hash estable del contenido de una oferta (independiente del orden de claves).
+    """
+    payload = json.dumps(job, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class JobStore:
+    """
+    Ofertas vistas + validadores HTTP sobre una base SQLite.
+    """
+
+    def __init__(self, path='scraper_state.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        self.run_started = datetime.now().isoformat(timespec='seconds')
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    def _known_hashes(self, ids):
+        known = {}
+        for batch in iter_chunks(ids, MAX_SQL_PARAMS):
+            placeholders = ",".join("?" * len(batch))
+            known.update(self.conn.execute(
+                f"SELECT id, content_hash FROM jobs WHERE id IN ({placeholders})", batch
+            ).fetchall())
+        return known
+
+    def filter_changed(self, jobs, batch_size=1000):
+        """
+        Consume `jobs` (lista o generador) y genera solo las ofertas nuevas o
+        modificadas, marcadas con `change_type`. Los cambios en el store
+        quedan pendientes hasta commit().
+        """
+        now = self.run_started
+        for batch in iter_chunks(jobs, batch_size):
+            hashes = [content_hash(job) for job in batch]
+            known = self._known_hashes([job['id'] for job in batch])
+
+            upserts, touched = [], []
+            for job, digest in zip(batch, hashes):
+                previous = known.get(job['id'])
+                if previous == digest:
+                    touched.append((now, job['id']))
+                    self.counts["unchanged"] += 1
+                    continue
+
+                change_type = "new" if previous is None else "changed"
+                self.counts[change_type] += 1
+                known[job['id']] = digest  # ids repetidos dentro de la misma corrida
+                upserts.append((job['id'], digest, now, now, now))
+                yield dict(job, change_type=change_type)
+
+            self.conn.executemany(
+                "INSERT INTO jobs (id, content_hash, first_seen, last_seen, last_changed) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "content_hash = excluded.content_hash, last_seen = excluded.last_seen, "
+                "last_changed = excluded.last_changed",
+                upserts
+            )
+            self.conn.executemany("UPDATE jobs SET last_seen = ? WHERE id = ?", touched)
+
+    def load_validators(self):
+        """
+        {url: {"etag", "last_modified", "total_pages"}} para FetchEngine.
+        """
+        return {
+            url: {"etag": etag, "last_modified": last_modified, "total_pages": total_pages}
+            for url, etag, last_modified, total_pages in self.conn.execute(
+                "SELECT url, etag, last_modified, total_pages FROM http_validators"
+            )
+        }
+
+    def save_validators(self, validators):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO http_validators (url, etag, last_modified, total_pages) "
+            "VALUES (?, ?, ?, ?)",
+            [(url, v.get("etag"), v.get("last_modified"), v.get("total_pages"))
+             for url, v in validators.items()]
+        )
+
+    def commit(self, not_modified_pages=0):
+        """
+        Confirma la corrida: hashes, validadores y una fila en `runs`.
+        """
+        self.conn.execute(
+            "INSERT INTO runs (started_at, finished_at, new, changed, unchanged, not_modified_pages) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_started, datetime.now().isoformat(timespec='seconds'),
+             self.counts["new"], self.counts["changed"], self.counts["unchanged"], not_modified_pages)
+        )
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rollback()
+        self.close()
@@ -0,0 +1,227 @@
+"""
+Métricas por etapa del pipeline del RPA Scraper
+===============================================
+Instrumentación liviana para saber si el cuello de botella es el fetch, el
+transform o la exportación, y para comparar corridas entre sí:
+
+- Wall time y filas por segundo de cada etapa
+- Pico de RSS durante la etapa (muestreado en un thread de background)
+- Bytes escritos por las salidas de la etapa (archivos o directorios)
+- Opcional: perfil cProfile por etapa (<dir>/<etapa>.prof, ver con snakeviz
+  o pstats) y top de asignaciones con tracemalloc (<dir>/<etapa>.tracemalloc.txt)
+
+Todo se vuelca a un JSON (por defecto scraper_metrics.json).
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def current_rss_bytes():
+    """
+    RSS actual del proceso (Linux: /proc; otros: máximo histórico).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return max_rss_bytes()
+
+
+def max_rss_bytes():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def path_size(path):
+    """
+    Tamaño en bytes de un archivo o de todos los archivos de un directorio.
+    """
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class RSSSampler:
+    """
+    Muestrea el RSS cada `interval` segundos y guarda el máximo observado.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+class StageMetrics:
+    """
+    Métricas de una etapa. El código instrumentado completa `rows` y las
+    salidas (add_output); el resto lo mide PipelineMetrics.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = 0
+        self.outputs = []
+        self.bytes_written = 0
+        self.rss_start_bytes = None
+        self.peak_rss_bytes = None
+        self.python_peak_bytes = None
+        self.profile_files = []
+
+    def add_output(self, path):
+        self.outputs.append(path)
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "seconds": round(self.seconds, 6),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else None,
+            "bytes_written": self.bytes_written,
+            "outputs": self.outputs,
+            "rss_start_mb": _mb(self.rss_start_bytes),
+            "peak_rss_mb": _mb(self.peak_rss_bytes),
+            "python_peak_mb": _mb(self.python_peak_bytes),
+            "profile_files": self.profile_files,
+        }
+
+
+def _mb(value):
+    return round(value / 1024 / 1024, 2) if value is not None else None
+
+
+class PipelineMetrics:
+    """
+    Colector de métricas del pipeline, con profiling opcional por etapa.
+    """
+
+    def __init__(self, cprofile=False, trace_memory=False, profile_dir='profiles', top_allocations=25):
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.top_allocations = top_allocations
+        self.stages = []
+        self.info = {}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+
+        if cprofile or trace_memory:
+            os.makedirs(profile_dir, exist_ok=True)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _seconds_of(self, names):
+        return sum(stage.seconds for stage in self.stages if stage.name in names)
+
+    @contextmanager
+    def stage(self, name, exclude=()):
+        """
+        Mide el bloque `with` como una etapa. El tiempo que acumulen durante
+        el bloque las etapas `exclude` (p.ej. el "extract" de timed_iter,
+        intercalado con el transform en streaming) se descuenta.
+        """
+        stage = StageMetrics(name)
+        excluded_start = self._seconds_of(exclude)
+        sampler = RSSSampler().start()
+        stage.rss_start_bytes = sampler.peak
+
+        profiler = cProfile.Profile() if self.cprofile else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if profiler is not None:
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start - (self._seconds_of(exclude) - excluded_start)
+            if profiler is not None:
+                profiler.disable()
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                stage.profile_files.append(path)
+            if self.trace_memory:
+                self._dump_allocations(stage)
+
+            stage.peak_rss_bytes = sampler.stop()
+            stage.bytes_written = sum(path_size(path) for path in stage.outputs)
+            self.stages.append(stage)
+
+    def _dump_allocations(self, stage):
+        stage.python_peak_bytes = tracemalloc.get_traced_memory()[1]
+        path = os.path.join(self.profile_dir, f"{stage.name}.tracemalloc.txt")
+        top = tracemalloc.take_snapshot().statistics('lineno')[:self.top_allocations]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {stage.name}: pico {stage.python_peak_bytes / 1024 / 1024:.1f} MB (Python)\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+        stage.profile_files.append(path)
+
+    def timed_iter(self, iterable, name):
+        """
+        Envuelve un iterable y acumula como etapa `name` solo el tiempo
+        pasado dentro de next(): sirve para medir el fetch cuando corre
+        intercalado con el transform (modo streaming).
+        """
+        stage = StageMetrics(name)
+        self.stages.append(stage)
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage.seconds += time.perf_counter() - start
+                return
+            stage.seconds += time.perf_counter() - start
+            stage.rows += 1
+            yield item
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "max_rss_mb": _mb(max_rss_bytes()),
+            "bytes_written": sum(stage.bytes_written for stage in self.stages),
+            "info": self.info,
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    def write(self, filename='scraper_metrics.json'):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+        return filename
+
+    def print_summary(self):
+        for stage in self.stages:
+            rate = f"{stage.rows / stage.seconds:12,.0f} filas/s" if stage.seconds and stage.rows else " " * 19
+            peak = f"RSS pico {_mb(stage.peak_rss_bytes):8.1f} MB" if stage.peak_rss_bytes else ""
+            written = f"  {stage.bytes_written / 1024 / 1024:8.2f} MB escritos" if stage.bytes_written else ""
+            print(f"  {stage.name:<20} {stage.seconds:8.3f}s  {rate}  {peak}{written}")
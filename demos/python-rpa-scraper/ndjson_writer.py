@@ -0,0 +1,128 @@
+"""
+Exportación en streaming a JSON Lines (NDJSON)
+==============================================
+Escribe una oferta por línea directamente a disco, serializando por lotes
+de `batch_size` filas (DataFrame.to_json, en C). Nunca arma la lista
+completa de dicts ni el documento JSON entero, así que la memoria se
+mantiene plana sin importar la cantidad de filas.
+
+- Compresión opcional gzip o zstd (inferida de la extensión .gz / .zst)
+- Última línea: registro de resumen {"_summary": {...}} con el total de
+  filas y los campos extra que se pasen a close()
+- Se escribe en `<filename>.tmp` y se renombra recién en close(): si la
+  exportación falla (abort(), o una excepción en el bloque `with`) el
+  archivo parcial se borra y nunca queda un export truncado con resumen
+
+Lectura:
+    pd.read_json("job_listings.ndjson.gz", lines=True)   # incluye la línea _summary
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def open_compressed(filename, compression=None, level=None):
+    """
+    Abre `filename` para escritura binaria con compresión None, "gzip" o "zstd".
+    """
+    if compression is None:
+        return open(filename, 'wb')
+    if compression == "gzip":
+        return gzip.open(filename, 'wb', compresslevel=level or 6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Para comprimir con zstd instala zstandard: pip install zstandard") from e
+        return zstandard.ZstdCompressor(level=level or 3).stream_writer(open(filename, 'wb'))
+    raise ValueError(f"Compresión no soportada: {compression}")
+
+
+def _dates_to_strings(df):
+    # Fechas sin hora → "YYYY-MM-DD" (mismo formato que el JSON clásico)
+    columns = {}
+    for column, dtype in df.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            values = df[column]
+            if (values.dropna() == values.dropna().dt.normalize()).all():
+                columns[column] = values.dt.strftime("%Y-%m-%d")
+    return df.assign(**columns) if columns else df
+
+
+class NDJSONWriter:
+    """
+    Writer NDJSON por lotes con compresión opcional y registro de resumen final.
+    """
+
+    def __init__(self, filename, compression="infer", level=None, batch_size=10000):
+        if compression == "infer":
+            compression = next((name for suffix, name in COMPRESSION_SUFFIXES.items()
+                                if filename.endswith(suffix)), None)
+        self.filename = filename
+        self.compression = compression
+        self.batch_size = batch_size
+        self.rows = 0
+        self._tmp_path = filename + ".tmp"
+        self._file = open_compressed(self._tmp_path, compression, level)
+
+    def write_frame(self, df):
+        """
+        Escribe un DataFrame (o chunk) en lotes de batch_size filas.
+        """
+        for start in range(0, len(df), self.batch_size):
+            batch = _dates_to_strings(df.iloc[start:start + self.batch_size])
+            text = batch.to_json(orient='records', lines=True, force_ascii=False, date_format='iso')
+            # to_json escapa "/" como "\/": válido, pero se deja como en json.dumps
+            text = text.replace("\\/", "/")
+            if not text.endswith("\n"):
+                text += "\n"
+            self._file.write(text.encode('utf-8'))
+            self.rows += len(batch)
+
+    def write_records(self, records):
+        """
+        Escribe dicts sueltos (para fuentes que no son DataFrames).
+        """
+        encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+        for record in records:
+            self._file.write((encode(record) + "\n").encode('utf-8'))
+            self.rows += 1
+
+    def close(self, **summary):
+        """
+        Agrega la línea de resumen, cierra el archivo y lo deja en `filename`.
+        """
+        if self._file is None:
+            return
+        record = {"timestamp": datetime.now().isoformat(), "total_jobs": self.rows}
+        record.update(summary)
+        self._file.write((json.dumps({"_summary": record}, ensure_ascii=False, default=str) + "\n").encode('utf-8'))
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.filename)
+
+    def abort(self):
+        """
+        Descarta una exportación incompleta: sin resumen y sin archivo.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -11,17 +11,38 @@ Skills demostradas:
 - Manejo de errores y logging
 """
 
+import argparse
+import os
+import shutil
+import sys
 import requests
+from contextlib import ExitStack
 import pandas as pd
 from datetime import datetime
 import json
 
+from dedup import JobDeduplicator
+from excel_writer import EXCEL_MAX_ROWS, ExcelReportWriter
+from fetcher import FetchEngine
+from job_store import JobStore
+from metrics import PipelineMetrics
+from ndjson_writer import NDJSONWriter
+from transform import JobAggregates, concat_frames, empty_frame, stream_clean_and_transform, transform_chunk
 
-def fetch_job_listings(query="python", location="remote", limit=50):
+
+def fetch_job_listings(query="python", location="remote", limit=50, base_url=None,
+                       queries=None, engine=None, per_page=50):
     """
     Extrae ofertas de trabajo desde una API pública.
     Usando GitHub Jobs API (alternativa: Adzuna, The Muse)
+
+    Con `base_url` se usa FetchEngine (fetcher.py): todas las páginas de
+    todas las `queries` en paralelo, con rate limit por host y reintentos.
+    `limit=None` trae todo lo disponible.
     """
+    if base_url:
+        return list(iter_job_listings(queries or [query], location, limit, base_url, engine, per_page))
+
     print(f"🔍 Buscando ofertas de trabajo: {query} en {location}...")
 
     # Simular API call (GitHub Jobs API está deprecada, usar datos mock)
@@ -46,21 +67,38 @@ def fetch_job_listings(query="python", location="remote", limit=50):
     return mock_jobs
 
 
+def iter_job_listings(queries, location="remote", limit=None, base_url=None, engine=None, per_page=50):
+    """
+    Versión generadora de fetch_job_listings contra una API paginada:
+    entrega las ofertas a medida que llegan las páginas.
+    """
+    print(f"🔍 Buscando ofertas de trabajo: {', '.join(queries)} en {location} ({base_url})...")
+
+    own_engine = engine is None
+    engine = engine or FetchEngine()
+    count = 0
+    try:
+        for job in engine.iter_listings(base_url, queries, location, per_page=per_page):
+            yield job
+            count += 1
+            if limit is not None and count >= limit:
+                break
+    finally:
+        if own_engine:
+            engine.close()
+
+    print(f"✅ Encontradas {count} ofertas ({engine.stats['requests']} requests, "
+          f"{engine.stats['retries']} reintentos)")
+
+
 def clean_and_transform_data(jobs):
     """
     Limpia y transforma los datos extraídos usando Pandas.
     """
     print("🧹 Limpiando y transformando datos...")
 
-    df = pd.DataFrame(jobs)
-
-    # Limpiar columnas
-    df['title'] = df['title'].str.strip()
-    df['company'] = df['company'].str.strip()
-
-    # Agregar columnas calculadas
-    df['days_ago'] = 0  # Simular días desde publicación
-    df['salary_min'] = df['salary_range'].str.extract(r'\$(\d+)').astype(int)
+    # Limpiar columnas y agregar columnas calculadas
+    df = transform_chunk(pd.DataFrame(jobs)) if len(jobs) else empty_frame()
 
     # Ordenar por salario
     df = df.sort_values('salary_min', ascending=False)
@@ -69,31 +107,136 @@ def clean_and_transform_data(jobs):
     return df
 
 
-def generate_excel_report(df, filename='job_listings_report.xlsx'):
+def stream_transform_data(jobs, chunk_size=10000):
+    """
+    Igual que clean_and_transform_data pero en chunks de `chunk_size` filas
+    con external merge sort: genera DataFrames ya ordenados por salario.
+    """
+    print(f"🧹 Limpiando y transformando datos en streaming (chunks de {chunk_size:,})...")
+    total = 0
+    for chunk in stream_clean_and_transform(jobs, chunk_size=chunk_size):
+        total += len(chunk)
+        yield chunk
+    print(f"✅ Datos procesados: {total} registros")
+
+
+def generate_excel_report(df, filename='job_listings_report.xlsx', include_all_jobs=True,
+                          aggregates=None, engine='openpyxl', overflow='split'):
     """
     Genera un reporte Excel profesional con múltiples hojas.
+    Con include_all_jobs=False solo se escriben las hojas de resumen (para
+    consumo humano); los datos completos van a Parquet/Arrow.
+
+    engine='xlsxwriter' usa el writer de memoria constante (excel_writer.py),
+    que además parte la hoja All Jobs al llegar al límite de filas de Excel.
+    Si se pasan `aggregates` (JobAggregates del transform), Summary y Top
+    Companies no re-escanean el DataFrame.
     """
     print(f"📊 Generando reporte Excel: {filename}...")
 
+    if aggregates is None:
+        aggregates = JobAggregates.from_frame(df)
+
+    if engine == 'xlsxwriter':
+        with ExcelReportWriter(filename, include_all_jobs=include_all_jobs, overflow=overflow,
+                               aggregates=aggregates) as writer:
+            writer.write_frame(df)
+        print(f"✅ Reporte generado: {filename}")
+        return filename
+
     with pd.ExcelWriter(filename, engine='openpyxl') as writer:
         # Hoja 1: Todos los trabajos
-        df.to_excel(writer, sheet_name='All Jobs', index=False)
+        if include_all_jobs:
+            if len(df) >= EXCEL_MAX_ROWS:
+                raise ValueError(f"{len(df):,} filas no entran en una hoja de Excel: "
+                                 "usar engine='xlsxwriter' (divide la hoja) o include_all_jobs=False")
+            df.to_excel(writer, sheet_name='All Jobs', index=False)
 
         # Hoja 2: Resumen por tipo de trabajo
-        summary = df.groupby('type').agg({
-            'id': 'count',
-            'salary_min': 'mean'
-        }).rename(columns={'id': 'count', 'salary_min': 'avg_salary'})
-        summary.to_excel(writer, sheet_name='Summary')
+        aggregates.summary().to_excel(writer, sheet_name='Summary')
 
         # Hoja 3: Top 10 empresas
-        top_companies = df['company'].value_counts().head(10)
-        top_companies.to_excel(writer, sheet_name='Top Companies')
+        aggregates.top_companies(10).to_excel(writer, sheet_name='Top Companies')
 
     print(f"✅ Reporte generado: {filename}")
     return filename
 
 
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Para exportar a Parquet/Arrow instala pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def to_arrow_table(df):
+    """
+    DataFrame tipado → pyarrow.Table: categóricas como dictionary,
+    posted_date como date32 (particiones "posted_date=YYYY-MM-DD").
+    """
+    pa, _ = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if 'posted_date' in table.column_names:
+        index = table.column_names.index('posted_date')
+        table = table.set_column(index, 'posted_date', table.column(index).cast(pa.date32()))
+    return table
+
+
+def generate_parquet_output(df, path='job_listings_parquet', partition_cols=('posted_date', 'type'),
+                            compression='zstd', append=False):
+    """
+    Exporta a un dataset Parquet particionado (formato por defecto para
+    consumidores automáticos: Spark, DuckDB, Pandas, Polars...).
+    Con append=True (scraping incremental) se agregan archivos nuevos a las
+    particiones existentes en lugar de reemplazar el dataset.
+    """
+    print(f"🗂️ Exportando a Parquet: {path}/ (particiones: {', '.join(partition_cols)})...")
+    _, pq = _import_pyarrow()
+
+    if not append and os.path.isdir(path):
+        shutil.rmtree(path)
+
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    pq.write_to_dataset(
+        to_arrow_table(df), path,
+        partition_cols=list(partition_cols),
+        compression=compression,
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+    print(f"✅ Parquet exportado: {path}/")
+    return path
+
+
+def generate_arrow_output(df, filename='job_listings.arrow', compression='zstd'):
+    """
+    Exporta a un archivo Arrow IPC (Feather v2): lectura zero-copy vía mmap.
+    """
+    print(f"🏹 Exportando a Arrow IPC: {filename}...")
+    pa, _ = _import_pyarrow()
+
+    table = to_arrow_table(df)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(filename, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+    print(f"✅ Arrow exportado: {filename}")
+    return filename
+
+
+def _json_default(value):
+    # Fechas del esquema tipado (datetime64) → "YYYY-MM-DD"
+    if pd.isna(value):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d") if value.time() == datetime.min.time() else value.isoformat()
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
 def generate_json_output(df, filename='job_listings.json'):
     """
     Exporta datos a JSON para integración con otras herramientas.
@@ -107,49 +250,287 @@ def generate_json_output(df, filename='job_listings.json'):
     }
 
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+        json.dump(data, f, indent=2, ensure_ascii=False, default=_json_default)
 
     print(f"✅ JSON exportado: {filename}")
     return filename
 
 
-def main():
+def generate_ndjson_output(df, filename='job_listings.ndjson', compression="infer"):
+    """
+    Exporta a JSON Lines en streaming (una oferta por línea, por lotes),
+    con compresión opcional y una línea final de resumen.
+    """
+    print(f"💾 Exportando a NDJSON: {filename}...")
+
+    with NDJSONWriter(filename, compression=compression) as writer:
+        writer.write_frame(df)
+
+    print(f"✅ NDJSON exportado: {filename}")
+    return filename
+
+
+def ndjson_filename(compression=None, base='job_listings.ndjson'):
+    return base + {"gzip": ".gz", "zstd": ".zst"}.get(compression, "")
+
+
+OUTPUT_FORMATS = {
+    "parquet": generate_parquet_output,
+    "arrow": generate_arrow_output,
+    "excel": generate_excel_report,
+    "json": generate_json_output,
+    "ndjson": generate_ndjson_output,
+}
+
+
+def streaming_formats(options):
+    """
+    Formatos que se escriben chunk a chunk en el modo streaming (--chunk-size):
+    NDJSON siempre; Excel solo con el writer de memoria constante.
+    """
+    formats = {"ndjson"}
+    if options.get("excel", {}).get("engine") == "xlsxwriter":
+        formats.add("excel")
+    return formats
+
+
+def _open_streaming_output(output_format, options, aggregates):
+    if output_format == "ndjson":
+        return NDJSONWriter(options["ndjson"]["filename"])
+    excel = options["excel"]
+    return ExcelReportWriter(excel.get("filename", 'job_listings_report.xlsx'),
+                             include_all_jobs=excel.get("include_all_jobs", True),
+                             overflow=excel.get("overflow", 'split'), aggregates=aggregates)
+
+
+def transform_and_stream_outputs(jobs, chunk_size, formats, options):
+    """
+    Transform en streaming: cada chunk ordenado se escribe directo a los
+    formatos en streaming y actualiza las agregaciones (JobAggregates);
+    solo si se pidió otro formato se concatenan los chunks en un DataFrame.
+    Retorna (df o None, archivos escritos, aggregates).
+    """
+    streamable = [f for f in formats if f in streaming_formats(options)]
+    frames = [] if len(streamable) < len(formats) else None
+    aggregates = JobAggregates()
+    writers = {}
+    # Cada writer cierra al salir del with: con resumen si todo salió bien,
+    # o descartando el archivo parcial si hubo una excepción
+    with ExitStack() as stack:
+        for chunk in stream_transform_data(jobs, chunk_size):
+            if not writers:
+                # Se abren con el primer chunk: sin ofertas no se crean archivos
+                for output_format in streamable:
+                    writers[output_format] = stack.enter_context(
+                        _open_streaming_output(output_format, options, aggregates))
+                    print(f"💾 Exportando en streaming: {writers[output_format].filename}...")
+            aggregates.update(chunk)
+            for writer in writers.values():
+                writer.write_frame(chunk)
+            if frames is not None:
+                frames.append(chunk)
+
+    files = []
+    for writer in writers.values():
+        print(f"✅ Exportado: {writer.filename}")
+        files.append(writer.filename)
+    df = concat_frames(frames) if frames is not None else None
+    return df, files, aggregates
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RPA Job Scraper")
+    parser.add_argument("--api-url", default=None,
+                        help="URL base de una API paginada (p.ej. la de stub_server.py); sin ella se usan datos mock")
+    parser.add_argument("--queries", nargs="+", default=["python"])
+    parser.add_argument("--location", default="remote")
+    parser.add_argument("--limit", type=int, default=30,
+                        help="Máximo de ofertas (0 = todas las disponibles en la API)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=10.0,
+                        help="Requests por segundo por host")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="Transformar en streaming en chunks de N filas (0 = todo en memoria)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="No deduplicar ofertas (por id/URL exactos y near-duplicates con MinHash LSH)")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8,
+                        help="Similitud mínima (Jaccard estimado) para considerar dos ofertas duplicadas")
+    parser.add_argument("--dedup-max-canonical", type=int, default=None,
+                        help="Conservar solo las últimas N ofertas canónicas en memoria (~1 KB c/u)")
+    parser.add_argument("--duplicates-file", default="job_duplicates.csv",
+                        help="CSV con el mapeo duplicado → oferta canónica")
+    parser.add_argument("--state-db", default=None,
+                        help="Base SQLite de ofertas vistas: procesa y reporta solo el delta (nuevas/modificadas)")
+    parser.add_argument("--formats", nargs="+", default=["parquet", "excel"], choices=list(OUTPUT_FORMATS),
+                        help="Formatos de salida: parquet/arrow para máquinas, excel (resumen) para humanos, json")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None,
+                        help="Compresión del NDJSON")
+    parser.add_argument("--excel-all-jobs", action="store_true",
+                        help="Incluir la hoja 'All Jobs' completa en el Excel (por defecto solo resúmenes)")
+    parser.add_argument("--excel-engine", choices=["xlsxwriter", "openpyxl"], default="xlsxwriter",
+                        help="xlsxwriter: write-only en memoria constante (y en streaming con --chunk-size)")
+    parser.add_argument("--excel-overflow", choices=["split", "truncate"], default="split",
+                        help="Qué hacer si All Jobs supera el límite de filas de Excel")
+    parser.add_argument("--metrics-file", default="scraper_metrics.json",
+                        help="JSON con wall time, filas/s, RSS pico y bytes escritos por etapa")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfil cProfile por etapa en --profile-dir")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Top de asignaciones (tracemalloc) por etapa en --profile-dir")
+    parser.add_argument("--profile-dir", default="profiles")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     Función principal que ejecuta el workflow completo de RPA.
     """
+    args = parse_args(argv)
+
     print("=" * 60)
     print("🤖 RPA Job Scraper - Demo Portfolio")
     print("=" * 60)
     print()
 
+    metrics = PipelineMetrics(cprofile=args.profile, trace_memory=args.trace_memory,
+                              profile_dir=args.profile_dir)
+
+    # Scraping incremental: solo pasan al pipeline las ofertas nuevas o modificadas
+    store = JobStore(args.state_db) if args.state_db else None
+    dedup = None if args.no_dedup else JobDeduplicator(threshold=args.dedup_threshold,
+                                                          max_canonical=args.dedup_max_canonical,
+                                                          mapping_file=args.duplicates_file)
+    engine = None
+
     try:
         # 1. Extraer datos
-        jobs = fetch_job_listings(query="python", location="remote", limit=30)
-
-        # 2. Limpiar y transformar
-        df = clean_and_transform_data(jobs)
+        if args.api_url:
+            engine = FetchEngine(max_concurrency=args.concurrency, rate_limit_per_host=args.rate_limit,
+                                 max_retries=args.retries,
+                                 validators=store.load_validators() if store is not None else None)
+
+        def extract():
+            if args.api_url:
+                jobs = iter_job_listings(args.queries, args.location, args.limit or None, args.api_url, engine)
+            else:
+                jobs = fetch_job_listings(query=args.queries[0], location=args.location, limit=args.limit)
+            # Dedup antes del store: los duplicados no cuentan como ofertas nuevas
+            if dedup is not None:
+                jobs = dedup.iter_unique(jobs)
+            if store is not None:
+                jobs = store.filter_changed(jobs)
+            yield from jobs
+
+        if args.chunk_size:
+            # En streaming el fetch corre intercalado con el transform: se mide
+            # solo el tiempo pasado dentro del generador de ofertas
+            jobs = metrics.timed_iter(extract(), "extract")
+        else:
+            with metrics.stage("extract") as stage:
+                jobs = list(extract())
+                stage.rows = len(jobs)
+
+        options = {
+            "excel": {"include_all_jobs": args.excel_all_jobs, "engine": args.excel_engine,
+                      "overflow": args.excel_overflow},
+            "parquet": {"append": store is not None},
+            "ndjson": {"filename": ndjson_filename(args.compression)},
+        }
 
-        # 3. Generar reportes
-        excel_file = generate_excel_report(df)
-        json_file = generate_json_output(df)
+        # 2. Limpiar y transformar (en streaming, las ofertas pasan del fetcher
+        # al transform a medida que llegan)
+        if args.chunk_size:
+            # El fetch (y dedup/store) corre dentro del transform: su tiempo ya
+            # está en "extract" y no se cuenta dos veces
+            with metrics.stage("transform_stream", exclude=("extract",)) as stage:
+                df, files, aggregates = transform_and_stream_outputs(jobs, args.chunk_size, args.formats, options)
+                stage.rows = aggregates.total
+                for filename in files:
+                    stage.add_output(filename)
+            pending_formats = [f for f in args.formats if f not in streaming_formats(options)]
+        else:
+            with metrics.stage("transform") as stage:
+                df = clean_and_transform_data(jobs)
+                aggregates = JobAggregates.from_frame(df)
+                stage.rows = len(df)
+            files = []
+            pending_formats = args.formats
+        options["excel"]["aggregates"] = aggregates
+
+        if dedup is not None:
+            stats = dedup.stats
+            print(f"🧬 Dedup: {stats['unique']} canónicas de {stats['seen']} ofertas "
+                  f"({stats['id']} por id, {stats['url']} por URL, {stats['fuzzy']} similares) "
+                  f"en {dedup.seconds:.2f}s")
+            # El mapeo se escribió a medida que aparecían los duplicados
+            dedup.close()
+            if stats['seen'] > stats['unique']:
+                files.append(args.duplicates_file)
+
+        if store is not None:
+            counts = store.counts
+            print(f"🔁 Delta: {counts['new']} nuevas, {counts['changed']} modificadas, "
+                  f"{counts['unchanged']} sin cambios"
+                  + (f", {engine.stats['not_modified']} páginas 304" if engine else ""))
+
+        if store is not None and aggregates.total == 0:
+            print("✅ Sin cambios desde la última corrida: no se regeneran reportes")
+        else:
+            # 3. Generar reportes
+            for output_format in pending_formats:
+                with metrics.stage(f"export_{output_format}") as stage:
+                    filename = OUTPUT_FORMATS[output_format](df, **options.get(output_format, {}))
+                    stage.rows = aggregates.total
+                    stage.add_output(filename)
+                files.append(filename)
+
+        if store is not None:
+            if engine:
+                store.save_validators(engine.validators)
+            store.commit(not_modified_pages=engine.stats['not_modified'] if engine else 0)
+
+        metrics.info.update({"argv": sys.argv[1:] if argv is None else list(argv),
+                             "total_jobs": aggregates.total})
+        if engine is not None:
+            metrics.info["fetch"] = dict(engine.stats)
+        if dedup is not None:
+            metrics.info["dedup"] = dedup.summary()
+        if store is not None:
+            metrics.info["delta"] = dict(store.counts)
+        metrics_file = metrics.write(args.metrics_file)
 
         # 4. Estadísticas finales
         print()
         print("=" * 60)
         print("📈 ESTADÍSTICAS FINALES")
         print("=" * 60)
-        print(f"Total ofertas procesadas: {len(df)}")
-        print(f"Salario promedio: ${df['salary_min'].mean():,.0f}")
+        print(f"Total ofertas procesadas: {aggregates.total}")
+        if aggregates.total:
+            print(f"Salario promedio: ${aggregates.avg_salary:,.0f}")
         print(f"Archivos generados:")
-        print(f"  - {excel_file}")
-        print(f"  - {json_file}")
+        for filename in files:
+            print(f"  - {filename}")
+        print()
+        print(f"⏱️ Métricas por etapa ({metrics_file}):")
+        metrics.print_summary()
         print()
         print("✅ Proceso completado exitosamente!")
 
     except Exception as e:
         print(f"❌ Error durante la ejecución: {e}")
+        if store is not None:
+            store.rollback()
+        if dedup is not None:
+            dedup.abort()
         raise
 
+    finally:
+        if engine is not None:
+            engine.close()
+        if store is not None:
+            store.close()
+
 
 if __name__ == "__main__":
     main()
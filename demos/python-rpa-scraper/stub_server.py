@@ -0,0 +1,172 @@
+"""
+Servidor HTTP local que simula una API de ofertas de trabajo paginada
+=====================================================================
+Permite probar FetchEngine (fetcher.py) sin depender de APIs externas:
+mismos campos que el mock de fetch_job_listings, paginación, latencia
+configurable, una tasa opcional de errores 503 para ejercitar reintentos
+y ETag / 304 Not Modified por página.
+
+Uso:
+    python stub_server.py --port 8080 --total 5000 --latency 0.05
+
+    from stub_server import StubJobServer
+    with StubJobServer(total_jobs=500) as server:
+        jobs = fetch_job_listings(limit=None, base_url=server.url)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_job(i, query="python", location="remote"):
+    """
+    Oferta sintética con el mismo esquema que el mock de fetch_job_listings.
+    """
+    return {
+        "id": f"job-{query}-{i}",
+        "title": f"{query.title()} Developer {i}",
+        "company": f"Tech Company {i % 10}",
+        "location": location,
+        "type": "Full-time" if i % 2 == 0 else "Contract",
+        "description": f"Looking for {query} developer with {i % 15 + 1} years experience",
+        "salary_range": f"${50000 + (i % 40) * 5000} - ${70000 + (i % 40) * 5000}",
+        "posted_date": datetime.now().strftime("%Y-%m-%d"),
+        "url": f"https://example.com/job/{query}/{i}"
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        if parts.path != "/jobs":
+            self._send(404, {"error": "not found"})
+            return
+
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            self._send(503, {"error": "unavailable"}, headers={"Retry-After": "0"})
+            return
+
+        params = parse_qs(parts.query)
+        query = params.get("q", ["python"])[0]
+        location = params.get("location", ["remote"])[0]
+        page = max(1, int(params.get("page", ["1"])[0]))
+        per_page = max(1, min(500, int(params.get("per_page", ["50"])[0])))
+
+        total = server.total_jobs
+        start = (page - 1) * per_page
+        jobs = [dict(make_job(i, query, location), **server.overrides.get(i, {}))
+                for i in range(start, min(start + per_page, total))]
+        body = json.dumps({
+            "jobs": jobs,
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "total_pages": (total + per_page - 1) // per_page
+        }).encode('utf-8')
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, None, headers={"ETag": etag})
+            return
+        self._send(200, body, headers={"ETag": etag})
+
+    def _send(self, status, data, headers=None):
+        if data is None:
+            body = b""
+        else:
+            body = data if isinstance(data, bytes) else json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubJobServer:
+    """
+    Servidor stub en un thread de background (puerto 0 = puerto libre).
+    """
+
+    def __init__(self, total_jobs=500, latency=0.0, error_rate=0.0, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.total_jobs = total_jobs
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.rng = random.Random(0)
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.httpd.overrides = {}
+        self._thread = None
+
+    def update_job(self, i, **fields):
+        """
+        Modifica campos de la oferta `i` (para probar scraping incremental).
+        """
+        self.httpd.overrides.setdefault(i, {}).update(fields)
+
+    def add_jobs(self, n):
+        self.httpd.total_jobs += n
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API stub de ofertas de trabajo")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--total", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubJobServer(args.total, args.latency, args.error_rate, port=args.port)
+    print(f"🌐 API stub escuchando en {server.url}/jobs")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Tests del mapeo de duplicados escrito en streaming (mapping_file).
+
+    python -m pytest test_dedup.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from dedup import JobDeduplicator
+
+
+def make_jobs(n, repeats=3):
+    jobs = []
+    for i in range(n):
+        job = {"id": f"job{i}", "title": f"Python Developer {i}", "company": f"Company {i} Inc.",
+               "url": f"https://jobs.example.com/{i}", "description": f"Backend role number {i}"}
+        jobs.append(job)
+        for copy in range(1, repeats):
+            jobs.append({**job, "id": f"job{i}-{copy}"})
+    return jobs
+
+
+class StreamedMappingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "job_duplicates.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_streamed_mapping_matches_in_memory(self):
+        jobs = make_jobs(50)
+        in_memory = JobDeduplicator(batch_size=16)
+        streamed = JobDeduplicator(batch_size=16, max_canonical=20, mapping_file=self.path)
+        self.assertEqual(len(list(in_memory.iter_unique(jobs))), 50)
+        self.assertEqual(len(list(streamed.iter_unique(jobs))), 50)
+        streamed.close()
+
+        self.assertIsNone(streamed.duplicates)
+        self.assertEqual(os.listdir(self.tmp.name), ["job_duplicates.csv"])
+        expected = in_memory.mapping_frame()
+        mapping = streamed.mapping_frame()
+        self.assertEqual(len(mapping), 100)
+        self.assertEqual(list(mapping["duplicate_id"]), list(expected["duplicate_id"]))
+        self.assertEqual(list(mapping["canonical_id"]), list(expected["canonical_id"]))
+        self.assertEqual(list(mapping["match"]), list(expected["match"]))
+
+    def test_no_duplicates_writes_no_file(self):
+        dedup = JobDeduplicator(mapping_file=self.path)
+        list(dedup.iter_unique(make_jobs(10, repeats=1)))
+        dedup.close()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertTrue(dedup.mapping_frame().empty)
+
+    def test_abort_leaves_no_file(self):
+        dedup = JobDeduplicator(mapping_file=self.path)
+        list(dedup.iter_unique(make_jobs(10)))
+        dedup.abort()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Tests de FetchEngine contra la API local (stub_server.py).
+
+    python -m pytest test_fetcher.py
+"""
+
+import time
+import unittest
+
+from fetcher import FetchEngine
+from stub_server import StubJobServer
+
+
+class IterListingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubJobServer(total_jobs=300)
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_all_pages_of_all_queries(self):
+        with FetchEngine(max_concurrency=4, rate_limit_per_host=1000) as engine:
+            jobs = list(engine.iter_listings(self.server.url, ["python", "django"], per_page=20))
+        ids = [job["id"] for job in jobs]
+        self.assertEqual(len(ids), 600)
+        self.assertEqual(len(set(ids)), 600)
+
+    def test_max_pages(self):
+        with FetchEngine(rate_limit_per_host=1000) as engine:
+            jobs = list(engine.iter_listings(self.server.url, ["python"], per_page=20, max_pages=3))
+        self.assertEqual(len(jobs), 60)
+
+    def test_slow_consumer_bounds_pages_in_flight(self):
+        # Con el consumidor detenido no se piden más de max_pending páginas por delante
+        with FetchEngine(max_concurrency=2, rate_limit_per_host=1000) as engine:
+            listings = engine.iter_listings(self.server.url, ["python"], per_page=5, max_pending=4)
+            next(listings)
+            time.sleep(0.3)
+            self.assertLessEqual(engine.stats["requests"], 1 + 4)
+            listings.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
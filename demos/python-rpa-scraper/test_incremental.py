@@ -0,0 +1,80 @@
+"""
+Tests del scraping incremental contra la API local (stub_server.py).
+
+    python -m pytest test_incremental.py
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from fetcher import FetchEngine
+from job_store import JobStore
+from scraper import main
+from stub_server import StubJobServer
+
+
+class IncrementalScrapeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)  # los reportes se escriben en el directorio actual
+        self.server = StubJobServer(total_jobs=200)
+        self.server.__enter__()
+        self.state_db = os.path.join(self.tmp.name, "state.db")
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def run_scraper(self, *args):
+        argv = ["--api-url", self.server.url, "--state-db", self.state_db,
+                "--formats", "json", "--no-dedup", *args]
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(argv)
+
+    def stored_jobs(self):
+        store = JobStore(self.state_db)
+        try:
+            return len(store)
+        finally:
+            store.close()
+
+    def test_limited_run_does_not_hide_unconsumed_jobs(self):
+        # La corrida con limit corta a mitad de la página 1: su ETag no debe
+        # guardarse, o la corrida completa recibiría un 304 y perdería el resto
+        self.run_scraper("--limit", "30")
+        self.assertEqual(self.stored_jobs(), 30)
+
+        self.run_scraper("--limit", "0")
+        self.assertEqual(self.stored_jobs(), 200)
+
+    def test_unchanged_pages_are_not_modified_after_full_run(self):
+        self.run_scraper("--limit", "0")
+        self.run_scraper("--limit", "0")
+
+        store = JobStore(self.state_db)
+        try:
+            validators = store.load_validators()
+        finally:
+            store.close()
+        with FetchEngine(validators=validators) as engine:
+            jobs = list(engine.iter_listings(self.server.url, ["python"]))
+        self.assertEqual(jobs, [])
+        self.assertEqual(engine.stats["not_modified"], len(validators))
+
+    def test_partially_consumed_page_keeps_no_validator(self):
+        with FetchEngine() as engine:
+            listings = engine.iter_listings(self.server.url, ["python"], per_page=50)
+            for _ in range(50):
+                next(listings)
+            listings.close()
+            self.assertEqual(engine.validators, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
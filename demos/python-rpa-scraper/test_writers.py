@@ -0,0 +1,78 @@
+"""
+Tests de los writers en streaming (NDJSON y Excel): una exportación que
+falla no deja archivos a medias.
+
+    python -m pytest test_writers.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from excel_writer import ExcelReportWriter
+from ndjson_writer import NDJSONWriter
+from transform import JobAggregates
+
+
+def make_frame(n):
+    return pd.DataFrame({"id": [str(i) for i in range(n)], "title": [f"Job {i}" for i in range(n)]})
+
+
+class NDJSONWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "jobs.ndjson")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_complete_export_ends_with_summary(self):
+        with NDJSONWriter(self.path) as writer:
+            writer.write_frame(make_frame(3))
+
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(json.loads(lines[-1])["_summary"]["total_jobs"], 3)
+        self.assertEqual(os.listdir(self.tmp.name), ["jobs.ndjson"])
+
+    def test_failed_export_leaves_no_file(self):
+        with self.assertRaises(RuntimeError):
+            with NDJSONWriter(self.path) as writer:
+                writer.write_frame(make_frame(3))
+                raise RuntimeError("fallo a mitad de la exportación")
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class ExcelReportWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "report.xlsx")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_complete_report_has_summary_sheets(self):
+        with ExcelReportWriter(self.path, aggregates=JobAggregates()) as writer:
+            writer.write_frame(make_frame(3))
+
+        self.assertEqual(pd.ExcelFile(self.path).sheet_names, ['All Jobs', 'Summary', 'Top Companies'])
+        self.assertEqual(os.listdir(self.tmp.name), ["report.xlsx"])
+
+    def test_failed_report_leaves_no_file(self):
+        with self.assertRaises(RuntimeError):
+            with ExcelReportWriter(self.path, aggregates=JobAggregates()) as writer:
+                writer.write_frame(make_frame(3))
+                raise RuntimeError("fallo a mitad de la exportación")
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
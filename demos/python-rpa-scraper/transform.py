@@ -0,0 +1,314 @@
+"""
+Transformación en streaming para el RPA Scraper
+===============================================
+Procesa las ofertas en chunks de tamaño fijo a medida que llegan del
+fetcher, en lugar de armar un único DataFrame con todo:
+
+- Cada chunk pasa por los mismos pasos que clean_and_transform_data
+  (strip / salarios / fechas / columnas derivadas), vectorizados con Pandas,
+  y se castea al esquema explícito JOB_SCHEMA.
+- El orden global por `salary_min` se obtiene con un external merge sort:
+  cada chunk ordenado se vuelca a disco como un "run" y luego los runs se
+  mezclan con heapq.merge (en varias pasadas si hay demasiados).
+
+La memoria pico queda acotada por chunk_size + fan_in * block_rows filas,
+independientemente del total de ofertas.
+"""
+
+import heapq
+import itertools
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from collections import Counter
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SORT_COLUMN = 'salary_min'
+
+# "$50000 - $70000", "$50,000-$70,000" o un único valor "$80000"
+SALARY_PATTERN = r'\$?\s*(\d[\d,]*)(?:\s*-\s*\$?\s*(\d[\d,]*))?'
+
+# Esquema explícito del DataFrame transformado: strings tipados, categóricas
+# para columnas de baja cardinalidad y fechas como datetime64.
+JOB_SCHEMA = {
+    'id': 'string',
+    'title': 'string',
+    'company': 'category',
+    'location': 'category',
+    'type': 'category',
+    'description': 'string',
+    'salary_range': 'string',
+    'posted_date': 'datetime64[ns]',
+    'url': 'string',
+    'days_ago': 'int32',
+    'salary_min': 'int32',
+    'salary_max': 'int32',
+}
+
+
+def iter_chunks(items, chunk_size):
+    """
+    Agrupa un iterable en listas de hasta `chunk_size` elementos.
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_salary_range(salary_range):
+    """
+    Extrae (salary_min, salary_max) de strings como "$50,000 - $70,000".
+    Los rangos se repiten mucho, así que la regex corre una sola vez por
+    valor distinto y el resultado se expande con los códigos de factorize.
+    """
+    codes, uniques = pd.factorize(salary_range)
+    bounds = pd.Series(uniques, dtype=object).str.extract(SALARY_PATTERN)
+
+    if (codes < 0).any() or bounds[0].isna().any():
+        invalid = [value for value in uniques if not re.search(r'\d', str(value))][:5]
+        raise ValueError(f"salary_range vacío o sin formato reconocible: {invalid or 'NaN'}")
+
+    low = bounds[0].str.replace(',', '', regex=False).astype('int32').to_numpy()
+    high = bounds[1].fillna(bounds[0]).str.replace(',', '', regex=False).astype('int32').to_numpy()
+    return low[codes], high[codes]
+
+
+def apply_schema(df, schema=JOB_SCHEMA):
+    """
+    Castea las columnas conocidas a los tipos de `schema` y las ordena
+    (las columnas extra se conservan al final).
+    """
+    known = [column for column in schema if column in df.columns]
+    extra = [column for column in df.columns if column not in schema]
+    return df[known + extra].astype({column: schema[column] for column in known})
+
+
+def empty_frame(schema=JOB_SCHEMA):
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in schema.items()})
+
+
+def transform_chunk(df):
+    """
+    Pasos de limpieza y columnas derivadas sobre un DataFrame (o un chunk).
+    """
+    df['title'] = df['title'].str.strip()
+    df['company'] = df['company'].str.strip()
+
+    df['salary_min'], df['salary_max'] = parse_salary_range(df['salary_range'])
+    df['posted_date'] = pd.to_datetime(df['posted_date'], format='%Y-%m-%d')
+    today = pd.Timestamp.now().normalize()
+    df['days_ago'] = (today - df['posted_date']).dt.days.clip(lower=0)
+    return apply_schema(df)
+
+
+def concat_frames(frames):
+    """
+    pd.concat de chunks transformados que conserva las columnas categóricas
+    (cada chunk tiene sus propias categorías; se unifican antes de concatenar).
+    """
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty_frame()
+
+    for column, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+class JobAggregates:
+    """
+    Agregaciones de los reportes (Summary por tipo y Top Companies)
+    calculadas en una sola pasada, chunk a chunk, durante el transform.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.salary_sum = 0
+        self.by_type = {}         # type → [count, suma de salary_min]
+        self.by_company = Counter()
+
+    def update(self, df):
+        if df.empty:
+            return
+        self.total += len(df)
+        self.salary_sum += int(df['salary_min'].sum())
+
+        grouped = df.groupby('type', observed=True)['salary_min'].agg(['count', 'sum'])
+        for job_type, count, salary_sum in grouped.itertuples(name=None):
+            totals = self.by_type.setdefault(job_type, [0, 0])
+            totals[0] += int(count)
+            totals[1] += int(salary_sum)
+
+        counts = df['company'].value_counts()
+        self.by_company.update({company: int(n) for company, n in counts.items() if n})
+
+    @classmethod
+    def from_frame(cls, df):
+        aggregates = cls()
+        aggregates.update(df)
+        return aggregates
+
+    @property
+    def avg_salary(self):
+        return self.salary_sum / self.total if self.total else 0.0
+
+    def summary(self):
+        """
+        Mismo resultado que df.groupby('type').agg(count, avg_salary).
+        """
+        rows = sorted(self.by_type.items())
+        summary = pd.DataFrame(
+            [(count, salary_sum / count) for _, (count, salary_sum) in rows],
+            index=pd.Index([job_type for job_type, _ in rows], name='type'),
+            columns=['count', 'avg_salary']
+        )
+        return summary
+
+    def top_companies(self, n=10):
+        """
+        Mismo resultado que df['company'].value_counts().head(n).
+        """
+        top = self.by_company.most_common(n)
+        return pd.Series([count for _, count in top], name='count',
+                         index=pd.Index([company for company, _ in top], name='company'))
+
+
+class ExternalSorter:
+    """
+    Ordena un stream de DataFrames por `column` sin tenerlos todos en memoria.
+    """
+
+    def __init__(self, column=SORT_COLUMN, ascending=False, block_rows=1024, fan_in=64, tmp_dir=None):
+        self.column = column
+        self.ascending = ascending
+        self.block_rows = block_rows
+        self.fan_in = fan_in
+        self.tmp_dir = tmp_dir
+        self.columns = None
+        self.dtypes = None
+        self._runs = []
+        self._run_count = 0
+        self._workdir = None
+        self._pending = None  # un solo chunk no se vuelca a disco
+
+    def _new_run_path(self):
+        if self._workdir is None:
+            self._workdir = tempfile.mkdtemp(prefix="scraper_sort_", dir=self.tmp_dir)
+        self._run_count += 1
+        return os.path.join(self._workdir, f"run_{self._run_count}.pkl")
+
+    def _write_run(self, rows):
+        path = self._new_run_path()
+        with open(path, 'wb') as f:
+            for block in iter_chunks(rows, self.block_rows):
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    def _sort_chunk(self, df):
+        # mergesort: estable, igual que el orden de llegada entre empates
+        return df.sort_values(self.column, ascending=self.ascending, kind='mergesort')
+
+    def add(self, df):
+        """
+        Agrega un chunk transformado; se ordena y se vuelca a disco como run.
+        Todos los chunks deben tener las mismas columnas que el primero
+        (en cualquier orden); si no, ValueError.
+        """
+        if df.empty:
+            return
+        if self.columns is None:
+            self.columns = list(df.columns)
+            # Las categorías de cada chunk son distintas: se re-infieren al leer
+            self.dtypes = {
+                column: 'category' if isinstance(dtype, pd.CategoricalDtype) else dtype
+                for column, dtype in df.dtypes.items()
+            }
+        else:
+            unexpected = [column for column in df.columns if column not in self.columns]
+            missing = [column for column in self.columns if column not in df.columns]
+            if unexpected or missing:
+                raise ValueError(f"El chunk no tiene las columnas del primero "
+                                 f"(sobran: {unexpected}, faltan: {missing})")
+
+        # Cada run se escribe con las columnas en el orden de self.columns
+        df = self._sort_chunk(df)[self.columns]
+        if self._pending is None and not self._runs:
+            self._pending = df
+            return
+        if self._pending is not None:
+            self._runs.append(self._write_run(self._pending.itertuples(index=False, name=None)))
+            self._pending = None
+        self._runs.append(self._write_run(df.itertuples(index=False, name=None)))
+
+    def _merge(self, paths):
+        key_index = self.columns.index(self.column)
+        return heapq.merge(*(self._read_run(path) for path in paths),
+                           key=lambda row: row[key_index], reverse=not self.ascending)
+
+    def _reduce_runs(self):
+        # Mezcla en varias pasadas para no abrir más de fan_in runs a la vez
+        while len(self._runs) > self.fan_in:
+            groups = [self._runs[i:i + self.fan_in] for i in range(0, len(self._runs), self.fan_in)]
+            merged = []
+            for group in groups:
+                merged.append(self._write_run(self._merge(group)))
+                for path in group:
+                    os.remove(path)
+            self._runs = merged
+
+    def iter_sorted(self, chunk_size=10000):
+        """
+        Genera el resultado ordenado en DataFrames de hasta `chunk_size` filas.
+        """
+        try:
+            if self._pending is not None:
+                for start in range(0, len(self._pending), chunk_size):
+                    yield self._pending.iloc[start:start + chunk_size].reset_index(drop=True)
+                return
+            if not self._runs:
+                return
+
+            self._reduce_runs()
+            for rows in iter_chunks(self._merge(self._runs), chunk_size):
+                df = pd.DataFrame.from_records(rows, columns=self.columns)
+                yield df.astype(self.dtypes, copy=False)
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
+        self._pending = None
+        self._runs = []
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+
+def stream_clean_and_transform(jobs, chunk_size=10000, tmp_dir=None):
+    """
+    Versión en streaming de clean_and_transform_data: consume `jobs` (lista o
+    generador) en chunks y genera DataFrames ya ordenados por salary_min desc.
+    """
+    sorter = ExternalSorter(tmp_dir=tmp_dir)
+    for chunk in iter_chunks(jobs, chunk_size):
+        sorter.add(transform_chunk(pd.DataFrame(chunk)))
+    yield from sorter.iter_sorted(chunk_size)
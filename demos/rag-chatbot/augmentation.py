@@ -0,0 +1,218 @@
+"""
+Augmentation: empaquetado de contexto para el RAG Chatbot
+=========================================================
+Convierte los chunks recuperados en el contexto más chico posible para un
+recall dado, respetando un presupuesto de tokens:
+
+1. Deduplicación de near-duplicates con MinHash sobre shingles de palabras
+   (se conserva el chunk más relevante de cada grupo).
+2. Fusión de chunks adyacentes del mismo archivo (metadata source/chunk),
+   eliminando el texto solapado que deja el chunking.
+3. Selección por Maximal Marginal Relevance (MMR): relevancia para la query
+   penalizada por similitud con lo ya elegido, hasta llenar el presupuesto.
+
+El conteo de tokens es una aproximación (palabras + signos de puntuación);
+en producción usar el tokenizer del LLM.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+MAX_HASH = (1 << 32) - 1
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """
+    Conjunto de shingles de `size` palabras (hasheados a 32 bits).
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode('utf-8'))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """
+    Firmas MinHash con `num_perm` funciones hash (a*x + b) mod primo,
+    deterministas para que las firmas sean comparables entre llamadas.
+    """
+
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        state = seed
+        self.params = []
+        for _ in range(num_perm):
+            # LCG simple: coeficientes reproducibles sin depender de random
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = state % (self.PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            b = state % self.PRIME
+            self.params.append((a, b))
+
+    def signature(self, shingle_set: set) -> Tuple[int, ...]:
+        if not shingle_set:
+            return tuple(MAX_HASH for _ in self.params)
+        prime = self.PRIME
+        return tuple(
+            min((a * s + b) % prime for s in shingle_set) & MAX_HASH
+            for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """
+        Estimación de Jaccard: fracción de posiciones iguales en las firmas.
+        """
+        if not sig_a:
+            return 0.0
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _merge_overlap(left: str, right: str, max_overlap: int = 400) -> str:
+    """
+    Une dos chunks consecutivos sin repetir el solapamiento del chunking.
+    """
+    limit = min(len(left), len(right), max_overlap)
+    for size in range(limit, 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left} {right}"
+
+
+class ContextPacker:
+    """
+    Arma el contexto final a partir de [(score, documento)] recuperados.
+    """
+
+    def __init__(self, token_budget: int = 1024, dedup_threshold: float = 0.8,
+                 mmr_lambda: float = 0.7, num_perm: int = 64):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.mmr_lambda = mmr_lambda
+        self.hasher = MinHasher(num_perm=num_perm)
+
+    def _candidates(self, scored_docs: List[Tuple[float, Dict]]) -> List[Dict]:
+        top = max((score for score, _ in scored_docs), default=0.0) or 1.0
+        return [
+            {"doc": doc, "relevance": score / top, "source_ids": [doc['id']]}
+            for score, doc in scored_docs
+        ]
+
+    def _sign(self, candidate: Dict):
+        text = candidate["doc"]["content"]
+        candidate["signature"] = self.hasher.signature(shingles(text))
+        candidate["tokens"] = count_tokens(f"[{candidate['doc']['title']}]: {text}")
+
+    def deduplicate(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        Descarta chunks casi idénticos a uno más relevante ya conservado.
+        """
+        kept: List[Dict] = []
+        for candidate in sorted(candidates, key=lambda c: -c["relevance"]):
+            if any(MinHasher.similarity(candidate["signature"], other["signature"]) >= self.dedup_threshold
+                   for other in kept):
+                continue
+            kept.append(candidate)
+        return kept
+
+    def merge_adjacent(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        Fusiona chunks consecutivos (chunk i, i+1) del mismo `source`.
+        """
+        by_source: Dict[str, List[Dict]] = {}
+        standalone: List[Dict] = []
+        for candidate in candidates:
+            metadata = candidate["doc"].get("metadata") or {}
+            if "source" in metadata and isinstance(metadata.get("chunk"), int):
+                by_source.setdefault(metadata["source"], []).append(candidate)
+            else:
+                standalone.append(candidate)
+
+        merged: List[Dict] = list(standalone)
+        for group in by_source.values():
+            group.sort(key=lambda c: c["doc"]["metadata"]["chunk"])
+            current = group[0]
+            for candidate in group[1:]:
+                if candidate["doc"]["metadata"]["chunk"] == current["doc"]["metadata"]["chunk"] + 1:
+                    doc = dict(current["doc"])
+                    doc["content"] = _merge_overlap(current["doc"]["content"], candidate["doc"]["content"])
+                    doc["metadata"] = dict(candidate["doc"]["metadata"])
+                    current = {
+                        "doc": doc,
+                        "relevance": max(current["relevance"], candidate["relevance"]),
+                        "source_ids": current["source_ids"] + candidate["source_ids"],
+                        # MinHash de la unión = mínimo posición a posición (sin re-hashear)
+                        "signature": tuple(map(min, current["signature"], candidate["signature"])),
+                        "tokens": count_tokens(f"[{doc['title']}]: {doc['content']}")
+                    }
+                else:
+                    merged.append(current)
+                    current = candidate
+            merged.append(current)
+        return merged
+
+    def select_mmr(self, candidates: List[Dict], token_budget: Optional[int] = None) -> List[Dict]:
+        """
+        Selección greedy por MMR mientras quepa en el presupuesto de tokens.
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        remaining = list(candidates)
+        selected: List[Dict] = []
+        used = 0
+
+        while remaining:
+            def marginal(candidate):
+                redundancy = max((MinHasher.similarity(candidate["signature"], s["signature"])
+                                  for s in selected), default=0.0)
+                return self.mmr_lambda * candidate["relevance"] - (1 - self.mmr_lambda) * redundancy
+
+            best = max(remaining, key=marginal)
+            remaining.remove(best)
+            if used + best["tokens"] <= budget:
+                selected.append(best)
+                used += best["tokens"]
+            elif not selected:
+                # Ni el mejor chunk cabe completo: se recorta al presupuesto
+                best = dict(best, doc=self._truncate(best["doc"], budget), tokens=budget)
+                selected.append(best)
+                break
+        return selected
+
+    def _truncate(self, doc: Dict, budget: int) -> Dict:
+        title_tokens = count_tokens(f"[{doc['title']}]: ")
+        words = doc["content"].split()
+        content = []
+        used = title_tokens
+        for word in words:
+            cost = count_tokens(word)
+            if used + cost > budget:
+                break
+            content.append(word)
+            used += cost
+        return dict(doc, content=" ".join(content))
+
+    def pack(self, scored_docs: List[Tuple[float, Dict]]) -> List[Dict]:
+        """
+        Retorna los documentos de contexto (dedup + merge + MMR). Cada uno
+        lleva "source_ids" con los ids de los chunks originales que cubre.
+        """
+        candidates = self._candidates(scored_docs)
+        for candidate in candidates:
+            self._sign(candidate)
+
+        candidates = self.deduplicate(candidates)
+        candidates = self.merge_adjacent(candidates)
+        selected = self.select_mmr(candidates)
+        return [dict(c["doc"], source_ids=c["source_ids"]) for c in selected]
@@ -0,0 +1,254 @@
+"""
+Benchmark de retrieval y generación para el RAG Chatbot
+=======================================================
+Genera corpus sintéticos (de 1k a 1M chunks) y sets de queries sintéticas,
+y mide para cada backend de retrieval:
+
+- tiempo de escritura del corpus: se genera en streaming y se vuelca por
+  lotes a un índice en disco temporal (index_store.py) con sus embeddings,
+  así nunca se materializa la lista completa de documentos
+- tiempo de construcción del índice sobre los documentos memory-mapped
+  (el backend vector usa directamente la matriz del store)
+- memoria (RSS adicional del proceso tras construir el índice)
+- latencia por query p50 / p95 / p99 y QPS
+- QPS en modo batch (search_batch)
+
+Además corre el pipeline completo (stream_chat) sobre el corpus más chico
+y reporta las etapas retrieve / augment / generate con los timing hooks.
+
+Uso:
+    python benchmark.py --sizes 1000 10000 100000 --queries 500 --output bench.json
+    python benchmark.py --sizes 1000000 --backends keyword vector
+
+Requiere: numpy
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from chatbot import SimpleRAGChatbot, build_retriever
+from generators import StubLLMGenerator
+from index_store import IndexStore, open_store, write_store
+
+BACKENDS = {
+    "keyword": {"backend": "inverted", "scoring": "keyword"},
+    "bm25": {"backend": "inverted", "scoring": "bm25"},
+    "vector": {"backend": "vector", "scoring": "keyword"},
+}
+
+CATEGORIES = ["programming", "ai", "automation", "databases", "devops", "security"]
+
+
+def build_vocabulary(size: int = 5000, seed: int = 7) -> List[str]:
+    """
+    Vocabulario sintético de palabras pronunciables (determinista por seed).
+    """
+    rng = random.Random(seed)
+    consonants, vowels = "bcdfglmnprstv", "aeiou"
+    words = set()
+    while len(words) < size:
+        length = rng.randint(2, 5)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+def _zipf_weights(n: int, exponent: float = 1.1) -> List[float]:
+    # Distribución tipo Zipf: pocas palabras muy frecuentes, cola larga
+    return [1.0 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+def generate_corpus(n_docs: int, words_per_doc: int = 80, seed: int = 42,
+                    vocabulary: Sequence[str] = None) -> Iterator[Dict]:
+    """
+    Genera chunks sintéticos con el mismo esquema que _load_sample_documents.
+    """
+    rng = random.Random(seed)
+    vocabulary = vocabulary or build_vocabulary()
+    weights = _zipf_weights(len(vocabulary))
+    for i in range(n_docs):
+        words = rng.choices(vocabulary, weights=weights, k=words_per_doc + 4)
+        yield {
+            "id": f"chunk{i}",
+            "title": " ".join(words[:4]),
+            "content": " ".join(words[4:]),
+            "metadata": {"category": rng.choice(CATEGORIES), "language": "general"}
+        }
+
+
+def generate_queries(n_queries: int, seed: int = 99, vocabulary: Sequence[str] = None) -> List[str]:
+    """
+    Queries de 2 a 5 palabras muestreadas del mismo vocabulario (sesgo Zipf).
+    """
+    rng = random.Random(seed)
+    vocabulary = vocabulary or build_vocabulary()
+    weights = _zipf_weights(len(vocabulary))
+    return [" ".join(rng.choices(vocabulary, weights=weights, k=rng.randint(2, 5)))
+            for _ in range(n_queries)]
+
+
+def build_corpus_store(path: str, n_docs: int, vocabulary: Sequence[str]) -> Tuple[IndexStore, float]:
+    """
+    Escribe el corpus sintético en un índice en disco (streaming, por lotes)
+    y lo abre memory-mapped. Retorna (store, segundos de escritura).
+    """
+    started = time.perf_counter()
+    write_store(path, generate_corpus(n_docs, vocabulary=vocabulary))
+    return open_store(path), time.perf_counter() - started
+
+
+def current_rss_bytes() -> int:
+    """
+    RSS actual del proceso (Linux: /proc; otros: máximo histórico).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "mean_ms": total / len(ordered) * 1000 if ordered else 0.0,
+        "qps": len(ordered) / total if total else 0.0
+    }
+
+
+def benchmark_backend(name: str, documents: Sequence[Dict], queries: List[str],
+                      top_k: int = 5, batch_size: int = 64, store: IndexStore = None) -> Dict:
+    """
+    Construye el backend sobre `documents` y mide build, memoria y queries.
+    Con `store` el backend vector usa sus embeddings en vez de recalcularlos.
+    """
+    gc.collect()
+    rss_before = current_rss_bytes()
+    started = time.perf_counter()
+    retriever = build_retriever(documents, store=store, **BACKENDS[name])
+    build_seconds = time.perf_counter() - started
+    memory_bytes = max(0, current_rss_bytes() - rss_before)
+
+    # Warm-up para no medir imports ni caches fríos
+    for query in queries[:5]:
+        retriever.search(query, top_k=top_k)
+
+    latencies = []
+    for query in queries:
+        query_start = time.perf_counter()
+        retriever.search(query, top_k=top_k)
+        latencies.append(time.perf_counter() - query_start)
+
+    batch_start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        retriever.search_batch(queries[i:i + batch_size], top_k=top_k)
+    batch_seconds = time.perf_counter() - batch_start
+
+    result = {
+        "backend": name,
+        "documents": len(documents),
+        "queries": len(queries),
+        "build_seconds": build_seconds,
+        "memory_mb": memory_bytes / 1024 / 1024,
+        "batch_qps": len(queries) / batch_seconds if batch_seconds else 0.0
+    }
+    result.update(latency_summary(latencies))
+    return result
+
+
+def benchmark_pipeline(documents: Sequence[Dict], queries: List[str], llm_latency: float = 0.0) -> Dict:
+    """
+    Pipeline completo (stream_chat) con timing hooks por etapa, sin cache.
+    """
+    stages: Dict[str, List[float]] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = SimpleRAGChatbot(documents=documents, cache_size=0,
+                               generator=StubLLMGenerator(latency=llm_latency),
+                               history_spill_path=os.devnull)
+    bot.add_timing_hook(lambda stage, seconds: stages.setdefault(stage, []).append(seconds))
+
+    for query in queries:
+        for _ in bot.stream_chat(query):
+            pass
+
+    return {stage: latency_summary(values) for stage, values in stages.items()}
+
+
+def print_result(result: Dict):
+    print(f"  {result['backend']:<8} build {result['build_seconds']:8.2f}s  "
+          f"mem {result['memory_mb']:8.1f}MB  "
+          f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+          f"p99 {result['p99_ms']:8.2f}ms  QPS {result['qps']:9.1f}  "
+          f"batch QPS {result['batch_qps']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del RAG Chatbot")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Tamaños de corpus (chunks), p.ej. 1000 10000 100000 1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Latencia simulada del LLM en el benchmark del pipeline")
+    parser.add_argument("--output", default="rag_benchmark.json")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📊 RAG Chatbot Benchmark")
+    print("=" * 60)
+
+    vocabulary = build_vocabulary()
+    queries = generate_queries(args.queries, vocabulary=vocabulary)
+    results = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "retrieval": [], "pipeline": {}}
+
+    smallest = min(args.sizes)
+    with tempfile.TemporaryDirectory(prefix="rag_benchmark_") as tmp_dir:
+        for size in args.sizes:
+            print(f"\n📚 Corpus sintético: {size:,} chunks")
+            store, store_seconds = build_corpus_store(os.path.join(tmp_dir, f"corpus_{size}"),
+                                                      size, vocabulary)
+            print(f"  corpus escrito en disco en {store_seconds:.2f}s")
+            for name in args.backends:
+                result = benchmark_backend(name, store.documents, queries, top_k=args.top_k, store=store)
+                result["store_seconds"] = store_seconds
+                results["retrieval"].append(result)
+                print_result(result)
+            store.close()
+
+        print(f"\n⏱️ Pipeline completo (stream_chat) sobre {smallest:,} chunks")
+        store = open_store(os.path.join(tmp_dir, f"corpus_{smallest}"))
+        results["pipeline"] = benchmark_pipeline(store.documents, queries, llm_latency=args.llm_latency)
+        store.close()
+    for stage, summary in results["pipeline"].items():
+        print(f"  {stage:<12} p50 {summary['p50_ms']:8.3f}ms  p95 {summary['p95_ms']:8.3f}ms  "
+              f"p99 {summary['p99_ms']:8.3f}ms")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
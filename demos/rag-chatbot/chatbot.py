@@ -13,10 +13,46 @@ Skills demostradas:
 """
 
 import os
-from typing import List, Dict
-import json
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from augmentation import ContextPacker
+from filters import validate_where
+from generators import TemplateGenerator
+from history import ConversationHistory
+from inverted_index import InvertedIndex
+from query_cache import QueryCache
+from segments import SegmentedIndex
+
+
+def build_retriever(documents: List[Dict], backend: str = "inverted", scoring: str = "keyword",
+                    store=None, embedder=None):
+    """
+    Construye el backend de retrieval. Todos exponen la misma interfaz:
+    search(query, top_k) y search_batch(queries, top_k) → [(score, ordinal)].
+    - "inverted": índice invertido (scoring "keyword" o "bm25")
+    - "vector": matriz de embeddings float32 (requiere numpy)
+    Si se entrega un `store` (índice en disco) el backend vectorial usa su
+    matriz memory-mapped en vez de re-embeber los documentos. El store solo
+    persiste embeddings: el backend "inverted" vuelve a tokenizar todo el
+    corpus al construirse (segundos con ~100k documentos).
+    """
+    if backend == "inverted":
+        return InvertedIndex(documents, scoring=scoring)
+    if backend == "vector":
+        # Import diferido: numpy solo es necesario para este backend
+        from vector_index import VectorIndex
+        if store is not None:
+            return VectorIndex(documents, embedder=store.embedder, matrix=store.matrix)
+        return VectorIndex(documents, embedder=embedder)
+    raise ValueError(f"Backend de retrieval desconocido: {backend!r}")
+
 
 class SimpleRAGChatbot:
     """
@@ -24,11 +60,70 @@ class SimpleRAGChatbot:
     En producción: usar LangChain + ChromaDB + Ollama real.
     """
 
-    def __init__(self):
-        self.documents = self._load_sample_documents()
-        self.conversation_history = []
+    def __init__(self, scoring: str = "keyword", backend: str = "inverted",
+                 index_path: Optional[str] = None, documents: Optional[List[Dict]] = None,
+                 cache_size: int = 1024,
+                 cache_ttl: Optional[float] = None, max_history: int = 100,
+                 history_spill_path: Optional[str] = None, history_dir: Optional[str] = None,
+                 max_sessions: int = 1024, session_ttl: Optional[float] = None, generator=None,
+                 retrieval_workers: int = 4, top_k: int = 2,
+                 context_budget: Optional[int] = None):
+        self.store = None
+        if index_path:
+            # Índice persistente: se abre memory-mapped en milisegundos. El
+            # arranque rápido es solo con backend="vector"; "inverted" reconstruye
+            # sus postings leyendo todos los documentos del store
+            from index_store import open_store
+            self.store = open_store(index_path)
+            documents = self.store.documents
+        elif documents is None:
+            documents = self._load_sample_documents()
+
+        # Índice construido una sola vez (backend: "inverted" o "vector") como
+        # segmento base; las actualizaciones incrementales agregan segmentos
+        base_retriever = build_retriever(documents, backend=backend, scoring=scoring,
+                                         store=self.store)
+        self.embedder = getattr(base_retriever, 'embedder', None)
+        self.index = SegmentedIndex(
+            lambda docs: build_retriever(docs, backend=backend, scoring=scoring, embedder=self.embedder),
+            base_retriever=base_retriever,
+            base_ids=self.store.ids if self.store is not None else None
+        )
+        # Cache de (documentos, respuesta) por query normalizada + versión del índice
+        self.cache = QueryCache(maxsize=cache_size, ttl=cache_ttl) if cache_size else None
+        # Ring buffer de turnos recientes; los antiguos se bajan a un JSONL
+        self.max_history = max_history
+        self.conversation_history = ConversationHistory(max_recent=max_history,
+                                                        spill_path=history_spill_path)
+        # Generación intercambiable (plantilla, LLM falso, Ollama...)
+        self.generator = generator or TemplateGenerator()
+        # Serving concurrente: historial por sesión (LRU + TTL opcional, así un
+        # servidor de larga vida no acumula sesiones ni archivos abiertos) y
+        # pool para el retrieval
+        self.history_dir = history_dir
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions: "OrderedDict[str, ConversationHistory]" = OrderedDict()
+        self._session_last_used: Dict[str, float] = {}
+        self._sessions_lock = threading.Lock()
+        self.retrieval_workers = retrieval_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Augmentation: con presupuesto de tokens se recuperan más candidatos
+        # y se empaquetan (dedup + merge de chunks adyacentes + MMR)
+        self.top_k = top_k
+        self.packer = ContextPacker(token_budget=context_budget) if context_budget else None
+        self.candidate_k = top_k * 4 if self.packer else top_k
+        # Hooks de instrumentación: hook(etapa, segundos) por cada etapa del pipeline
+        self.timing_hooks: List[Callable[[str, float], None]] = []
         print("✅ RAG Chatbot inicializado")
-        print(f"📚 {len(self.documents)} documentos cargados en memoria")
+        print(f"📚 {len(self.index)} documentos cargados en memoria")
+
+    @property
+    def documents(self) -> List[Dict]:
+        """
+        Documentos vivos del índice (sin los eliminados o reemplazados).
+        """
+        return list(self.index.iter_documents())
 
     def _load_sample_documents(self) -> List[Dict]:
         """
@@ -77,90 +172,346 @@ class SimpleRAGChatbot:
             }
         ]
 
-    def _retrieve_relevant_docs(self, query: str, top_k: int = 2) -> List[Dict]:
+    def save_index(self, path: str) -> int:
+        """
+        Persiste documentos + embeddings en disco para arrancar sin re-indexar.
+        """
+        from index_store import write_store
+        count = write_store(path, self.index.iter_documents(), embedder=self.embedder)
+        print(f"💾 Índice guardado en {path} ({count} documentos)")
+        return count
+
+    def _retrieve_relevant_docs(self, query: str, top_k: int = 2,
+                                where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Busca documentos relevantes usando el backend de retrieval configurado.
+        `where` filtra por metadata antes de puntuar (ver filters.py), p.ej.
+        {"category": "ai"} o {"category": {"$in": ["ai", "databases"]}}.
+        En producción: usar embeddings reales (Sentence Transformers / Ollama).
+        """
+        scored_docs = self._retrieve_scored_docs(query, top_k=top_k, where=where)
+        relevant_docs = [doc for score, doc in scored_docs]
+
+        return relevant_docs
+
+    def _retrieve_scored_docs(self, query: str, top_k: int = 2,
+                              where: Optional[Dict] = None) -> List[Tuple[float, Dict]]:
         """
-        Busca documentos relevantes usando búsqueda semántica simplificada.
-        En producción: usar embeddings reales y vector similarity search.
+        Igual que _retrieve_relevant_docs pero conservando el score de cada documento.
         """
-        query_lower = query.lower()
-        scored_docs = []
+        return self.index.search(query, top_k=top_k, where=where)
 
-        for doc in self.documents:
-            # Scoring simple basado en keywords (en producción: usar embeddings)
-            score = 0
-            content_lower = doc['content'].lower()
-            title_lower = doc['title'].lower()
+    def _retrieve_relevant_docs_batch(self, queries: List[str], top_k: int = 2,
+                                      where: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Recupera documentos para varias queries en una sola pasada del backend.
+        """
+        results = self.index.search_batch(queries, top_k=top_k, where=where)
+        return [[doc for score, doc in scored_docs] for scored_docs in results]
 
-            # Buscar palabras clave
-            keywords = query_lower.split()
-            for keyword in keywords:
-                if keyword in content_lower:
-                    score += 2
-                if keyword in title_lower:
-                    score += 5
+    def add_documents(self, documents: List[Dict]) -> int:
+        """
+        Agrega o reemplaza (mismo `id`) documentos sin reconstruir el índice.
+        Retorna la nueva versión del índice.
+        """
+        version = self.index.add_documents(documents)
+        print(f"➕ {len(documents)} documentos indexados (versión {version})")
+        return version
 
-            if score > 0:
-                scored_docs.append((score, doc))
+    def update_document(self, document: Dict) -> int:
+        """
+        Reemplaza un documento existente por `id` (o lo agrega si no existe).
+        """
+        return self.add_documents([document])
 
-        # Ordenar por score y retornar top_k
-        scored_docs.sort(reverse=True, key=lambda x: x[0])
-        relevant_docs = [doc for score, doc in scored_docs[:top_k]]
+    def delete_document(self, doc_id: str) -> bool:
+        """
+        Elimina un documento por `id` (tombstone hasta la próxima compactación).
+        """
+        return self.index.delete_documents([doc_id]) > 0
 
-        return relevant_docs
+    def compact_index(self, full: bool = False) -> int:
+        """
+        Fusiona segmentos y descarta tombstones. Normalmente se ejecuta sola
+        en background al superar `max_segments`.
+        """
+        return self.index.compact(full=full)
 
     def _generate_response(self, query: str, context_docs: List[Dict]) -> str:
         """
-        Genera respuesta usando contexto de documentos.
+        Genera respuesta usando contexto de documentos y el generador configurado.
         En producción: usar Ollama/GPT con context injection.
         """
-        if not context_docs:
-            return "Lo siento, no encontré información relevante en mi base de conocimientos."
+        return "".join(self.generator.stream(query, context_docs))
+
+    def _augment_context(self, query: str, scored_docs: List[Tuple[float, Dict]]) -> List[Dict]:
+        """
+        Augmentation: prepara los documentos que se inyectan como contexto.
+        Sin presupuesto se usan los top_k tal cual; con `context_budget` se
+        deduplican, se fusionan chunks adyacentes y se eligen por MMR.
+        """
+        if self.packer is None:
+            return [doc for score, doc in scored_docs]
+        return self.packer.pack(scored_docs)
 
-        # Simular respuesta del LLM basándose en contexto
-        context = "\n\n".join([f"[{doc['title']}]: {doc['content']}" for doc in context_docs])
+    def add_timing_hook(self, hook: Callable[[str, float], None]):
+        """
+        Registra un hook(etapa, segundos) que se llama en cada chat con la
+        duración de cada etapa: "retrieve", "augment", "generate" (y
+        "first_token"), o "cache" si la respuesta salió del cache.
+        """
+        self.timing_hooks.append(hook)
 
-        response = f"""Basándome en los documentos indexados, puedo responderte:
+    def _record_timing(self, timings: Dict[str, float], stage: str, seconds: float):
+        timings[stage] = seconds
+        for hook in self.timing_hooks:
+            hook(stage, seconds)
 
-{context}
+    def _context_event(self, context_docs: List[Dict], cached: bool) -> Dict:
+        return {"type": "context", "cached": cached, "docs": context_docs}
 
-📚 Fuentes consultadas: {', '.join([doc['title'] for doc in context_docs])}
-"""
-        return response
+    def stream_chat(self, query: str, where: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Versión streaming del RAG pipeline. Entrega eventos a medida que se producen:
+        - {"type": "context", "docs": [...], "cached": bool}  al terminar el retrieval
+        - {"type": "token", "text": "..."}                     por cada token generado
+        - {"type": "done", "interaction": {...}}               al final (ya guardado en historial)
+        `where` restringe el retrieval por metadata (ver _retrieve_relevant_docs).
+        """
+        if where is not None:
+            # Antes del cache: la clave serializa el filtro y fallaría con TypeError
+            validate_where(where)
+        timings: Dict[str, float] = {}
+        version = self.index.version
+        started = time.perf_counter()
+        cached = self.cache.get(query, version, where) if self.cache is not None else None
+        if cached is not None:
+            context_docs, response = cached
+            tokens = iter([response])
+            self._record_timing(timings, "cache", time.perf_counter() - started)
+        else:
+            # 1. Retrieval: Buscar documentos relevantes
+            scored_docs = self._retrieve_scored_docs(query, top_k=self.candidate_k, where=where)
+            self._record_timing(timings, "retrieve", time.perf_counter() - started)
+
+            # 2. Augmentation: Preparar contexto
+            stage_start = time.perf_counter()
+            context_docs = self._augment_context(query, scored_docs)
+            self._record_timing(timings, "augment", time.perf_counter() - stage_start)
+
+            # 3. Generation: tokens a medida que el LLM los produce
+            tokens = self.generator.stream(query, context_docs)
+
+        yield self._context_event(context_docs, cached is not None)
+
+        # Solo se mide el tiempo dentro del generador, no el del consumidor del stream
+        parts = []
+        generate_time = 0.0
+        while True:
+            stage_start = time.perf_counter()
+            try:
+                token = next(tokens)
+            except StopIteration:
+                generate_time += time.perf_counter() - stage_start
+                break
+            generate_time += time.perf_counter() - stage_start
+            if not parts and cached is None:
+                self._record_timing(timings, "first_token", generate_time)
+            parts.append(token)
+            yield {"type": "token", "text": token}
+        response = "".join(parts)
+
+        if cached is None:
+            self._record_timing(timings, "generate", generate_time)
+            if self.cache is not None:
+                self.cache.put(query, version, (context_docs, response), where)
 
-    def chat(self, query: str) -> Dict:
+        # Guardar en historial
+        interaction = self._build_interaction(query, response, context_docs, timings)
+        self.conversation_history.append(interaction)
+        yield {"type": "done", "interaction": interaction}
+
+    def chat(self, query: str, where: Optional[Dict] = None) -> Dict:
         """
         Procesa una consulta del usuario usando RAG pipeline.
+        Recolecta la respuesta completa de stream_chat() para quien no hace streaming.
         """
         print(f"\n💬 Usuario: {query}")
         print("🔍 Buscando documentos relevantes...")
 
-        # 1. Retrieval: Buscar documentos relevantes
-        relevant_docs = self._retrieve_relevant_docs(query, top_k=2)
-        print(f"📄 Encontrados {len(relevant_docs)} documentos relevantes")
-
-        # 2. Augmentation: Preparar contexto
-        # 3. Generation: Generar respuesta
-        response = self._generate_response(query, relevant_docs)
+        interaction = None
+        for event in self.stream_chat(query, where=where):
+            if event["type"] == "context":
+                if event["cached"]:
+                    print(f"⚡ Respuesta desde cache ({len(event['docs'])} documentos)")
+                else:
+                    print(f"📄 Encontrados {len(event['docs'])} documentos relevantes")
+            elif event["type"] == "done":
+                interaction = event["interaction"]
+
+        print(f"\n🤖 Bot: {interaction['response']}")
+        return interaction
 
-        # Guardar en historial
-        interaction = {
+    def _build_interaction(self, query: str, response: str, context_docs: List[Dict],
+                           timings: Dict[str, float]) -> Dict:
+        return {
             "timestamp": datetime.now().isoformat(),
             "query": query,
             "response": response,
-            "docs_used": [doc['id'] for doc in relevant_docs]
+            "docs_used": [doc_id for doc in context_docs for doc_id in doc.get('source_ids', [doc['id']])],
+            "timings": timings
         }
-        self.conversation_history.append(interaction)
 
-        print(f"\n🤖 Bot: {response}")
+    def _session_spill_path(self, session_id: str) -> Optional[str]:
+        """
+        Archivo de spill de una sesión: hash del id completo dentro de
+        `history_dir` (ids distintos nunca comparten archivo). Sin
+        `history_dir`, cada historial usa su propio archivo temporal.
+        """
+        if self.history_dir is None:
+            return None
+        digest = hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.history_dir, f"chat_history_{digest}.jsonl")
+
+    def session_history(self, session_id: str) -> ConversationHistory:
+        """
+        Historial propio de cada sesión/usuario (se crea en el primer uso).
+        Se conservan a lo sumo `max_sessions` sesiones (LRU) y, con
+        `session_ttl`, se descartan las inactivas por más de esos segundos;
+        al descartarlas se cierra su archivo de spill.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._sessions_lock:
+            if self.session_ttl is not None:
+                while self.sessions:
+                    oldest = next(iter(self.sessions))
+                    if now - self._session_last_used[oldest] <= self.session_ttl:
+                        break
+                    evicted.append(self._pop_session(oldest))
+
+            history = self.sessions.get(session_id)
+            if history is None:
+                if self.history_dir is not None:
+                    os.makedirs(self.history_dir, exist_ok=True)
+                history = ConversationHistory(max_recent=self.max_history,
+                                              spill_path=self._session_spill_path(session_id))
+                self.sessions[session_id] = history
+                while len(self.sessions) > self.max_sessions:
+                    evicted.append(self._pop_session(next(iter(self.sessions))))
+            else:
+                self.sessions.move_to_end(session_id)
+            self._session_last_used[session_id] = now
+
+        for old in evicted:
+            old.close()
+        return history
+
+    def _pop_session(self, session_id: str) -> ConversationHistory:
+        del self._session_last_used[session_id]
+        return self.sessions.pop(session_id)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.retrieval_workers,
+                                                thread_name_prefix="rag-retrieval")
+        return self._executor
+
+    async def astream_chat(self, query: str, session_id: str = "default",
+                           where: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Versión async de stream_chat() (mismos eventos) para servir muchos
+        usuarios a la vez: el retrieval corre en un pool de threads (no
+        bloquea el event loop), los tokens se esperan con await y cada
+        sesión tiene su historial. No imprime nada por stdout.
+        """
+        if where is not None:
+            # Antes del cache: la clave serializa el filtro y fallaría con TypeError
+            validate_where(where)
+        timings: Dict[str, float] = {}
+        version = self.index.version
+        started = time.perf_counter()
+        cached = self.cache.get(query, version, where) if self.cache is not None else None
+        if cached is not None:
+            context_docs, response = cached
+            self._record_timing(timings, "cache", time.perf_counter() - started)
+        else:
+            loop = asyncio.get_running_loop()
+            scored_docs = await loop.run_in_executor(
+                self._get_executor(), self._retrieve_scored_docs, query, self.candidate_k, where
+            )
+            self._record_timing(timings, "retrieve", time.perf_counter() - started)
+
+            stage_start = time.perf_counter()
+            context_docs = self._augment_context(query, scored_docs)
+            self._record_timing(timings, "augment", time.perf_counter() - stage_start)
+
+        yield self._context_event(context_docs, cached is not None)
+
+        if cached is not None:
+            yield {"type": "token", "text": response}
+        else:
+            parts = []
+            generate_time = 0.0
+            tokens = self.generator.astream(query, context_docs).__aiter__()
+            while True:
+                stage_start = time.perf_counter()
+                try:
+                    token = await tokens.__anext__()
+                except StopAsyncIteration:
+                    generate_time += time.perf_counter() - stage_start
+                    break
+                generate_time += time.perf_counter() - stage_start
+                if not parts:
+                    self._record_timing(timings, "first_token", generate_time)
+                parts.append(token)
+                yield {"type": "token", "text": token}
+            response = "".join(parts)
+            self._record_timing(timings, "generate", generate_time)
+
+            if self.cache is not None:
+                self.cache.put(query, version, (context_docs, response), where)
+
+        interaction = self._build_interaction(query, response, context_docs, timings)
+        interaction["session_id"] = session_id
+        self.session_history(session_id).append(interaction)
+        yield {"type": "done", "interaction": interaction}
+
+    async def achat(self, query: str, session_id: str = "default",
+                    where: Optional[Dict] = None) -> Dict:
+        """
+        Versión async de chat(): recolecta la respuesta completa de astream_chat().
+        """
+        interaction = None
+        async for event in self.astream_chat(query, session_id=session_id, where=where):
+            if event["type"] == "done":
+                interaction = event["interaction"]
         return interaction
 
-    def export_history(self, filename='chat_history.json'):
+    def close(self):
+        """
+        Libera el pool de retrieval y los archivos de historial.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.conversation_history.close()
+        with self._sessions_lock:
+            for history in self.sessions.values():
+                history.close()
+
+    def cache_stats(self) -> Dict:
+        """
+        Contadores del cache de consultas (hits, misses, evictions, ...).
+        """
+        return self.cache.stats() if self.cache is not None else {}
+
+    def export_history(self, filename='chat_history.jsonl'):
         """
-        Exporta historial de conversación a JSON.
+        Exporta historial de conversación a JSON Lines (streaming, un registro por línea).
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.conversation_history, f, indent=2, ensure_ascii=False)
-        print(f"\n💾 Historial exportado a {filename}")
+        count = self.conversation_history.export_jsonl(filename)
+        print(f"\n💾 Historial exportado a {filename} ({count} registros)")
 
 
 def main():
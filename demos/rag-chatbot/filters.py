@@ -0,0 +1,161 @@
+"""
+Filtros de metadata para el retrieval del RAG Chatbot
+=====================================================
+Expresiones de filtro al estilo ChromaDB (`where`):
+
+    {"category": "ai"}                                   igualdad
+    {"category": {"$eq": "ai"}}                          igualdad explícita
+    {"category": {"$in": ["ai", "databases"]}}           pertenencia a un conjunto
+    {"category": "ai", "language": "general"}            varias claves = AND
+    {"$and": [{...}, {...}]}  /  {"$or": [{...}, {...}]}
+
+MetadataIndex mantiene, por campo y valor, un bitmap (int de Python) con los
+ordinales de los documentos que lo tienen. Evaluar un filtro son solo
+AND/OR de bitmaps, y el resultado (candidatos) se entrega al retriever
+para que puntúe únicamente esos documentos.
+
+validate_where() revisa la estructura y los tipos del filtro antes de
+evaluarlo: cualquier filtro mal formado es un ValueError.
+"""
+
+from typing import Any, Dict, Hashable, Iterator, List, Sequence
+
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def validate_where(where: Any):
+    """
+    Valida un filtro completo (operadores, anidamiento y que los valores
+    sean escalares). Lanza ValueError si está mal formado.
+    """
+    if not isinstance(where, dict):
+        raise ValueError(f"El filtro debe ser un dict: {where!r}")
+
+    for key, condition in where.items():
+        if not isinstance(key, str):
+            raise ValueError(f"Clave de filtro inválida: {key!r}")
+        if key in ("$and", "$or"):
+            if not isinstance(condition, list):
+                raise ValueError(f"{key} espera una lista de filtros: {condition!r}")
+            for clause in condition:
+                validate_where(clause)
+        elif key.startswith("$"):
+            raise ValueError(f"Operador lógico no soportado: {key!r} (usa $and, $or)")
+        elif isinstance(condition, dict):
+            if len(condition) != 1:
+                raise ValueError(f"Condición inválida para {key!r}: {condition}")
+            operator, operand = next(iter(condition.items()))
+            if operator == "$eq":
+                _validate_scalar(key, operand)
+            elif operator == "$in":
+                if not isinstance(operand, (list, tuple)):
+                    raise ValueError(f"$in espera una lista de valores para {key!r}: {operand!r}")
+                for value in operand:
+                    _validate_scalar(key, value)
+            else:
+                raise ValueError(f"Operador no soportado: {operator!r} (usa $eq, $in)")
+        else:
+            _validate_scalar(key, condition)
+
+
+def _validate_scalar(field: str, value: Any):
+    if not isinstance(value, SCALAR_TYPES):
+        hint = " (para varios valores usa $in)" if isinstance(value, (list, tuple)) else ""
+        raise ValueError(f"Valor no soportado para {field!r}: {value!r}{hint}")
+
+
+def iter_bits(bitmap: int) -> Iterator[int]:
+    """
+    Ordinales (bits en 1) de un bitmap, en orden ascendente.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+
+class MetadataIndex:
+    """
+    Índice secundario: campo → valor → bitmap de ordinales.
+    """
+
+    def __init__(self, documents: Sequence[Dict]):
+        self.size = len(documents)
+        self.all_bits = (1 << self.size) - 1
+        self.fields: Dict[str, Dict[Hashable, int]] = {}
+
+        # Se acumulan listas y se convierten a bitmap al final: hacer
+        # `bitmap |= 1 << i` por documento sería cuadrático en el tamaño
+        postings: Dict[str, Dict[Hashable, List[int]]] = {}
+        for ordinal, doc in enumerate(documents):
+            for field, value in (doc.get('metadata') or {}).items():
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                for item in values:
+                    try:
+                        postings.setdefault(field, {}).setdefault(item, []).append(ordinal)
+                    except TypeError:
+                        continue  # valores no hasheables no se indexan
+
+        for field, by_value in postings.items():
+            self.fields[field] = {value: self._to_bitmap(ordinals) for value, ordinals in by_value.items()}
+
+    def _to_bitmap(self, ordinals: List[int]) -> int:
+        data = bytearray((self.size + 7) // 8)
+        for ordinal in ordinals:
+            data[ordinal >> 3] |= 1 << (ordinal & 7)
+        return int.from_bytes(bytes(data), 'little')
+
+    def _field_bitmap(self, field: str, condition: Any) -> int:
+        by_value = self.fields.get(field, {})
+
+        if isinstance(condition, dict):
+            if len(condition) != 1:
+                raise ValueError(f"Condición inválida para {field!r}: {condition}")
+            operator, operand = next(iter(condition.items()))
+            if operator == "$eq":
+                return by_value.get(operand, 0)
+            if operator == "$in":
+                bitmap = 0
+                for value in operand:
+                    bitmap |= by_value.get(value, 0)
+                return bitmap
+            raise ValueError(f"Operador no soportado: {operator!r} (usa $eq, $in)")
+
+        return by_value.get(condition, 0)
+
+    def evaluate(self, where: Dict) -> int:
+        """
+        Evalúa una expresión de filtro y retorna el bitmap de candidatos.
+        """
+        if not isinstance(where, dict):
+            raise ValueError(f"El filtro debe ser un dict: {where!r}")
+
+        bitmap = self.all_bits
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    bitmap &= self.evaluate(clause)
+            elif key == "$or":
+                union = 0
+                for clause in condition:
+                    union |= self.evaluate(clause)
+                bitmap &= union
+            elif key.startswith("$"):
+                raise ValueError(f"Operador lógico no soportado: {key!r} (usa $and, $or)")
+            else:
+                bitmap &= self._field_bitmap(key, condition)
+
+            if not bitmap:
+                break
+        return bitmap
+
+    def candidates(self, where: Dict) -> List[int]:
+        """
+        Ordinales que cumplen el filtro, en orden ascendente.
+        """
+        validate_where(where)
+        return list(iter_bits(self.evaluate(where)))
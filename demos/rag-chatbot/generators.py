@@ -0,0 +1,100 @@
+"""
+Generadores de respuesta para el RAG Chatbot
+============================================
+Etapa de generación del pipeline (Query → Retrieval → Augmentation →
+Generation). Todos los generadores exponen la misma interfaz:
+
+- generate(query, docs) → str          (síncrono)
+- agenerate(query, docs) → str         (awaitable, para achat())
+- stream(query, docs) → Iterator[str]  (tokens a medida que se producen)
+- astream(query, docs) → AsyncIterator[str]
+
+generate/agenerate son simplemente la concatenación de stream/astream.
+
+Generadores incluidos:
+- TemplateGenerator: la respuesta por plantilla del demo original.
+- StubLLMGenerator: LLM falso que simula latencia hasta el primer token y
+  entre tokens, sin bloquear el event loop (tests y pruebas de carga sin Ollama).
+
+En producción: un generador que llame a Ollama/GPT con context injection.
+"""
+
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Dict, Iterator, List
+
+NO_CONTEXT_RESPONSE = "Lo siento, no encontré información relevante en mi base de conocimientos."
+
+# Un "token" = palabra + espacios que la siguen (concatenarlos reproduce el texto)
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def split_tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text)
+
+
+def build_context(context_docs: List[Dict]) -> str:
+    """
+    Contexto que se inyecta al LLM: "[título]: contenido" por documento.
+    """
+    return "\n\n".join([f"[{doc['title']}]: {doc['content']}" for doc in context_docs])
+
+
+class TemplateGenerator:
+    """
+    Simula la respuesta del LLM armándola con el contexto recuperado.
+    """
+
+    def render(self, query: str, context_docs: List[Dict]) -> str:
+        if not context_docs:
+            return NO_CONTEXT_RESPONSE
+
+        context = build_context(context_docs)
+
+        response = f"""Basándome en los documentos indexados, puedo responderte:
+
+{context}
+
+📚 Fuentes consultadas: {', '.join([doc['title'] for doc in context_docs])}
+"""
+        return response
+
+    def stream(self, query: str, context_docs: List[Dict]) -> Iterator[str]:
+        yield from split_tokens(self.render(query, context_docs))
+
+    async def astream(self, query: str, context_docs: List[Dict]) -> AsyncIterator[str]:
+        for token in self.stream(query, context_docs):
+            yield token
+
+    def generate(self, query: str, context_docs: List[Dict]) -> str:
+        return "".join(self.stream(query, context_docs))
+
+    async def agenerate(self, query: str, context_docs: List[Dict]) -> str:
+        return "".join([token async for token in self.astream(query, context_docs)])
+
+
+class StubLLMGenerator(TemplateGenerator):
+    """
+    LLM falso: misma respuesta que la plantilla, pero tarda `latency`
+    segundos hasta el primer token y `token_delay` entre tokens, como lo
+    haría una llamada real (en la versión async, await no bloquea el loop).
+    """
+
+    def __init__(self, latency: float = 0.2, token_delay: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    def stream(self, query: str, context_docs: List[Dict]) -> Iterator[str]:
+        time.sleep(self.latency)
+        for i, token in enumerate(super().stream(query, context_docs)):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+    async def astream(self, query: str, context_docs: List[Dict]) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(super().stream(query, context_docs)):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
@@ -0,0 +1,116 @@
+"""
+Historial de conversación acotado para el RAG Chatbot
+=====================================================
+Los turnos recientes viven en un ring buffer en memoria; cuando se llena,
+el turno más antiguo se agrega (append) a un archivo JSONL en disco. Así
+la memoria es constante aunque el servidor atienda conversaciones durante
+días, y el historial completo sigue disponible para exportar.
+
+Sin `spill_path` cada historial usa su propio archivo temporal (creado
+recién al bajar el primer turno y borrado en close()), así varios bots o
+workers en el mismo directorio no se pisan.
+
+La exportación es streaming: se copia registro por registro (primero los
+del disco, luego los recientes) sin construir un documento JSON gigante.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+
+class ConversationHistory:
+    """
+    Historial con `max_recent` turnos en memoria y el resto en `spill_path`
+    (por defecto, un archivo temporal propio de la instancia).
+    """
+
+    def __init__(self, max_recent: int = 100, spill_path: Optional[str] = None):
+        if max_recent <= 0:
+            raise ValueError("max_recent debe ser mayor que 0")
+        self.max_recent = max_recent
+        self.spill_path = spill_path
+        self._owns_spill = spill_path is None
+        self._recent: deque = deque()
+        self._spill_file = None
+        self._spilled = 0
+        self._lock = threading.Lock()
+
+    def _spill(self, interaction: Dict):
+        if self._spill_file is None:
+            # Se crea (y trunca) recién cuando hace falta bajar el primer turno
+            if self.spill_path is None:
+                fd, self.spill_path = tempfile.mkstemp(prefix="chat_history_", suffix=".jsonl")
+                self._spill_file = os.fdopen(fd, 'w', encoding='utf-8')
+            else:
+                mode = 'a' if self._spilled else 'w'
+                self._spill_file = open(self.spill_path, mode, encoding='utf-8')
+        self._spill_file.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+        self._spill_file.flush()
+        self._spilled += 1
+
+    def append(self, interaction: Dict):
+        with self._lock:
+            self._recent.append(interaction)
+            while len(self._recent) > self.max_recent:
+                self._spill(self._recent.popleft())
+
+    def recent(self, n: Optional[int] = None) -> List[Dict]:
+        """
+        Últimos `n` turnos (todos los del ring buffer si n es None).
+        """
+        with self._lock:
+            items = list(self._recent)
+        return items if n is None else items[-n:]
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._recent)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Recorre el historial completo en orden: disco y luego memoria.
+        """
+        with self._lock:
+            spilled = self._spilled
+            recent = list(self._recent)
+
+        if spilled:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                for i, line in enumerate(f):
+                    if i >= spilled:
+                        break
+                    yield json.loads(line)
+        yield from recent
+
+    def export_jsonl(self, filename: str) -> int:
+        """
+        Escribe el historial completo como JSON Lines, registro por registro.
+        Retorna la cantidad de registros exportados.
+        """
+        count = 0
+        tmp_path = filename + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for interaction in self:
+                f.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, filename)
+        return count
+
+    def close(self):
+        """
+        Cierra el archivo de spill; si es el temporal propio, lo borra
+        (exportar antes de cerrar para conservar el historial completo).
+        """
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+            if self._owns_spill and self.spill_path is not None:
+                if os.path.exists(self.spill_path):
+                    os.remove(self.spill_path)
+                self.spill_path = None
+                self._spilled = 0
+                self._recent.clear()
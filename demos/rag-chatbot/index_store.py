@@ -0,0 +1,326 @@
+"""
+Índice persistente en disco para el RAG Chatbot
+===============================================
+Evita re-chunkear y re-embeber el corpus en cada arranque. Formato de un
+directorio de índice:
+
+- embeddings.f32   matriz float32 (n_docs x dim) en crudo, abierta con np.memmap
+- offsets.i64      tabla int64 (n_docs + 1) con offsets en documents.bin
+- documents.bin    registros JSON compactos (utf-8) concatenados
+- ids.bin          ids de los documentos (JSON compacto) concatenados, con
+                   sus offsets en id_offsets.i64
+- id_order.i64     ordinales vivos ordenados por id: mapeo id → ordinal por
+                   búsqueda binaria, sin decodificar los documentos
+- meta.json        versión del formato, n_docs, dim, config del embedder y
+                   ordinales con id repetido (gana la última versión)
+
+Todo se abre en modo solo lectura con memory mapping: abrir el índice es
+O(1), los documentos se decodifican bajo demanda y varios workers comparten
+las mismas páginas del page cache del sistema operativo en vez de copiar
+el corpus a su heap.
+
+Requiere: numpy
+"""
+
+import json
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vector_index import HashingEmbedder, document_text
+
+FORMAT_VERSION = 2
+
+EMBEDDINGS_FILE = "embeddings.f32"
+OFFSETS_FILE = "offsets.i64"
+DOCUMENTS_FILE = "documents.bin"
+IDS_FILE = "ids.bin"
+ID_OFFSETS_FILE = "id_offsets.i64"
+ID_ORDER_FILE = "id_order.i64"
+META_FILE = "meta.json"
+
+
+def encode_id(doc_id) -> bytes:
+    """
+    Clave persistida de un id: su JSON compacto en utf-8 (conserva el tipo).
+    """
+    return json.dumps(doc_id, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class IndexStoreWriter:
+    """
+    Escribe el índice por lotes (append-only): embeddings y registros se
+    vuelcan a disco en cada add_batch, por lo que la memoria depende del
+    tamaño del lote y no del corpus. meta.json se escribe al final, así un
+    índice a medio escribir nunca se abre por error: si el bloque `with`
+    falla se llama a abort() y se borran los archivos parciales.
+    """
+
+    def __init__(self, path: str, embedder: Optional[HashingEmbedder] = None):
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self.count = 0
+        self._offsets = [0]
+        self._id_keys: List[bytes] = []
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        self._embeddings_file = open(os.path.join(path, EMBEDDINGS_FILE), 'wb')
+        self._documents_file = open(os.path.join(path, DOCUMENTS_FILE), 'wb')
+
+    def add_batch(self, documents: Sequence[Dict], embeddings: Optional[np.ndarray] = None):
+        """
+        Agrega un lote de documentos. Si no se entregan embeddings se calculan.
+        """
+        if not documents:
+            return
+        if embeddings is None:
+            embeddings = self.embedder.embed([document_text(doc) for doc in documents])
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.shape != (len(documents), self.embedder.dim):
+            raise ValueError(f"Embeddings con forma {embeddings.shape}, "
+                             f"se esperaba {(len(documents), self.embedder.dim)}")
+        self._embeddings_file.write(embeddings.tobytes())
+
+        for doc in documents:
+            record = json.dumps(doc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._documents_file.write(record)
+            self._offsets.append(self._offsets[-1] + len(record))
+            self._id_keys.append(encode_id(doc['id']))
+
+        self.count += len(documents)
+
+    def close(self):
+        self._embeddings_file.close()
+        self._documents_file.close()
+
+        np.asarray(self._offsets, dtype=np.int64).tofile(os.path.join(self.path, OFFSETS_FILE))
+        duplicates = self._write_ids()
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "count": self.count,
+            "duplicate_ordinals": duplicates,
+            "dim": self.embedder.dim,
+            "dtype": "float32",
+            "embedder": {
+                "type": "hashing",
+                "dim": self.embedder.dim,
+                "ngram_range": list(self.embedder.ngram_range)
+            }
+        }
+        tmp_path = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+    def _write_ids(self) -> List[int]:
+        """
+        Escribe los ids y su orden. Con ids repetidos solo el último ordinal
+        queda en id_order; los anteriores se retornan como muertos.
+        """
+        keys = self._id_keys
+        with open(os.path.join(self.path, IDS_FILE), 'wb') as f:
+            for key in keys:
+                f.write(key)
+        np.cumsum([0] + [len(key) for key in keys], dtype=np.int64).tofile(
+            os.path.join(self.path, ID_OFFSETS_FILE))
+
+        # sorted es estable: los repetidos quedan juntos en orden de ordinal
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        live, duplicates = [], []
+        for position, ordinal in enumerate(order):
+            if position + 1 < len(order) and keys[order[position + 1]] == keys[ordinal]:
+                duplicates.append(ordinal)
+            else:
+                live.append(ordinal)
+        np.asarray(live, dtype=np.int64).tofile(os.path.join(self.path, ID_ORDER_FILE))
+        return sorted(duplicates)
+
+    def abort(self):
+        """
+        Descarta un índice incompleto: cierra y borra los archivos de datos
+        sin escribir meta.json.
+        """
+        self._embeddings_file.close()
+        self._documents_file.close()
+        for name in (EMBEDDINGS_FILE, DOCUMENTS_FILE, OFFSETS_FILE, IDS_FILE, ID_OFFSETS_FILE, ID_ORDER_FILE):
+            file_path = os.path.join(self.path, name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class StoredDocuments(Sequence):
+    """
+    Secuencia de documentos respaldada por mmap: cada acceso decodifica
+    un único registro, nada se carga completo en memoria.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: mmap.mmap):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, ordinal):
+        if isinstance(ordinal, slice):
+            return [self[i] for i in range(*ordinal.indices(len(self)))]
+        if ordinal < 0:
+            ordinal += len(self)
+        if not 0 <= ordinal < len(self):
+            raise IndexError(ordinal)
+        start, end = int(self._offsets[ordinal]), int(self._offsets[ordinal + 1])
+        return json.loads(self._blob[start:end].decode('utf-8'))
+
+
+class StoredIds:
+    """
+    Mapeo id → ordinal vivo persistido: búsqueda binaria sobre los ids
+    ordenados (mmap), sin cargar el mapeo completo al heap.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob, order: np.ndarray, duplicates: Sequence[int]):
+        self._offsets = offsets
+        self._blob = blob
+        self._order = order
+        self.duplicates = tuple(duplicates)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _key(self, ordinal: int) -> bytes:
+        return bytes(self._blob[int(self._offsets[ordinal]):int(self._offsets[ordinal + 1])])
+
+    def get(self, doc_id) -> Optional[int]:
+        """
+        Ordinal de la versión viva de `doc_id`, o None si no está.
+        """
+        key = encode_id(doc_id)
+        low, high = 0, len(self._order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(int(self._order[middle])) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._order):
+            ordinal = int(self._order[low])
+            if self._key(ordinal) == key:
+                return ordinal
+        return None
+
+    def __iter__(self) -> Iterator[Tuple[object, int]]:
+        """
+        Pares (id, ordinal) en orden de id.
+        """
+        for ordinal in self._order:
+            ordinal = int(ordinal)
+            yield json.loads(self._key(ordinal).decode('utf-8')), ordinal
+
+
+def _open_blob(file) -> object:
+    # mmap no acepta archivos vacíos
+    if os.fstat(file.fileno()).st_size > 0:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return b""
+
+
+def _load_array(path: str) -> np.ndarray:
+    if os.path.getsize(path) > 0:
+        return np.memmap(path, dtype=np.int64, mode='r')
+    return np.zeros(0, dtype=np.int64)
+
+
+class IndexStore:
+    """
+    Índice abierto en solo lectura: `matrix` (np.memmap), `documents`
+    (StoredDocuments), `ids` (StoredIds; None en índices de la versión 1)
+    y el `embedder` con la misma configuración usada al escribir.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No hay un índice completo en {path} (falta {META_FILE})")
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") not in (1, FORMAT_VERSION):
+            raise ValueError(f"Versión de formato no soportada: {self.meta.get('format_version')}")
+
+        embedder_config = self.meta["embedder"]
+        self.embedder = HashingEmbedder(dim=embedder_config["dim"],
+                                        ngram_range=tuple(embedder_config["ngram_range"]))
+
+        count, dim = self.meta["count"], self.meta["dim"]
+        if count:
+            self.matrix = np.memmap(os.path.join(path, EMBEDDINGS_FILE), dtype=np.float32,
+                                    mode='r', shape=(count, dim))
+        else:
+            self.matrix = np.zeros((0, dim), dtype=np.float32)
+
+        offsets = np.memmap(os.path.join(path, OFFSETS_FILE), dtype=np.int64, mode='r')
+        self._documents_file = open(os.path.join(path, DOCUMENTS_FILE), 'rb')
+        self.documents = StoredDocuments(offsets, _open_blob(self._documents_file))
+
+        self.ids: Optional[StoredIds] = None
+        self._ids_file = None
+        if self.meta["format_version"] >= 2:
+            self._ids_file = open(os.path.join(path, IDS_FILE), 'rb')
+            self.ids = StoredIds(np.memmap(os.path.join(path, ID_OFFSETS_FILE), dtype=np.int64, mode='r'),
+                                 _open_blob(self._ids_file),
+                                 _load_array(os.path.join(path, ID_ORDER_FILE)),
+                                 self.meta["duplicate_ordinals"])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def close(self):
+        if isinstance(self.documents._blob, mmap.mmap):
+            self.documents._blob.close()
+        self._documents_file.close()
+        if self.ids is not None:
+            if isinstance(self.ids._blob, mmap.mmap):
+                self.ids._blob.close()
+            self._ids_file.close()
+
+
+def write_store(path: str, documents: Iterable[Dict], embedder: Optional[HashingEmbedder] = None,
+                batch_size: int = 1024) -> int:
+    """
+    Escribe un índice completo a partir de un iterable de documentos.
+    Retorna la cantidad de documentos escritos.
+    """
+    with IndexStoreWriter(path, embedder=embedder) as writer:
+        batch: List[Dict] = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                writer.add_batch(batch)
+                batch = []
+        writer.add_batch(batch)
+    return writer.count
+
+
+def open_store(path: str) -> IndexStore:
+    """
+    Abre un índice existente en solo lectura (memory-mapped).
+    """
+    return IndexStore(path)
@@ -0,0 +1,199 @@
+"""
+Ingesta streaming de documentos para el RAG Chatbot
+===================================================
+Pipeline basado en generadores:
+
+    archivos del directorio → lectura + chunking con solapamiento (pool de procesos)
+        → embeddings (en el mismo worker) → lotes de tamaño fijo → índice en disco
+
+La memoria máxima depende del tamaño de lote y de los archivos en vuelo,
+no del tamaño del corpus: nada se acumula más allá del lote actual.
+
+Uso:
+    python ingestion.py ./docs ./rag_index --chunk-size 800 --overlap 100
+
+Requiere: numpy (y pypdf para archivos .pdf)
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from index_store import IndexStoreWriter
+from vector_index import HashingEmbedder, document_text
+
+DEFAULT_EXTENSIONS = (".txt", ".md", ".pdf")
+
+
+def iter_files(directory: str, extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS) -> Iterator[str]:
+    """
+    Recorre el directorio de forma recursiva (orden determinista) y
+    entrega las rutas de los archivos soportados, sin listarlos todos antes.
+    """
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path, extensions)
+            elif entry.name.lower().endswith(extensions):
+                yield entry.path
+
+
+def read_text(path: str) -> str:
+    """
+    Lee el texto de un archivo. Los PDF se procesan con pypdf.
+    """
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("Para indexar PDFs instala pypdf: pip install pypdf") from e
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> Iterator[str]:
+    """
+    Divide el texto en chunks de como máximo `chunk_size` caracteres que se
+    solapan `overlap` caracteres. Corta en un espacio cuando es posible
+    para no partir palabras.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap debe ser menor que chunk_size")
+
+    text = " ".join(text.split())
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + overlap + 1, end)
+            if cut > start:
+                end = cut
+
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+
+
+def file_to_chunks(path: str, root: str, chunk_size: int = 800, overlap: int = 100) -> List[Dict]:
+    """
+    Convierte un archivo en documentos-chunk con el mismo esquema que
+    _load_sample_documents (id, title, content, metadata).
+    """
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    parts = relative.split("/")
+    category = parts[0] if len(parts) > 1 else "general"
+    title = os.path.splitext(parts[-1])[0]
+
+    return [
+        {
+            "id": f"{relative}#{i}",
+            "title": title,
+            "content": chunk,
+            "metadata": {"category": category, "language": "general",
+                         "source": relative, "chunk": i}
+        }
+        for i, chunk in enumerate(chunk_text(read_text(path), chunk_size, overlap))
+    ]
+
+
+def _process_file(args):
+    """
+    Trabajo de cada proceso del pool: leer, chunkear y embeber un archivo.
+    """
+    path, root, chunk_size, overlap, embedder = args
+    chunks = file_to_chunks(path, root, chunk_size, overlap)
+    embeddings = embedder.embed([document_text(doc) for doc in chunks]) if chunks else None
+    return chunks, embeddings
+
+
+def bounded_map(executor, fn: Callable, iterable: Iterable, max_pending: int) -> Iterator:
+    """
+    Como executor.map pero con a lo sumo `max_pending` tareas en vuelo,
+    para que la entrada no se consuma completa ni los resultados se acumulen.
+    Conserva el orden de la entrada.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """
+    Agrupa un iterable en listas de a lo sumo `size` elementos.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_embedded_chunks(directory: str, chunk_size: int = 800, overlap: int = 100,
+                         workers: Optional[int] = None,
+                         embedder: Optional[HashingEmbedder] = None) -> Iterator[Tuple[Dict, object]]:
+    """
+    Stream de (documento-chunk, embedding) procesando los archivos en
+    paralelo con un pool de procesos (por defecto, un worker por core).
+    """
+    embedder = embedder or HashingEmbedder()
+    workers = workers or os.cpu_count() or 1
+    tasks = ((path, directory, chunk_size, overlap, embedder) for path in iter_files(directory))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunks, embeddings in bounded_map(executor, _process_file, tasks, max_pending=workers * 2):
+            for doc, vector in zip(chunks, embeddings if embeddings is not None else ()):
+                yield doc, vector
+
+
+def ingest_directory(directory: str, index_path: str, chunk_size: int = 800, overlap: int = 100,
+                     batch_size: int = 256, workers: Optional[int] = None,
+                     embedder: Optional[HashingEmbedder] = None) -> int:
+    """
+    Indexa un directorio completo en un índice en disco (ver index_store.py),
+    escribiendo en lotes de `batch_size` chunks. Retorna la cantidad de chunks.
+    """
+    import numpy as np
+
+    embedder = embedder or HashingEmbedder()
+    print(f"📂 Indexando {directory} → {index_path}")
+
+    with IndexStoreWriter(index_path, embedder=embedder) as writer:
+        stream = iter_embedded_chunks(directory, chunk_size, overlap, workers, embedder)
+        for batch in batched(stream, batch_size):
+            docs = [doc for doc, _ in batch]
+            writer.add_batch(docs, embeddings=np.stack([vector for _, vector in batch]))
+
+    print(f"✅ {writer.count} chunks indexados")
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de documentos para el RAG Chatbot")
+    parser.add_argument("directory", help="Directorio con documentos (.txt, .md, .pdf)")
+    parser.add_argument("index_path", help="Directorio de salida del índice")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    ingest_directory(args.directory, args.index_path, chunk_size=args.chunk_size,
+                     overlap=args.overlap, batch_size=args.batch_size, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Índice invertido para el RAG Chatbot
+====================================
+Tokeniza título y contenido una sola vez al cargar los documentos y guarda
+posting lists (término → documentos) con la frecuencia por campo.
+
+Modos de scoring:
+- "keyword": mismo esquema y mismo ranking que el demo original (+2
+  contenido / +5 título por cada palabra de la query contenida como
+  substring en el campo). Las palabras se resuelven contra el vocabulario
+  del índice: un término que contiene la palabra (p.ej. "automat" →
+  "automation") aporta sus postings; si la palabra trae puntuación
+  ("rag?", "¿qué") los candidatos se verifican sobre el texto.
+- "bm25": BM25 con pesos por campo (título pesa más que contenido) sobre
+  tokens completos.
+"""
+
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+CONTENT_WEIGHT = 2
+TITLE_WEIGHT = 5
+MAX_CACHED_FRAGMENTS = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normaliza a minúsculas y separa en palabras (sin puntuación).
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Índice invertido construido una vez sobre la lista de documentos.
+    Cada posting guarda (frecuencia en título, frecuencia en contenido).
+    """
+
+    SCORING_MODES = ("keyword", "bm25")
+
+    def __init__(self, documents: List[Dict], scoring: str = "keyword",
+                 k1: float = 1.2, b: float = 0.75):
+        if scoring not in self.SCORING_MODES:
+            raise ValueError(f"Scoring desconocido: {scoring!r} (opciones: {self.SCORING_MODES})")
+
+        self.documents = documents
+        self.scoring = scoring
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        self._terms_by_fragment: Dict[str, List[str]] = {}
+        self._build()
+
+    def _build(self):
+        for ordinal, doc in enumerate(self.documents):
+            title_tokens = tokenize(doc['title'])
+            content_tokens = tokenize(doc['content'])
+
+            frequencies: Dict[str, List[int]] = {}
+            for token in title_tokens:
+                frequencies.setdefault(token, [0, 0])[0] += 1
+            for token in content_tokens:
+                frequencies.setdefault(token, [0, 0])[1] += 1
+
+            for token, (title_tf, content_tf) in frequencies.items():
+                self.postings.setdefault(token, {})[ordinal] = (title_tf, content_tf)
+
+            # Longitud ponderada del documento (para normalizar en BM25)
+            self.doc_lengths.append(
+                TITLE_WEIGHT * len(title_tokens) + CONTENT_WEIGHT * len(content_tokens)
+            )
+
+        total = sum(self.doc_lengths)
+        self.avg_doc_length = total / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _iter_postings(self, token: str, candidates: Optional[set]) -> Iterable[Tuple[int, Tuple[int, int]]]:
+        """
+        Postings del término, restringidas a los candidatos si hay filtro.
+        Se recorre la más corta de las dos listas.
+        """
+        postings = self.postings.get(token, {})
+        if candidates is None:
+            return postings.items()
+        if len(candidates) < len(postings):
+            return ((ordinal, postings[ordinal]) for ordinal in candidates if ordinal in postings)
+        return ((ordinal, tf) for ordinal, tf in postings.items() if ordinal in candidates)
+
+    def _terms_containing(self, fragment: str) -> List[str]:
+        """
+        Términos del vocabulario que contienen `fragment` (cacheado por fragmento).
+        """
+        terms = self._terms_by_fragment.get(fragment)
+        if terms is None:
+            if len(self._terms_by_fragment) >= MAX_CACHED_FRAGMENTS:
+                self._terms_by_fragment.clear()
+            terms = [term for term in self.postings if fragment in term]
+            self._terms_by_fragment[fragment] = terms
+        return terms
+
+    def _keyword_matches(self, keyword: str, candidates: Optional[set]) -> Dict[int, Tuple[bool, bool]]:
+        """
+        ordinal → (keyword en título, keyword en contenido), con la semántica
+        de substring del demo original (`keyword in content.lower()`).
+        """
+        fragments = TOKEN_PATTERN.findall(keyword)
+        if not fragments:
+            # Solo puntuación: no hay término que usar como ancla
+            ordinals = candidates if candidates is not None else range(len(self.documents))
+            return self._verify_keyword(keyword, ordinals)
+
+        # Una palabra sin puntuación cae siempre dentro de un único token: los
+        # postings de los términos que la contienen son el resultado exacto
+        anchor = max(fragments, key=len)
+        matches: Dict[int, List[bool]] = {}
+        for term in self._terms_containing(anchor):
+            for ordinal, (title_tf, content_tf) in self._iter_postings(term, candidates):
+                found = matches.setdefault(ordinal, [False, False])
+                found[0] = found[0] or title_tf > 0
+                found[1] = found[1] or content_tf > 0
+        if keyword == anchor:
+            return {ordinal: (title, content) for ordinal, (title, content) in matches.items()}
+        return self._verify_keyword(keyword, matches)
+
+    def _verify_keyword(self, keyword: str, ordinals: Iterable[int]) -> Dict[int, Tuple[bool, bool]]:
+        result = {}
+        for ordinal in ordinals:
+            doc = self.documents[ordinal]
+            found = (keyword in doc['title'].lower(), keyword in doc['content'].lower())
+            if any(found):
+                result[ordinal] = found
+        return result
+
+    def _keyword_scores(self, keywords: Iterable[str], candidates: Optional[set] = None) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for keyword in keywords:
+            for ordinal, (in_title, in_content) in self._keyword_matches(keyword, candidates).items():
+                score = 0
+                if in_content:
+                    score += CONTENT_WEIGHT
+                if in_title:
+                    score += TITLE_WEIGHT
+                scores[ordinal] = scores.get(ordinal, 0) + score
+        return scores
+
+    def _bm25_scores(self, query_tokens: Iterable[str], candidates: Optional[set] = None) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        n_docs = len(self.documents)
+        for token in query_tokens:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            for ordinal, (title_tf, content_tf) in self._iter_postings(token, candidates):
+                # BM25F simplificado: frecuencia combinada con pesos por campo
+                tf = TITLE_WEIGHT * title_tf + CONTENT_WEIGHT * content_tf
+                norm = 1 - self.b + self.b * self.doc_lengths[ordinal] / (self.avg_doc_length or 1)
+                score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                scores[ordinal] = scores.get(ordinal, 0.0) + score
+        return scores
+
+    def search(self, query: str, top_k: int = 2,
+               candidates: Optional[Sequence[int]] = None) -> List[Tuple[float, int]]:
+        """
+        Retorna [(score, ordinal)] de los top_k documentos con score > 0.
+        Solo recorre las posting lists de los términos de la query y, si se
+        entregan `candidates` (filtro de metadata), solo puntúa esos ordinales.
+        A igual score se respeta el orden de carga de los documentos.
+        """
+        candidate_set = set(candidates) if candidates is not None else None
+        if self.scoring == "bm25":
+            scores = self._bm25_scores(tokenize(query), candidate_set)
+        else:
+            # Mismas "palabras" que el demo original: split por espacios
+            scores = self._keyword_scores(query.lower().split(), candidate_set)
+
+        best = heapq.nsmallest(
+            top_k,
+            ((score, ordinal) for ordinal, score in scores.items() if score > 0),
+            key=lambda item: (-item[0], item[1])
+        )
+        return best
+
+    def search_batch(self, queries: List[str], top_k: int = 2,
+                     candidates: Optional[Sequence[int]] = None) -> List[List[Tuple[float, int]]]:
+        """
+        Misma interfaz que el backend vectorial: una lista de resultados por query.
+        """
+        return [self.search(query, top_k=top_k, candidates=candidates) for query in queries]
@@ -0,0 +1,116 @@
+"""
+Cache de consultas para el RAG Chatbot
+======================================
+Cache acotado para el pipeline de chat(), con clave (query normalizada,
+filtro de metadata, versión del índice):
+
+- LRU: al superar `maxsize` se descarta la entrada usada hace más tiempo.
+- TTL: opcionalmente, las entradas expiran `ttl` segundos después de guardarse.
+- Invalidación: si la versión del índice cambia (altas, bajas,
+  compactación) el cache se vacía solo en el siguiente acceso.
+
+Expone contadores de hits, misses y evictions para dimensionarlo.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """
+    Minúsculas y espacios colapsados: "  ¿Qué es  RAG? " == "¿qué es rag?".
+    """
+    return " ".join(query.lower().split())
+
+
+def cache_key(query: str, where: Optional[Dict] = None) -> Hashable:
+    """
+    Clave del cache: query normalizada + filtro serializado de forma canónica.
+    """
+    if not where:
+        return normalize_query(query)
+    return normalize_query(query), json.dumps(where, sort_keys=True, ensure_ascii=False)
+
+
+class QueryCache:
+    """
+    Cache LRU con TTL opcional, seguro para uso desde varios threads.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize debe ser mayor que 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0       # por tamaño (LRU)
+        self.expirations = 0     # por TTL
+        self.invalidations = 0   # por cambio de versión del índice
+
+    def _check_version(self, version: int):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+
+    def get(self, query: str, version: int, where: Optional[Dict] = None) -> Optional[Any]:
+        key = cache_key(query, where)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl is not None and self.clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, query: str, version: int, value: Any, where: Optional[Dict] = None):
+        key = cache_key(query, where)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
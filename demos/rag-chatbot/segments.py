@@ -0,0 +1,419 @@
+"""
+Índice segmentado con actualizaciones incrementales
+===================================================
+Permite agregar, reemplazar y eliminar documentos por `id` sin reconstruir
+todo el índice, mientras se siguen respondiendo consultas:
+
+- Segmentos append-only: cada lote de altas crea un segmento nuevo e
+  inmutable con su propio retriever (inverted o vector).
+- Tombstones: borrar o reemplazar un documento solo lo marca como muerto
+  en su segmento; las búsquedas lo filtran.
+- Compactación: fusiona segmentos y descarta tombstones, en un thread de
+  background cuando hay demasiados segmentos.
+
+El mapeo id → ubicación del segmento base puede venir persistido en el
+índice en disco (index_store.StoredIds): abrir un índice grande no
+decodifica sus documentos ni copia el mapeo al heap.
+
+Las consultas leen un snapshot inmutable (segmentos + tombstones) tomado
+con una sola lectura de atributo, así que nunca ven un estado a medias.
+Las escrituras construyen el snapshot nuevo bajo un lock y lo publican
+de forma atómica (copy-on-write).
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from filters import MetadataIndex
+
+
+class Segment:
+    """
+    Segmento inmutable: un retriever construido sobre un grupo de documentos.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, retriever):
+        self.uid = next(self._ids)
+        self.retriever = retriever
+        self.documents = retriever.documents
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._metadata_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        """
+        Índice secundario de metadata, construido en el primer filtro
+        (así abrir un índice grande en disco no paga este costo si no se filtra).
+        """
+        if self._metadata_index is None:
+            with self._metadata_lock:
+                if self._metadata_index is None:
+                    self._metadata_index = MetadataIndex(self.documents)
+        return self._metadata_index
+
+
+class Locations:
+    """
+    Mapeo id → (segment uid, ordinal) de la versión viva de cada documento.
+    Los ids del segmento base se resuelven contra `base_ids` (mapeo
+    persistido, ver index_store.StoredIds); los cambios posteriores viven en
+    `overlay` (None = id del base eliminado). copy() solo copia el overlay.
+    """
+
+    def __init__(self, overlay: Optional[Dict] = None, base_uid: Optional[int] = None,
+                 base_ids=None, count: Optional[int] = None):
+        self.overlay = overlay if overlay is not None else {}
+        self.base_uid = base_uid
+        self.base_ids = base_ids
+        if count is None:
+            count = len(base_ids) if base_ids is not None else 0
+            count += sum(1 for location in self.overlay.values() if location is not None)
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, doc_id) -> bool:
+        return self.get(doc_id) is not None
+
+    def _in_base(self, doc_id) -> bool:
+        return self.base_ids is not None and self.base_ids.get(doc_id) is not None
+
+    def get(self, doc_id, default=None) -> Optional[Tuple[int, int]]:
+        if doc_id in self.overlay:
+            location = self.overlay[doc_id]
+            return default if location is None else location
+        if self.base_ids is not None:
+            ordinal = self.base_ids.get(doc_id)
+            if ordinal is not None:
+                return (self.base_uid, ordinal)
+        return default
+
+    def __setitem__(self, doc_id, location: Tuple[int, int]):
+        if self.get(doc_id) is None:
+            self._count += 1
+        self.overlay[doc_id] = location
+
+    def pop(self, doc_id, default=None) -> Optional[Tuple[int, int]]:
+        location = self.get(doc_id)
+        if location is None:
+            return default
+        if self._in_base(doc_id):
+            self.overlay[doc_id] = None
+        else:
+            del self.overlay[doc_id]
+        self._count -= 1
+        return location
+
+    def copy(self) -> 'Locations':
+        return Locations(dict(self.overlay), self.base_uid, self.base_ids, self._count)
+
+    def items(self) -> Iterator[Tuple[object, Tuple[int, int]]]:
+        if self.base_ids is not None:
+            for doc_id, ordinal in self.base_ids:
+                if doc_id not in self.overlay:
+                    yield doc_id, (self.base_uid, ordinal)
+        for doc_id, location in self.overlay.items():
+            if location is not None:
+                yield doc_id, location
+
+    def remap(self, remap: Dict[Tuple[int, int], Tuple[int, int]], merged_uids: set) -> 'Locations':
+        """
+        Copia con las ubicaciones de los segmentos fusionados traducidas al
+        segmento nuevo. Si se fusiona el segmento base, el mapeo pasa a ser
+        un dict completo.
+        """
+        if self.base_ids is not None and self.base_uid not in merged_uids:
+            overlay = {doc_id: None if location is None else remap.get(location, location)
+                       for doc_id, location in self.overlay.items()}
+            return Locations(overlay, self.base_uid, self.base_ids, self._count)
+        return Locations({doc_id: remap.get(location, location) for doc_id, location in self.items()})
+
+
+class Snapshot:
+    """
+    Vista consistente del índice en un momento dado.
+    """
+
+    def __init__(self, segments: Tuple[Segment, ...], tombstones: frozenset,
+                 locations: Locations, version: int):
+        self.segments = segments
+        self.tombstones = tombstones          # {(segment uid, ordinal)}
+        self.locations = locations            # id → (segment uid, ordinal) de la versión viva
+        self.version = version
+        self.dead_per_segment: Dict[int, int] = {}
+        for uid, _ in tombstones:
+            self.dead_per_segment[uid] = self.dead_per_segment.get(uid, 0) + 1
+
+
+class SegmentedIndex:
+    """
+    Índice compuesto por segmentos append-only con tombstones.
+    `retriever_factory(documents)` construye el retriever de cada segmento.
+    `base_ids` (opcional) es el mapeo id → ordinal persistido de los
+    documentos de `base_retriever` (ver index_store.StoredIds).
+    """
+
+    def __init__(self, retriever_factory: Callable, base_retriever=None, base_ids=None,
+                 max_segments: int = 8, background_compaction: bool = True):
+        self.retriever_factory = retriever_factory
+        self.max_segments = max_segments
+        self.background_compaction = background_compaction
+        self._write_lock = threading.Lock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        segments: Tuple[Segment, ...] = ()
+        locations = Locations()
+        tombstones = set()
+        if base_retriever is not None:
+            base = Segment(base_retriever)
+            segments = (base,)
+            if base_ids is not None:
+                locations = Locations(base_uid=base.uid, base_ids=base_ids)
+                tombstones.update((base.uid, ordinal) for ordinal in base_ids.duplicates)
+            else:
+                for ordinal, doc in enumerate(base.documents):
+                    previous = locations.get(doc['id'])
+                    if previous is not None:
+                        tombstones.add(previous)
+                    locations[doc['id']] = (base.uid, ordinal)
+
+        self._snapshot = Snapshot(segments, frozenset(tombstones), locations, version=0)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        """
+        Versión del índice: cambia con cada alta, baja o compactación.
+        """
+        return self._snapshot.version
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._snapshot.segments)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.locations)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._snapshot.locations
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        snapshot = self._snapshot
+        location = snapshot.locations.get(doc_id)
+        if location is None:
+            return None
+        segment = next(s for s in snapshot.segments if s.uid == location[0])
+        return segment.documents[location[1]]
+
+    def iter_documents(self) -> Iterator[Dict]:
+        """
+        Documentos vivos en orden de inserción (segmento, ordinal).
+        """
+        snapshot = self._snapshot
+        for segment in snapshot.segments:
+            for ordinal, doc in enumerate(segment.documents):
+                if (segment.uid, ordinal) not in snapshot.tombstones:
+                    yield doc
+
+    def _search_snapshot(self, snapshot: Snapshot, segment_results, top_k: int) -> List[Tuple[float, Dict]]:
+        candidates = []
+        for position, (segment, results) in enumerate(zip(snapshot.segments, segment_results)):
+            for score, ordinal in results:
+                if (segment.uid, ordinal) in snapshot.tombstones:
+                    continue
+                candidates.append((score, position, ordinal))
+
+        best = heapq.nsmallest(top_k, candidates, key=lambda c: (-c[0], c[1], c[2]))
+        return [(score, snapshot.segments[position].documents[ordinal])
+                for score, position, ordinal in best]
+
+    def _candidates(self, segment: Segment, where: Optional[Dict]) -> Optional[List[int]]:
+        if where is None:
+            return None
+        return segment.metadata_index.candidates(where)
+
+    def search(self, query: str, top_k: int = 2, where: Optional[Dict] = None) -> List[Tuple[float, Dict]]:
+        """
+        Retorna [(score, documento)] combinando el top-k de cada segmento.
+        A cada segmento se le piden k + sus tombstones para compensar los
+        resultados muertos que se filtran. Con `where` (ver filters.py) cada
+        segmento solo puntúa los candidatos que cumplen el filtro.
+        """
+        snapshot = self._snapshot
+        segment_results = []
+        for segment in snapshot.segments:
+            candidates = self._candidates(segment, where)
+            if candidates is not None and not candidates:
+                segment_results.append([])
+                continue
+            segment_results.append(segment.retriever.search(
+                query, top_k=top_k + snapshot.dead_per_segment.get(segment.uid, 0), candidates=candidates
+            ))
+        return self._search_snapshot(snapshot, segment_results, top_k)
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 2,
+                     where: Optional[Dict] = None) -> List[List[Tuple[float, Dict]]]:
+        snapshot = self._snapshot
+        per_segment = []
+        for segment in snapshot.segments:
+            candidates = self._candidates(segment, where)
+            if candidates is not None and not candidates:
+                per_segment.append([[] for _ in queries])
+                continue
+            per_segment.append(segment.retriever.search_batch(
+                queries, top_k=top_k + snapshot.dead_per_segment.get(segment.uid, 0), candidates=candidates
+            ))
+        return [
+            self._search_snapshot(snapshot, [results[i] for results in per_segment], top_k)
+            for i in range(len(queries))
+        ]
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def add_documents(self, documents: List[Dict]) -> int:
+        """
+        Agrega (o reemplaza, si el id ya existe) documentos en un segmento nuevo.
+        El retriever del segmento se construye fuera del lock.
+        """
+        if not documents:
+            return self.version
+
+        # Dentro del mismo lote gana la última versión de cada id
+        latest = {doc['id']: doc for doc in documents}
+        segment = Segment(self.retriever_factory(list(latest.values())))
+
+        with self._write_lock:
+            snapshot = self._snapshot
+            tombstones = set(snapshot.tombstones)
+            locations = snapshot.locations.copy()
+            for ordinal, doc in enumerate(segment.documents):
+                previous = locations.get(doc['id'])
+                if previous is not None:
+                    tombstones.add(previous)
+                locations[doc['id']] = (segment.uid, ordinal)
+
+            self._snapshot = Snapshot(snapshot.segments + (segment,), frozenset(tombstones),
+                                      locations, snapshot.version + 1)
+
+        self._maybe_compact()
+        return self.version
+
+    def delete_documents(self, doc_ids: List[str]) -> int:
+        """
+        Marca documentos como eliminados (tombstones). Retorna cuántos existían.
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            tombstones = set(snapshot.tombstones)
+            locations = snapshot.locations.copy()
+            deleted = 0
+            for doc_id in doc_ids:
+                location = locations.pop(doc_id, None)
+                if location is not None:
+                    tombstones.add(location)
+                    deleted += 1
+
+            if deleted:
+                self._snapshot = Snapshot(snapshot.segments, frozenset(tombstones),
+                                          locations, snapshot.version + 1)
+        return deleted
+
+    # ------------------------------------------------------------------
+    # Compactación
+    # ------------------------------------------------------------------
+
+    def _maybe_compact(self):
+        if self.segment_count <= self.max_segments:
+            return
+        if not self.background_compaction:
+            self.compact()
+            return
+        if self._compaction_thread is None or not self._compaction_thread.is_alive():
+            self._compaction_thread = threading.Thread(target=self._background_compact, daemon=True)
+            self._compaction_thread.start()
+
+    def _background_compact(self):
+        # Las altas que llegan durante una compactación pueden volver a
+        # superar el límite, por eso se repite hasta quedar por debajo
+        while self.segment_count > self.max_segments:
+            if not self.compact():
+                break
+
+    def compact(self, full: bool = False) -> int:
+        """
+        Fusiona los segmentos en uno solo descartando los tombstones.
+        Por defecto conserva el segmento base (el más grande, p.ej. el índice
+        en disco) salvo que tenga más de un 30% de documentos muertos o que
+        se pida `full=True`. Las escrituras concurrentes siguen permitidas:
+        al publicar se trasladan los tombstones que llegaron mientras tanto.
+        Retorna la cantidad de segmentos fusionados.
+        """
+        with self._compaction_lock:
+            snapshot = self._snapshot
+            segments = list(snapshot.segments)
+            if segments and not full:
+                base = segments[0]
+                dead_ratio = snapshot.dead_per_segment.get(base.uid, 0) / max(len(base), 1)
+                if dead_ratio <= 0.3:
+                    segments = segments[1:]
+            if len(segments) < 2 and not any(snapshot.dead_per_segment.get(s.uid) for s in segments):
+                return 0
+
+            merged_docs: List[Dict] = []
+            origin: List[Tuple[int, int]] = []
+            for segment in segments:
+                for ordinal, doc in enumerate(segment.documents):
+                    if (segment.uid, ordinal) not in snapshot.tombstones:
+                        merged_docs.append(doc)
+                        origin.append((segment.uid, ordinal))
+
+            # Construcción costosa fuera del lock de escritura
+            merged = Segment(self.retriever_factory(merged_docs))
+            remap = {old: (merged.uid, new) for new, old in enumerate(origin)}
+            merged_uids = {segment.uid for segment in segments}
+
+            with self._write_lock:
+                current = self._snapshot
+                tombstones = set()
+                for location in current.tombstones:
+                    if location[0] not in merged_uids:
+                        tombstones.add(location)
+                    elif location in remap:
+                        # Tombstone llegado durante la compactación
+                        tombstones.add(remap[location])
+
+                locations = current.locations.remap(remap, merged_uids)
+
+                new_segments = []
+                inserted = False
+                for segment in current.segments:
+                    if segment.uid in merged_uids:
+                        if not inserted:
+                            new_segments.append(merged)
+                            inserted = True
+                    else:
+                        new_segments.append(segment)
+
+                self._snapshot = Snapshot(tuple(new_segments), frozenset(tombstones),
+                                          locations, current.version + 1)
+
+            return len(segments)
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
@@ -0,0 +1,275 @@
+"""
+Servidor local para el RAG Chatbot
+==================================
+Sirve SimpleRAGChatbot.achat() a muchos clientes concurrentes desde un solo
+proceso, sin dependencias externas (solo asyncio):
+
+- HTTP:  POST /chat  {"query": "...", "session_id": "u1", "where": {...}}  → interacción JSON
+         GET  /health, GET /stats (cache y sesiones)
+- stdio: una petición JSON por línea en stdin, una respuesta JSON por línea
+         en stdout (las peticiones se procesan en paralelo; usar "request_id"
+         para correlacionar respuestas).
+
+Con "stream": true en la petición se envían los eventos de astream_chat()
+(context, token, done) a medida que se producen: en HTTP como NDJSON con
+Transfer-Encoding: chunked, en stdio como una línea por evento.
+
+Uso:
+    python server.py --http 8000
+    python server.py --stdio --stub-latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from chatbot import SimpleRAGChatbot
+from filters import validate_where
+from generators import StubLLMGenerator
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ChatServer:
+    """
+    Adaptador HTTP/stdio sobre un SimpleRAGChatbot compartido.
+    """
+
+    def __init__(self, bot: SimpleRAGChatbot):
+        self.bot = bot
+        self.requests_served = 0
+
+    def _parse_payload(self, payload: Dict) -> Tuple[str, str, Optional[Dict]]:
+        if not isinstance(payload, dict):
+            raise ValueError("La petición debe ser un objeto JSON")
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("El campo 'query' es obligatorio")
+        where = payload.get("where")
+        if where is not None:
+            # Se valida antes de responder: en streaming, un error después de
+            # enviar los headers cortaría el body chunked
+            validate_where(where)
+        return query, str(payload.get("session_id") or "default"), where
+
+    async def handle_payload(self, payload: Dict) -> Dict:
+        query, session_id, where = self._parse_payload(payload)
+
+        interaction = await self.bot.achat(query, session_id=session_id, where=where)
+        self.requests_served += 1
+        if "request_id" in payload:
+            interaction = dict(interaction, request_id=payload["request_id"])
+        return interaction
+
+    async def stream_payload(self, payload: Dict) -> AsyncIterator[Dict]:
+        query, session_id, where = self._parse_payload(payload)
+
+        async for event in self.bot.astream_chat(query, session_id=session_id, where=where):
+            if "request_id" in payload:
+                event = dict(event, request_id=payload["request_id"])
+            yield event
+        self.requests_served += 1
+
+    def stats(self) -> Dict:
+        return {
+            "requests_served": self.requests_served,
+            "sessions": len(self.bot.sessions),
+            "index_version": self.bot.index.version,
+            "documents": len(self.bot.index),
+            "cache": self.bot.cache_stats()
+        }
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode('latin-1').split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Body demasiado grande")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path == "/chat":
+            try:
+                payload = json.loads(body or b"{}")
+                return 200, await self.handle_payload(payload)
+            except (ValueError, json.JSONDecodeError) as e:
+                return 400, {"error": str(e)}
+        return 404, {"error": f"Ruta no encontrada: {method} {path}"}
+
+    def _streaming_request(self, method: str, path: str, body: bytes) -> Optional[Dict]:
+        if method != "POST" or path != "/chat":
+            return None
+        try:
+            payload = json.loads(body or b"{}")
+            self._parse_payload(payload)
+        except (ValueError, json.JSONDecodeError):
+            return None
+        return payload if payload.get("stream") else None
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, payload: Dict, keep_alive: bool):
+        """
+        Respuesta NDJSON chunked: cada evento se envía (y drena) apenas existe.
+        """
+        writer.write(
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/x-ndjson; charset=utf-8\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+        )
+        async for event in self.stream_payload(payload):
+            line = (json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8')
+            writer.write(f"{len(line):X}\r\n".encode('latin-1') + line + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Conexión HTTP/1.1 con keep-alive: varias peticiones por conexión.
+        """
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError):
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+
+                stream_payload = self._streaming_request(method, path, body)
+                if stream_payload is not None:
+                    await self._write_stream(writer, stream_payload, keep_alive)
+                    if not keep_alive:
+                        break
+                    continue
+
+                status, data = await self._route(method, path, body)
+                payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve_http(self, host: str = "127.0.0.1", port: int = 8000):
+        server = await asyncio.start_server(self.handle_http, host, port)
+        print(f"🌐 Servidor RAG escuchando en http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    # ------------------------------------------------------------------
+    # stdio
+    # ------------------------------------------------------------------
+
+    async def serve_stdio(self, stdin=None, stdout=None):
+        """
+        Lee peticiones JSON por línea y responde en paralelo (JSON Lines).
+        """
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        loop = asyncio.get_running_loop()
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def emit(record: Dict):
+            async with write_lock:
+                stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+                stdout.flush()
+
+        async def respond(line: str):
+            try:
+                payload = json.loads(line)
+                if isinstance(payload, dict) and payload.get("stream"):
+                    async for event in self.stream_payload(payload):
+                        await emit(event)
+                    return
+                result = await self.handle_payload(payload)
+            except (ValueError, json.JSONDecodeError) as e:
+                result = {"error": str(e)}
+            await emit(result)
+
+        while True:
+            line = await loop.run_in_executor(None, stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local del RAG Chatbot")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--http", type=int, metavar="PORT", help="Servir HTTP en el puerto indicado")
+    mode.add_argument("--stdio", action="store_true", help="Servir JSON Lines por stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--backend", default="inverted", choices=["inverted", "vector"])
+    parser.add_argument("--index-path", default=None)
+    parser.add_argument("--stub-latency", type=float, default=None,
+                        help="Usar un LLM falso con esta latencia (segundos)")
+    args = parser.parse_args()
+
+    generator = StubLLMGenerator(args.stub_latency) if args.stub_latency is not None else None
+    # Los mensajes de arranque del bot no deben mezclarse con las respuestas en stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = SimpleRAGChatbot(backend=args.backend, index_path=args.index_path, generator=generator)
+    server = ChatServer(bot)
+
+    try:
+        if args.stdio:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_http(args.host, args.http))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Tests de los filtros de metadata: un filtro mal formado es ValueError.
+
+    python -m pytest test_filters.py
+"""
+
+import asyncio
+import contextlib
+import io
+import unittest
+
+from chatbot import SimpleRAGChatbot
+from filters import validate_where
+
+BAD_FILTERS = [
+    {"category": {"ai", "databases"}},
+    {1: "x", "a": "b"},
+    {"category": ["ai"]},
+    {"category": {"$in": [["ai"]]}},
+    {"$or": {"category": "ai"}},
+    {"category": {"$gt": 1}},
+]
+
+
+class ValidateWhereTest(unittest.TestCase):
+
+    def test_valid_filters(self):
+        validate_where({"category": "ai"})
+        validate_where({"category": {"$in": ["ai", "databases"]}, "language": {"$eq": "general"}})
+        validate_where({"$or": [{"category": "ai"}, {"$and": [{"language": "python"}]}]})
+
+    def test_invalid_filters(self):
+        for where in BAD_FILTERS:
+            with self.subTest(where=where):
+                with self.assertRaises(ValueError):
+                    validate_where(where)
+
+
+class ChatbotFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.bot = SimpleRAGChatbot()
+
+    def tearDown(self):
+        self.bot.close()
+
+    def test_chat_rejects_bad_filter_before_cache(self):
+        for where in BAD_FILTERS:
+            with self.subTest(where=where):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    with self.assertRaises(ValueError):
+                        self.bot.chat("rust", where=where)
+
+    def test_achat_rejects_bad_filter(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(self.bot.achat("rust", where={"category": {"a", "b"}}))
+
+    def test_chat_with_valid_filter(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            interaction = self.bot.chat("¿Qué es RAG?", where={"category": "ai"})
+        self.assertTrue(interaction["docs_used"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests del índice en disco: un índice a medio escribir no debe abrirse.
+
+    python -m pytest test_index_store.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import ingestion
+from index_store import META_FILE, IndexStoreWriter, open_store, write_store
+from vector_index import HashingEmbedder
+
+
+def make_docs(n):
+    return [{"id": f"doc{i}", "title": f"Documento {i}", "content": f"contenido {i}",
+             "metadata": {"category": "test"}} for i in range(n)]
+
+
+class IndexStoreWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_complete_index_opens(self):
+        self.assertEqual(write_store(self.path, make_docs(3)), 3)
+        store = open_store(self.path)
+        try:
+            self.assertEqual(len(store), 3)
+            self.assertEqual(store.documents[2]["id"], "doc2")
+        finally:
+            store.close()
+
+    def test_failed_write_leaves_no_index(self):
+        with self.assertRaises(RuntimeError):
+            with IndexStoreWriter(self.path) as writer:
+                writer.add_batch(make_docs(2))
+                raise RuntimeError("fallo a mitad de la escritura")
+
+        self.assertFalse(os.path.exists(os.path.join(self.path, META_FILE)))
+        self.assertEqual(os.listdir(self.path), [])
+        with self.assertRaises(FileNotFoundError):
+            open_store(self.path)
+
+    def test_failed_rewrite_discards_previous_index(self):
+        write_store(self.path, make_docs(3))
+        with self.assertRaises(RuntimeError):
+            with IndexStoreWriter(self.path) as writer:
+                writer.add_batch(make_docs(1))
+                raise RuntimeError("fallo a mitad de la escritura")
+
+        with self.assertRaises(FileNotFoundError):
+            open_store(self.path)
+
+    def test_failed_ingestion_leaves_no_index(self):
+        embedder = HashingEmbedder()
+
+        def failing_chunks(*args, **kwargs):
+            for doc in make_docs(2):
+                yield doc, np.zeros(embedder.dim, dtype=np.float32)
+            raise OSError("archivo ilegible")
+
+        with mock.patch.object(ingestion, "iter_embedded_chunks", failing_chunks):
+            with self.assertRaises(OSError):
+                ingestion.ingest_directory(self.tmp.name, self.path, batch_size=1, embedder=embedder)
+
+        with self.assertRaises(FileNotFoundError):
+            open_store(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
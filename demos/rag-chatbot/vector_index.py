@@ -0,0 +1,140 @@
+"""
+Backend vectorial para el RAG Chatbot
+=====================================
+Guarda los embeddings de todos los documentos en una sola matriz float32
+contigua (n_docs x dim) y responde consultas con un producto
+matriz-vector + argpartition para el top-k.
+
+Incluye HashingEmbedder: embeddings deterministas basados en n-gramas de
+caracteres hasheados, sin red ni descarga de modelos (ideal para tests).
+En producción: reemplazar por Sentence Transformers u Ollama embeddings.
+
+Requiere: numpy
+"""
+
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Embedder local y determinista: n-gramas de caracteres → buckets via
+    crc32 (estable entre procesos, a diferencia de hash()), con signo para
+    reducir colisiones, y normalización L2 para usar producto punto = coseno.
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (3, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _ngram_buckets(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        text = f" {' '.join(text.lower().split())} "
+        hashes = []
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, max_n + 1):
+            for i in range(len(text) - n + 1):
+                hashes.append(zlib.crc32(text[i:i + n].encode('utf-8')))
+
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        buckets = (hashes % self.dim).astype(np.intp)
+        # El bit más alto decide el signo del aporte
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+        return buckets, signs
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Retorna una matriz float32 (len(texts) x dim) con filas normalizadas.
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, signs = self._ngram_buckets(text)
+            if len(buckets):
+                matrix[row] = np.bincount(buckets, weights=signs, minlength=self.dim)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed([query])[0]
+
+
+def document_text(doc: Dict) -> str:
+    """
+    Texto que se embebe por documento: título + contenido.
+    """
+    return f"{doc['title']}\n{doc['content']}"
+
+
+class VectorIndex:
+    """
+    Índice vectorial sobre una matriz de embeddings float32 contigua.
+    Si no se entrega `matrix`, se calcula con el embedder al construir.
+    """
+
+    def __init__(self, documents: Sequence[Dict], embedder: Optional[HashingEmbedder] = None,
+                 matrix: Optional[np.ndarray] = None, min_score: float = 0.0):
+        self.documents = documents
+        self.embedder = embedder or HashingEmbedder()
+        self.min_score = min_score
+
+        if matrix is None:
+            matrix = self.embedder.embed([document_text(doc) for doc in documents])
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _top_k(self, scores: np.ndarray, top_k: int,
+               ordinals: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        n = scores.shape[0]
+        if n == 0 or top_k <= 0:
+            return []
+
+        if top_k < n:
+            positions = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            positions = np.arange(n)
+
+        # `ordinals` mapea posiciones de la submatriz filtrada al ordinal real
+        labels = positions if ordinals is None else ordinals[positions]
+
+        # Orden final solo sobre los k candidatos (score desc, ordinal asc)
+        order = np.lexsort((labels, -scores[positions]))
+        return [
+            (float(scores[positions[i]]), int(labels[i]))
+            for i in order
+            if scores[positions[i]] > self.min_score
+        ]
+
+    def _rows(self, candidates: Optional[Sequence[int]]):
+        """
+        Matriz a puntuar: completa, o solo las filas de los candidatos del filtro.
+        """
+        if candidates is None:
+            return self.matrix, None
+        ordinals = np.asarray(candidates, dtype=np.intp)
+        return self.matrix[ordinals], ordinals
+
+    def search(self, query: str, top_k: int = 2,
+               candidates: Optional[Sequence[int]] = None) -> List[Tuple[float, int]]:
+        """
+        Retorna [(score coseno, ordinal)] con un único producto matriz-vector.
+        """
+        matrix, ordinals = self._rows(candidates)
+        query_vector = self.embedder.embed_query(query)
+        scores = matrix @ query_vector
+        return self._top_k(scores, top_k, ordinals)
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 2,
+                     candidates: Optional[Sequence[int]] = None) -> List[List[Tuple[float, int]]]:
+        """
+        Resuelve varias queries con un único producto matriz-matriz.
+        """
+        matrix, ordinals = self._rows(candidates)
+        query_matrix = self.embedder.embed(queries)
+        scores = query_matrix @ matrix.T
+        return [self._top_k(row, top_k, ordinals) for row in scores]
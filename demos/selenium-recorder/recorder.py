@@ -6,22 +6,26 @@ Auto-generates robust Selenium code by recording user interactions.
 
 Key Features:
 - 8 fallback selector strategies (ID → Name → XPath → CSS → Text → Position)
+- In-page event recorder (capture-phase click/input/change listeners, batched draining)
 - Automatic popup detection (Material UI, Bootstrap, generic modals)
 - Self-healing code generation with automatic fallbacks
-- Screenshot capture for debugging
+- Background screenshot capture for debugging (per-session folder, non-blocking)
 - Generates production-ready Python code
 
 Author: Manuel Medina
 License: MIT
 """
 
+import base64
+import hashlib
+import io
 import json
+import queue
 import time
 import threading
 from datetime import datetime
 from pathlib import Path
 import keyboard
-import mouse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -29,16 +33,407 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.edge.options import Options
 
 
+# In-page recorder: capture-phase listeners build the selectors in the browser
+# and buffer events in a page-side queue that Python drains in batches.
+RECORDER_SCRIPT = r"""
+(function () {
+    if (window.__seleniumRecorder) { return; }
+
+    var STORAGE_KEY = '__seleniumRecorderQueue';
+    var INTERACTIVE = 'a, button, input, select, textarea, label, [role="button"], [onclick]';
+    var NON_TEXT_INPUTS = ['checkbox', 'radio', 'button', 'submit', 'reset', 'file', 'image', 'range', 'color'];
+    var POPUP_SELECTOR = '[id*="mat-dialog"], .modal.show, [role="dialog"], [role="alertdialog"], [role="alert"], dialog[open]';
+    var queue = [];
+    var lastInput = null;
+    var labelControl = null;  // control about to get a label's synthetic click
+    var reportedPopups = new WeakSet();
+
+    // Events queued right before a navigation survive it (same origin)
+    try {
+        queue = JSON.parse(sessionStorage.getItem(STORAGE_KEY) || '[]');
+        sessionStorage.removeItem(STORAGE_KEY);
+    } catch (e) {}
+
+    function classList(element) {
+        var value = element.getAttribute && element.getAttribute('class');
+        return value ? value.split(/\s+/).filter(function (c) { return c.length > 0; }) : [];
+    }
+
+    function describe(element) {
+        var tag = element.tagName.toLowerCase();
+        var classes = classList(element);
+        var text = (element.textContent || '').trim();
+        var selectors = [];
+
+        // 1. ID selector (highest priority)
+        if (element.id) {
+            selectors.push('id:' + element.id);
+        }
+
+        // 2. Name attribute
+        if (element.name) {
+            selectors.push('css:[name="' + element.name + '"]');
+        }
+
+        // 3. Type + placeholder (for inputs)
+        if (element.type && element.placeholder) {
+            selectors.push('css:input[type="' + element.type + '"][placeholder="' + element.placeholder + '"]');
+        }
+
+        // 4. Unique class selector
+        for (var i = 0; i < classes.length; i++) {
+            selectors.push('class:' + classes[i]);
+        }
+
+        // 5. XPath by text
+        if (text.length > 0 && text.length < 50) {
+            selectors.push('xpath://' + tag + '[contains(text(),"' + text + '")]');
+        }
+
+        // 6. XPath by attributes
+        var xpath = '//' + tag;
+        if (element.id) {
+            xpath += '[@id="' + element.id + '"]';
+        } else if (classes.length) {
+            xpath += '[contains(@class,"' + classes[0] + '")]';
+        }
+        selectors.push('xpath:' + xpath);
+
+        // 7. Compound CSS selector
+        var cssSelector = tag;
+        if (element.id) {
+            cssSelector += '#' + element.id;
+        } else if (classes.length) {
+            cssSelector += '.' + classes[0];
+        }
+        selectors.push('css:' + cssSelector);
+
+        // 8. Position-based selector (last resort)
+        if (element.parentElement) {
+            var index = Array.prototype.indexOf.call(element.parentElement.children, element);
+            selectors.push('css:' + tag + ':nth-child(' + (index + 1) + ')');
+        }
+
+        return {
+            'tag': tag,
+            'id': element.id || '',
+            'class': classes.join(' '),
+            'text': text.substring(0, 50),
+            'type': element.type || '',
+            'name': element.name || '',
+            'selectors': selectors.filter(function (s, i) { return selectors.indexOf(s) === i; })
+        };
+    }
+
+    function push(type, element, extra) {
+        var event = {'type': type, 'timestamp': Date.now() / 1000, 'element': describe(element)};
+        for (var key in extra) { event[key] = extra[key]; }
+        queue.push(event);
+        return event;
+    }
+
+    function isTextField(element) {
+        var tag = element.tagName.toLowerCase();
+        return tag === 'textarea' || (tag === 'input' && NON_TEXT_INPUTS.indexOf(element.type) === -1);
+    }
+
+    function recordInput(element) {
+        // Consecutive keystrokes on the same field update one queued event
+        var last = queue[queue.length - 1];
+        if (lastInput && lastInput.element === element && last === lastInput.event) {
+            last.value = element.value;
+            last.timestamp = Date.now() / 1000;
+            return;
+        }
+        lastInput = {'element': element, 'event': push('input', element, {'value': element.value})};
+    }
+
+    window.addEventListener('click', function (e) {
+        if (!(e.target instanceof Element)) { return; }
+        var target = e.target.closest(INTERACTIVE) || e.target;
+        // Clicking a <label> makes the browser send a second, synthetic click to
+        // its control; recording both would toggle a checkbox back on replay
+        if (labelControl !== null && target === labelControl) {
+            labelControl = null;
+            return;
+        }
+        var label = e.target.closest('label');
+        labelControl = label && label.control && label.control !== e.target ? label.control : null;
+        if (labelControl !== null) {
+            setTimeout(function () { labelControl = null; }, 0);
+        }
+        push('click', target);
+    }, true);
+
+    window.addEventListener('input', function (e) {
+        if (e.target instanceof Element && isTextField(e.target)) { recordInput(e.target); }
+    }, true);
+
+    window.addEventListener('change', function (e) {
+        var element = e.target;
+        if (!(element instanceof Element)) { return; }
+        if (element.tagName.toLowerCase() === 'select') {
+            var option = element.options[element.selectedIndex];
+            push('select', element, {'value': element.value, 'label': option ? option.text.trim() : ''});
+        } else if (isTextField(element) && !(lastInput && lastInput.element === element
+                                              && lastInput.event.value === element.value)) {
+            recordInput(element);  // e.g. autofill without input events
+        }
+    }, true);
+
+    window.addEventListener('keydown', function (e) {
+        if (e.key === 'Enter' && e.target instanceof Element) { push('enter', e.target); }
+    }, true);
+
+    // Popups: a MutationObserver reports each dialog/modal/alert as it appears,
+    // even if it closes before the next drain
+    function popupInfo(element) {
+        return {
+            'id': element.id || '',
+            'class': classList(element).join(' '),
+            'type': element.tagName.toLowerCase(),
+            'content': (element.textContent || '').trim().substring(0, 100),
+            'visible': !element.hidden
+        };
+    }
+
+    function checkPopup(element) {
+        // Only the outermost match: a dialog's inner [role="dialog"] is the same popup
+        var isPopup = element.matches(POPUP_SELECTOR) && !element.hidden
+            && !(element.parentElement && element.parentElement.closest(POPUP_SELECTOR));
+        if (isPopup && !reportedPopups.has(element)) {
+            reportedPopups.add(element);
+            push('popup', element, {'popup': popupInfo(element)});
+        } else if (!isPopup) {
+            reportedPopups.delete(element);  // Reported again if it re-opens
+        }
+    }
+
+    function scanPopups(root) {
+        if (!(root instanceof Element)) { return; }
+        checkPopup(root);
+        var popups = root.querySelectorAll(POPUP_SELECTOR);
+        for (var i = 0; i < popups.length; i++) { checkPopup(popups[i]); }
+    }
+
+    var observing = typeof MutationObserver !== 'undefined';
+    if (observing) {
+        new MutationObserver(function (mutations) {
+            for (var i = 0; i < mutations.length; i++) {
+                var mutation = mutations[i];
+                if (mutation.type === 'attributes') {
+                    checkPopup(mutation.target);
+                } else {
+                    for (var j = 0; j < mutation.addedNodes.length; j++) { scanPopups(mutation.addedNodes[j]); }
+                }
+            }
+        }).observe(document, {
+            'childList': true,
+            'subtree': true,
+            'attributes': true,
+            'attributeFilter': ['class', 'role', 'open', 'hidden', 'id']
+        });
+
+        // Popups already on the page when the recorder is installed
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', function () { scanPopups(document.documentElement); });
+        } else {
+            scanPopups(document.documentElement);
+        }
+    }
+
+    window.addEventListener('pagehide', function () {
+        try { sessionStorage.setItem(STORAGE_KEY, JSON.stringify(queue)); } catch (e) {}
+    });
+
+    window.__seleniumRecorder = {
+        observing: observing,
+        drain: function () {
+            var events = queue;
+            queue = [];
+            lastInput = null;
+            return events;
+        }
+    };
+})();
+"""
+
+INSTALL_SCRIPT = RECORDER_SCRIPT + "\nreturn window.__seleniumRecorder.observing;"
+# Drain only reads the queue; null means the page lost the recorder (navigation)
+DRAIN_SCRIPT = "return window.__seleniumRecorder ? window.__seleniumRecorder.drain() : null;"
+REINSTALL_SCRIPT = RECORDER_SCRIPT + "\nreturn window.__seleniumRecorder.drain();"
+
+
+class ScreenshotWorker:
+    """Background screenshot pipeline: capture, dedupe, downscale and write off the recording path"""
+
+    _STOP = object()
+
+    def __init__(self, driver, directory, max_pending=4, image_format="png", quality=80,
+                 max_width=None, dedupe=True, driver_lock=None):
+        self.driver = driver
+        # WebDriver is not thread-safe: share the lock of every other thread using the driver
+        self.driver_lock = driver_lock or threading.Lock()
+        self.directory = Path(directory)
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.dedupe = dedupe
+
+        # Bounded queues: recording never waits on screenshots
+        self.requests = queue.Queue(maxsize=max_pending)
+        self.frames = queue.Queue(maxsize=max_pending)
+        self.stats = {"requested": 0, "captured": 0, "written": 0,
+                      "coalesced": 0, "dropped": 0, "duplicates": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        self._use_cdp = True
+        self._last_digest = None
+
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.capture_thread.start()
+        self.writer_thread.start()
+        return self
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def request(self, name):
+        """Queue a screenshot without blocking; when full, the oldest pending request is coalesced"""
+        self._count("requested")
+        while True:
+            try:
+                self.requests.put_nowait(name)
+                return
+            except queue.Full:
+                try:
+                    self.requests.get_nowait()
+                    self._count("coalesced")
+                except queue.Empty:
+                    pass
+
+    def _capture(self):
+        """Grab one frame as base64 (CDP on Chromium, WebDriver otherwise)"""
+        with self.driver_lock:
+            if self._use_cdp:
+                params = {"format": self.image_format}
+                if self.image_format == "jpeg":
+                    params["quality"] = self.quality
+                try:
+                    return self.driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"], self.image_format
+                except Exception:
+                    self._use_cdp = False
+            return self.driver.get_screenshot_as_base64(), "png"
+
+    def _capture_loop(self):
+        """Capture requested frames; requests that piled up meanwhile become one frame"""
+        stopping = False
+        while not stopping:
+            name = self.requests.get()
+            if name is self._STOP:
+                break
+            while True:
+                try:
+                    newer = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is self._STOP:
+                    stopping = True
+                    break
+                name = newer
+                self._count("coalesced")
+
+            try:
+                data, image_format = self._capture()
+            except Exception as e:
+                self._count("failed")
+                print(f"⚠️ Screenshot failed: {str(e)[:80]}")
+                continue
+            self._count("captured")
+
+            try:
+                self.frames.put_nowait((name, data, image_format))
+            except queue.Full:
+                self._count("dropped")  # Writer behind: drop the frame rather than stall
+
+        self.frames.put(self._STOP)
+
+    def _write_loop(self):
+        """Decode, dedupe, downscale and write frames"""
+        while True:
+            frame = self.frames.get()
+            if frame is self._STOP:
+                break
+            name, data, image_format = frame
+            try:
+                raw = base64.b64decode(data)
+                if self.dedupe:
+                    digest = hashlib.sha1(raw).hexdigest()
+                    if digest == self._last_digest:
+                        self._count("duplicates")
+                        continue
+                    self._last_digest = digest
+                if self.max_width:
+                    raw = self._downscale(raw, image_format)
+
+                extension = "jpg" if image_format == "jpeg" else image_format
+                (self.directory / f"{name}.{extension}").write_bytes(raw)
+                self._count("written")
+            except Exception as e:
+                self._count("failed")
+                print(f"⚠️ Could not write screenshot {name}: {e}")
+
+    def _downscale(self, raw, image_format):
+        """Resize to max_width (requires Pillow)"""
+        try:
+            from PIL import Image
+        except ImportError:
+            print("⚠️ Install Pillow to downscale screenshots: pip install Pillow")
+            self.max_width = None
+            return raw
+
+        image = Image.open(io.BytesIO(raw))
+        if image.width <= self.max_width:
+            return raw
+        height = round(image.height * self.max_width / image.width)
+        image = image.resize((self.max_width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        if image_format == "jpeg":
+            image.convert("RGB").save(output, format="JPEG", quality=self.quality)
+        else:
+            image.save(output, format="PNG", optimize=True)
+        return output.getvalue()
+
+    def close(self, timeout=10):
+        """Flush pending screenshots and stop the worker threads"""
+        self.requests.put(self._STOP)
+        self.capture_thread.join(timeout)
+        self.writer_thread.join(timeout)
+
+
 class SeleniumRecorder:
     """Professional Selenium code recorder with multi-strategy selectors"""
 
-    def __init__(self):
+    def __init__(self, drain_interval=0.25, popup_polling=False, popup_poll_interval=0.5,
+                 screenshot_dir="screenshots", screenshot_max_width=None):
         self.driver = None
+        self.driver_lock = threading.Lock()  # one WebDriver call at a time across all threads
         self.actions = []
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.screenshots_count = 0
+        self.screenshot_dir = Path(screenshot_dir) / self.session_id
+        self.screenshot_max_width = screenshot_max_width
+        self.screenshots = None
         self.recording = False
-        self.text_buffer = ""
+        self.capturing = False
+        self.finished = False
+        self.drain_interval = drain_interval
+        self.popup_polling = popup_polling  # True: poll instead of the in-page MutationObserver
+        self.popup_poll_interval = popup_poll_interval
         self.detected_popups = []
 
     def start_recording(self, url):
@@ -48,8 +443,15 @@ class SeleniumRecorder:
 
         # Setup browser
         self._setup_browser()
+        self.screenshots = ScreenshotWorker(self.driver, self.screenshot_dir,
+                                            max_width=self.screenshot_max_width,
+                                            driver_lock=self.driver_lock).start()
         self._register_action("navigate", {"url": url})
-        self.driver.get(url)
+        with self.driver_lock:
+            self.driver.get(url)
+        if not self._install_recorder():
+            print("⚠️ MutationObserver not available: falling back to popup polling")
+            self.popup_polling = True
         self._take_screenshot("start")
 
         print(f"📹 Session: {self.session_id}")
@@ -69,12 +471,19 @@ class SeleniumRecorder:
         print("=" * 55)
 
         self.recording = True
+        self.capturing = True
         self._setup_listeners()
 
-        # Start popup monitor thread
-        self.popup_thread = threading.Thread(target=self._monitor_popups)
-        self.popup_thread.daemon = True
-        self.popup_thread.start()
+        # Start browser event drain thread
+        self.event_thread = threading.Thread(target=self._process_events)
+        self.event_thread.daemon = True
+        self.event_thread.start()
+
+        # Popups arrive with the page events; polling only as a fallback
+        if self.popup_polling:
+            self.popup_thread = threading.Thread(target=self._monitor_popups)
+            self.popup_thread.daemon = True
+            self.popup_thread.start()
 
         self._wait_for_finish()
 
@@ -88,37 +497,30 @@ class SeleniumRecorder:
         self.driver.implicitly_wait(5)
 
     def _setup_listeners(self):
-        """Configure keyboard and mouse listeners"""
-        mouse.on_click(self._capture_click)
-        keyboard.on_press(self._capture_key)
-
-        # Hotkeys
+        """Configure hotkeys (clicks and typing are recorded in the page)"""
         keyboard.add_hotkey('f10', self._toggle_recording)
         keyboard.add_hotkey('f12', self._finish_recording)
         keyboard.add_hotkey('f9', self._manual_screenshot)
         keyboard.add_hotkey('f11', self._manual_popup_detection)
 
     def _monitor_popups(self):
-        """Continuously monitor for popup windows"""
+        """Fallback: poll for popup windows when the in-page observer is unavailable"""
         previous_count = 0
 
-        while self.recording:
+        while self.capturing:
             try:
                 current_count = self._count_popups()
 
-                if current_count > previous_count:
-                    difference = current_count - previous_count
-                    for _ in range(difference):
-                        print(f"🔔 POPUP DETECTED #{current_count}")
+                if self.recording and current_count > previous_count:
+                    for _ in range(current_count - previous_count):
                         self._register_popup()
-                        self._take_screenshot(f"popup_{current_count}")
 
                 previous_count = current_count
-                time.sleep(0.5)
 
             except Exception as e:
                 print(f"⚠️ Popup monitor error: {e}")
-                break
+
+            time.sleep(self.popup_poll_interval)
 
     def _count_popups(self):
         """Count active popup windows"""
@@ -131,20 +533,23 @@ class SeleniumRecorder:
             popups += document.querySelectorAll('[role="alert"]').length;
             return popups;
             """
-            return self.driver.execute_script(script)
+            return self._execute_script(script)
         except:
             return 0
 
-    def _register_popup(self):
+    def _register_popup(self, popup_info=None, timestamp=None):
         """Register popup appearance"""
-        popup_info = self._get_popup_info()
+        if popup_info is None:
+            popup_info = self._get_popup_info()
 
         self._register_action("popup_detected", {
-            "timestamp": time.time(),
+            "timestamp": timestamp or time.time(),
             "popup": popup_info
         })
 
         self.detected_popups.append(popup_info)
+        print(f"🔔 POPUP DETECTED #{len(self.detected_popups)}")
+        self._take_screenshot(f"popup_{len(self.detected_popups)}")
 
     def _get_popup_info(self):
         """Get information about the most recent popup"""
@@ -163,179 +568,111 @@ class SeleniumRecorder:
             }
             return null;
             """
-            return self.driver.execute_script(script) or {"type": "unknown"}
+            return self._execute_script(script) or {"type": "unknown"}
         except Exception as e:
             return {"error": str(e), "type": "unknown"}
 
-    def _capture_click(self):
-        """Capture clicks with multiple selector strategies"""
-        if not self.recording:
-            return
+    def _execute_script(self, script):
+        """Run a script in the page, serialized with the other threads using the driver"""
+        with self.driver_lock:
+            return self.driver.execute_script(script)
 
+    def _install_recorder(self):
+        """Inject the in-page event recorder and keep it across navigations.
+        Returns True if the page can report popups with a MutationObserver."""
         try:
-            time.sleep(0.15)  # Delay for better detection
-
-            # Get element with multiple selectors
-            element_info = self._get_element_with_selectors()
-
-            if element_info and element_info.get('selectors'):
-                # Register pending text
-                if self.text_buffer.strip():
-                    self._register_text()
-
-                self._register_action("click", {
-                    "element": element_info,
-                    "timestamp": time.time()
-                })
-
-                selectors = element_info.get('selectors', [])
-                print(f"👆 Click captured with {len(selectors)} selectors:")
-                for i, sel in enumerate(selectors[:3], 1):
-                    print(f"   {i}. {sel}")
-
-                self._take_screenshot(f"click_{len(self.actions)}")
-            else:
-                print("⚠️ Click not identified with robust selectors")
-
-        except Exception as e:
-            print(f"⚠️ Error capturing click: {e}")
-
-    def _get_element_with_selectors(self):
-        """Get element with 8 selector strategies"""
+            # Chromium (Edge): run the recorder on every new document before page scripts
+            with self.driver_lock:
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": RECORDER_SCRIPT})
+        except Exception:
+            pass  # Other drivers: _drain_events re-injects it after each navigation
         try:
-            script = """
-            var element = document.activeElement;
-            if (!element || element.tagName.toLowerCase() === 'body') {
-                var hovered = document.querySelectorAll(':hover');
-                if (hovered.length > 0) {
-                    element = hovered[hovered.length - 1];
-                }
-            }
-
-            if (element && element.tagName.toLowerCase() !== 'body') {
-                var selectors = [];
-
-                // 1. ID selector (highest priority)
-                if (element.id) {
-                    selectors.push('id:' + element.id);
-                }
-
-                // 2. Name attribute
-                if (element.name) {
-                    selectors.push('css:[name="' + element.name + '"]');
-                }
-
-                // 3. Type + placeholder (for inputs)
-                if (element.type && element.placeholder) {
-                    selectors.push('css:input[type="' + element.type + '"][placeholder="' + element.placeholder + '"]');
-                }
-
-                // 4. Unique class selector
-                if (element.className) {
-                    var classes = element.className.split(' ').filter(c => c.length > 0);
-                    for (var i = 0; i < classes.length; i++) {
-                        selectors.push('class:' + classes[i]);
-                    }
-                }
-
-                // 5. XPath by text
-                if (element.textContent && element.textContent.trim().length > 0 && element.textContent.trim().length < 50) {
-                    var text = element.textContent.trim();
-                    selectors.push('xpath://' + element.tagName.toLowerCase() + '[contains(text(),"' + text + '")]');
-                }
-
-                // 6. XPath by attributes
-                var xpath = '//' + element.tagName.toLowerCase();
-                if (element.id) {
-                    xpath += '[@id="' + element.id + '"]';
-                } else if (element.className) {
-                    var firstClass = element.className.split(' ')[0];
-                    xpath += '[contains(@class,"' + firstClass + '")]';
-                }
-                selectors.push('xpath:' + xpath);
-
-                // 7. Compound CSS selector
-                var cssSelector = element.tagName.toLowerCase();
-                if (element.id) {
-                    cssSelector += '#' + element.id;
-                } else if (element.className) {
-                    cssSelector += '.' + element.className.split(' ')[0];
-                }
-                selectors.push('css:' + cssSelector);
-
-                // 8. Position-based selector (last resort)
-                var siblings = Array.from(element.parentElement.children);
-                var index = siblings.indexOf(element);
-                selectors.push('css:' + element.tagName.toLowerCase() + ':nth-child(' + (index + 1) + ')');
-
-                // Remove duplicates
-                selectors = [...new Set(selectors)];
-
-                return {
-                    'tag': element.tagName.toLowerCase(),
-                    'id': element.id || '',
-                    'class': element.className || '',
-                    'text': element.textContent.trim().substring(0, 50),
-                    'type': element.type || '',
-                    'name': element.name || '',
-                    'selectors': selectors
-                };
-            }
-
-            return null;
-            """
-            return self.driver.execute_script(script)
+            return bool(self._execute_script(INSTALL_SCRIPT))
         except Exception as e:
-            return {"error": str(e), "selectors": []}
-
-    def _capture_key(self, event):
-        """Capture keyboard input"""
-        if not self.recording:
-            return
-
+            print(f"⚠️ Could not install the in-page recorder: {e}")
+            return False
+
+    def _process_events(self):
+        """Drain the page-side event queue in batches while recording"""
+        while self.capturing:
+            events = self._drain_events()
+            if self.recording:
+                for event in events:
+                    self._handle_event(event)
+            # Events wait in the page queue meanwhile, so none are missed
+            time.sleep(self.drain_interval)
+
+    def _drain_events(self):
+        """Fetch and clear all queued browser events in one WebDriver round-trip"""
         try:
-            key = event.name
+            events = self._execute_script(DRAIN_SCRIPT)
+            if events is None:
+                # New document without the recorder: inject it once (it restores
+                # the events queued before navigating) and drain in the same call
+                events = self._execute_script(REINSTALL_SCRIPT)
+            return events or []
+        except Exception:
+            return []  # Page navigating: pending events are restored from sessionStorage
+
+    def _handle_event(self, event):
+        """Turn a recorded browser event into an action"""
+        kind = event.get("type")
+        element = event.get("element") or {}
+        selectors = element.get("selectors", [])
+
+        if kind == "popup":
+            if not self.popup_polling:
+                self._register_popup(event.get("popup") or {"type": "unknown"}, event.get("timestamp"))
+            return
 
-            # Ignore control keys
-            control_keys = ['f9', 'f10', 'f11', 'f12', 'ctrl', 'alt', 'shift', 'tab']
-            if key.lower() in control_keys:
-                return
+        if not selectors:
+            print("⚠️ Event not identified with robust selectors")
+            return
 
-            if key == 'space':
-                self.text_buffer += ' '
-            elif key == 'enter':
-                if self.text_buffer.strip():
-                    self._register_text()
-                self._register_action("enter", {"timestamp": time.time()})
-                print("⏎ Enter detected")
-            elif key == 'backspace':
-                if self.text_buffer:
-                    self.text_buffer = self.text_buffer[:-1]
-            elif len(key) == 1:
-                self.text_buffer += key
+        if kind == "click":
+            self._register_action("click", {
+                "element": element,
+                "timestamp": event.get("timestamp")
+            })
 
-        except Exception as e:
-            print(f"⚠️ Error capturing key: {e}")
+            print(f"👆 Click captured with {len(selectors)} selectors:")
+            for i, sel in enumerate(selectors[:3], 1):
+                print(f"   {i}. {sel}")
 
-    def _register_text(self):
-        """Register text input with multiple selectors"""
-        if not self.text_buffer.strip():
-            return
+            self._take_screenshot(f"click_{len(self.actions)}")
 
-        element = self._get_element_with_selectors()
+        elif kind == "input":
+            # Keystrokes on the same field update the pending text action
+            last = self.actions[-1] if self.actions else None
+            if (last and last["type"] == "type_text"
+                    and last["data"]["element"].get("selectors") == selectors):
+                last["data"]["text"] = event.get("value", "")
+                last["data"]["timestamp"] = event.get("timestamp")
+                return
 
-        if element and element.get('selectors'):
             self._register_action("type_text", {
-                "text": self.text_buffer,
+                "text": event.get("value", ""),
                 "element": element,
-                "timestamp": time.time()
+                "timestamp": event.get("timestamp")
             })
 
-            selectors = element.get('selectors', [])
-            print(f"✍️ Text: '{self.text_buffer}' with {len(selectors)} fallback selectors")
+            print(f"✍️ Text in {element.get('tag', 'field')} with {len(selectors)} fallback selectors")
             self._take_screenshot(f"text_{len(self.actions)}")
 
-        self.text_buffer = ""
+        elif kind == "select":
+            self._register_action("select", {
+                "value": event.get("value", ""),
+                "label": event.get("label", ""),
+                "element": element,
+                "timestamp": event.get("timestamp")
+            })
+
+            print(f"🔽 Option selected: '{event.get('label', '')}' with {len(selectors)} fallback selectors")
+            self._take_screenshot(f"select_{len(self.actions)}")
+
+        elif kind == "enter":
+            self._register_action("enter", {"timestamp": event.get("timestamp")})
+            print("⏎ Enter detected")
 
     def _toggle_recording(self):
         """Pause/resume recording"""
@@ -346,7 +683,7 @@ class SeleniumRecorder:
         """Manual screenshot"""
         if self.recording:
             self._take_screenshot("manual")
-            print("📸 Manual screenshot taken")
+            print("📸 Manual screenshot queued")
 
     def _manual_popup_detection(self):
         """Manual popup detection"""
@@ -355,34 +692,37 @@ class SeleniumRecorder:
             print(f"🔍 Detected popups: {count}")
             if count > 0:
                 self._register_popup()
-                self._take_screenshot("popup_manual")
 
     def _finish_recording(self):
         """Finish recording and generate code"""
         print("\n🛑 FINISHING RECORDING...")
         self.recording = False
 
-        if self.text_buffer.strip():
-            self._register_text()
+        # Stop the drain thread and collect what is still queued in the page
+        self.capturing = False
+        self.event_thread.join()
+        for event in self._drain_events():
+            self._handle_event(event)
 
         self._process_and_generate()
+        self.finished = True
 
     def _wait_for_finish(self):
         """Wait for user to finish recording"""
         print("⏳ Recording... Press F12 when done")
 
         try:
-            while self.recording:
+            while not self.finished:
                 time.sleep(0.1)
         except KeyboardInterrupt:
             print("\n🛑 Recording interrupted")
             self.recording = False
+            self.capturing = False
 
     def _take_screenshot(self, name):
-        """Take screenshot"""
+        """Queue a screenshot for the background worker (never blocks recording)"""
         self.screenshots_count += 1
-        filename = f"screenshot_{self.session_id}_{self.screenshots_count:02d}_{name}.png"
-        self.driver.save_screenshot(filename)
+        self.screenshots.request(f"{self.screenshots_count:02d}_{name}")
 
     def _register_action(self, action_type, data):
         """Register user action"""
@@ -399,6 +739,9 @@ class SeleniumRecorder:
         print(f"\n📊 PROCESSING {len(self.actions)} ACTIONS...")
         print(f"🔔 DETECTED POPUPS: {len(self.detected_popups)}")
 
+        # Flush pending screenshots while the browser is still open
+        self.screenshots.close()
+
         # Save session
         self._save_session()
 
@@ -413,11 +756,14 @@ class SeleniumRecorder:
         print("=" * 50)
         print(f"📄 Generated code: {code_file}")
         print(f"📊 Total actions: {len(self.actions)}")
-        print(f"📸 Screenshots: {self.screenshots_count}")
+        stats = self.screenshots.stats
+        print(f"📸 Screenshots: {stats['written']} in {self.screenshot_dir} "
+              f"({stats['coalesced']} coalesced, {stats['dropped']} dropped, {stats['duplicates']} duplicates)")
         print(f"🔔 Popups detected: {len(self.detected_popups)}")
         print("=" * 50)
 
-        self.driver.quit()
+        with self.driver_lock:
+            self.driver.quit()
 
     def _save_session(self):
         """Save session data to JSON"""
@@ -426,6 +772,7 @@ class SeleniumRecorder:
             "timestamp": datetime.now().isoformat(),
             "total_actions": len(self.actions),
             "detected_popups": self.detected_popups,
+            "screenshots": {"directory": str(self.screenshot_dir), **self.screenshots.stats},
             "actions": self.actions
         }
 
@@ -446,7 +793,7 @@ class SeleniumRecorder:
             '',
             'from selenium import webdriver',
             'from selenium.webdriver.common.by import By',
-            'from selenium.webdriver.support.ui import WebDriverWait',
+            'from selenium.webdriver.support.ui import Select, WebDriverWait',
             'from selenium.webdriver.support import expected_conditions as EC',
             'from selenium.webdriver.edge.options import Options',
             'import time',
@@ -490,6 +837,25 @@ class SeleniumRecorder:
             '                time.sleep(1)',
             '    return False',
             '',
+            'def robust_select(driver, selectors, value, description="select"):',
+            '    """Try selecting an option with multiple fallback selectors"""',
+            '    for i, selector in enumerate(selectors):',
+            '        try:',
+            '            strategy, selector_value = selector.split(":", 1)',
+            '            by = {"id": By.ID, "css": By.CSS_SELECTOR, "xpath": By.XPATH, "class": By.CLASS_NAME}.get(strategy, By.CSS_SELECTOR)',
+            '            ',
+            '            element = WebDriverWait(driver, 5).until(',
+            '                EC.presence_of_element_located((by, selector_value))',
+            '            )',
+            '            Select(element).select_by_value(value)',
+            '            print(f"✅ Option selected in {description} using: {selector}")',
+            '            return True',
+            '        except Exception as e:',
+            '            print(f"⚠️ Attempt {i+1}/{len(selectors)} failed: {str(e)[:50]}")',
+            '            if i < len(selectors) - 1:',
+            '                time.sleep(1)',
+            '    return False',
+            '',
             'def run_automation():',
             '    """Execute recorded automation with maximum robustness"""',
             '    options = Options()',
@@ -541,9 +907,19 @@ class SeleniumRecorder:
 
                 if selectors and text:
                     lines.append(f'        selectors_{step} = {selectors}')
-                    lines.append(f'        robust_type(driver, selectors_{step}, "{text}", "{desc}")')
+                    lines.append(f'        robust_type(driver, selectors_{step}, {text!r}, "{desc}")')
                     lines.append(f'        driver.save_screenshot("step_{step:02d}_type.png")')
 
+            elif action_type == "select":
+                element = data.get("element", {})
+                selectors = element.get("selectors", [])
+                value = data.get("value", "")
+
+                if selectors:
+                    lines.append(f'        selectors_{step} = {selectors}')
+                    lines.append(f'        robust_select(driver, selectors_{step}, {value!r}, "select")')
+                    lines.append(f'        driver.save_screenshot("step_{step:02d}_select.png")')
+
             elif action_type == "popup_detected":
                 lines.append('        # Popup detected - wait for it to load')
                 lines.append('        time.sleep(2)')